@@ -0,0 +1,230 @@
+from __future__ import annotations
+import argparse, json, platform, sys, tempfile, time, tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import MINUTE_MS, load_fixture, market_chart_payload, price_matrix, random_walk
+
+# Offline benchmarks for the parse / index / metrics / cache hot paths.
+#   python -m benchmarks.run                      # compare against benchmarks/baseline.json
+#   python -m benchmarks.run --sizes 1k,10m       # 10M rows only runs the array-backed cases
+#   python -m benchmarks.run --save-baseline      # record a new baseline on this machine
+# Wall time is the best of --repeat runs (perf_counter); memory is the tracemalloc peak
+# of one extra run, which counts NumPy/pandas buffers as well as Python objects.
+
+BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = "1k,10k,100k,1m"
+# differences below these floors are timer/allocator noise, never regressions
+MIN_SECONDS = 0.002
+MIN_MB = 1.0
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[int, Path], Any]
+    run: Callable[[Any], Any]
+    max_rows: Optional[int] = None     # Python-object payloads stop at 1M rows (~1.5 GB of lists)
+    teardown: Optional[Callable[[Any], None]] = None
+    fixed: bool = False                # recorded fixture: size-independent, reported once
+
+# ---- cases ------------------------------------------------------------------------------
+
+def _payload_build_df(n: int, tmp: Path):
+    return market_chart_payload(n, step_ms=MINUTE_MS)
+
+def _run_build_df(payload):
+    from src.data.coingecko import _build_df_from_payload
+    return _build_df_from_payload(payload)
+
+def _offline(*args, **kwargs):
+    raise RuntimeError("benchmark cache miss: network fetch attempted")
+
+def _setup_coingecko_daily(n: int, tmp: Path, payload: Optional[dict] = None):
+    """Prime src.coingecko's JSON cache in `tmp` so the timed calls are pure cache-read + parse."""
+    import src.coingecko as cg
+    saved = {"CACHE_DIR": cg.CACHE_DIR, "_get_json_with_retry": cg._get_json_with_retry}
+    payload = payload if payload is not None else market_chart_payload(n, start_ms=0)
+    cg.CACHE_DIR = tmp / f"cg_{n}"
+    cg.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cg._get_json_with_retry = lambda *a, **k: payload
+    cg._coingecko_daily("bitcoin", "usd", n)
+    cg._get_json_with_retry = _offline
+    return {"module": cg, "saved": saved, "days": n}
+
+def _run_coingecko_daily(st):
+    from src.utils.cache import frame_cache
+    frame_cache(st["module"].CACHE_DIR).clear_memory()  # time the disk read + parse, not a memory hit
+    return st["module"]._coingecko_daily("bitcoin", "usd", st["days"])
+
+def _teardown_coingecko_daily(st):
+    for k, v in st["saved"].items():
+        setattr(st["module"], k, v)
+
+def _setup_fixture(n: int, tmp: Path):
+    payload = load_fixture("coingecko_bitcoin_usd_30.json")
+    st = _setup_coingecko_daily(len(payload["prices"]), tmp, payload)
+    st["payload"] = payload
+    return st
+
+def _run_fixture(st):
+    _run_build_df(st["payload"])
+    return _run_coingecko_daily(st)
+
+def _run_build_index(P):
+    from src.index.engine import build_index
+    return build_index(P, scheme="equal", rebalance="M")
+
+def _setup_series(n: int, tmp: Path):
+    ts = np.int64(1_367_366_400_000) + np.arange(n, dtype=np.int64) * MINUTE_MS
+    return {"ts": ts, "close": random_walk(n), "out": tmp / f"chunked_{n}.parquet"}
+
+def _run_chunked(st):
+    from src.index.out_of_core import BATCH_ROWS, build_base_index_chunked
+    ts, close = st["ts"], st["close"]
+    chunks = ((ts[i:i + BATCH_ROWS], close[i:i + BATCH_ROWS]) for i in range(0, len(ts), BATCH_ROWS))
+    return build_base_index_chunked(chunks, st["out"], date_only=False)
+
+def _run_batch_metrics(P):
+    from src.reports.metrics import batch_perf_metrics
+    return batch_perf_metrics(P)
+
+def _run_rolling(st):
+    from src.reports.rolling import rolling_metrics
+    return rolling_metrics(pd.Series(st["close"]))
+
+def _setup_cache(n: int, tmp: Path):
+    path = tmp / f"cache_{n}.json"
+    payload = market_chart_payload(n, start_ms=0)
+    from src.utils.cache import write_json_cache
+    write_json_cache(path, payload)
+    return {"path": path, "payload": payload}
+
+def _run_cache_write(st):
+    from src.utils.cache import write_json_cache
+    write_json_cache(st["path"], st["payload"])
+
+def _run_cache_read(st):
+    from src.utils.cache import read_json_cache
+    return read_json_cache(st["path"])
+
+def _run_cli_startup(_):
+    import subprocess
+    subprocess.run([sys.executable, "-m", "src", "--help"], check=True, stdout=subprocess.DEVNULL,
+                   cwd=Path(__file__).resolve().parents[1])
+
+CASES = [
+    Case("parse.build_df_from_payload", _payload_build_df, _run_build_df, max_rows=1_000_000),
+    Case("parse.coingecko_daily", _setup_coingecko_daily, _run_coingecko_daily, max_rows=100_000,
+         teardown=_teardown_coingecko_daily),  # daily rows: 100k days from 1970 is the datetime64[ns] limit
+    Case("parse.fixture_coingecko_30d", _setup_fixture, _run_fixture, teardown=_teardown_coingecko_daily, fixed=True),
+    Case("index.build_index", lambda n, tmp: price_matrix(n), _run_build_index),
+    Case("index.base_chunked", _setup_series, _run_chunked),
+    Case("metrics.batch_perf", lambda n, tmp: price_matrix(n), _run_batch_metrics),
+    Case("metrics.rolling", _setup_series, _run_rolling),
+    Case("cache.write_json", _setup_cache, _run_cache_write, max_rows=1_000_000),
+    Case("cache.read_json", _setup_cache, _run_cache_read, max_rows=1_000_000),
+    Case("cli.startup", lambda n, tmp: None, _run_cli_startup, fixed=True),  # interpreter + dispatcher, no pandas
+]
+
+# ---- harness ----------------------------------------------------------------------------
+
+def measure(case: Case, n: int, tmp: Path, repeat: int = 3) -> Dict[str, float]:
+    st = case.setup(n, tmp)
+    try:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            case.run(st)
+            times.append(time.perf_counter() - t0)
+        tracemalloc.start()
+        try:
+            case.run(st)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        if case.teardown:
+            case.teardown(st)
+    return {"seconds": min(times), "median_seconds": float(np.median(times)), "peak_mb": peak / 2**20}
+
+def compare(result: Dict[str, float], base: Optional[Dict[str, float]], tolerance: float) -> list:
+    """Names of the measurements that got worse than baseline by more than `tolerance`."""
+    if not base:
+        return []
+    flags = []
+    if result["seconds"] > base["seconds"] * (1 + tolerance) and result["seconds"] - base["seconds"] > MIN_SECONDS:
+        flags.append("time")
+    if result["peak_mb"] > base["peak_mb"] * (1 + tolerance) and result["peak_mb"] - base["peak_mb"] > MIN_MB:
+        flags.append("memory")
+    return flags
+
+def run(sizes, cases=None, repeat: int = 3, baseline: Optional[dict] = None, tolerance: float = 0.25) -> dict:
+    base = (baseline or {}).get("results", {})
+    results, regressions = {}, []
+    with tempfile.TemporaryDirectory(prefix="bench_") as d:
+        tmp = Path(d)
+        for case in CASES:
+            if cases and not any(case.name.startswith(c) for c in cases):
+                continue
+            for label in (["fixture"] if case.fixed else sizes):
+                n = 0 if case.fixed else SIZES[label]
+                if case.max_rows is not None and n > case.max_rows:
+                    continue
+                key = f"{case.name}@{label}"
+                r = measure(case, n, tmp, repeat)
+                b = base.get(key)
+                flags = compare(r, b, tolerance)
+                results[key] = r
+                if flags:
+                    regressions.append(key)
+                ratio = f"{r['seconds'] / b['seconds']:6.2f}x" if b else "    new"
+                print(f"{key:<42} {r['seconds'] * 1e3:10.2f} ms {r['peak_mb']:9.1f} MB  {ratio}"
+                      + (f"  REGRESSION ({', '.join(flags)})" if flags else ""))
+    return {"meta": {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                     "machine": platform.machine(), "system": platform.system(),
+                     "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+            "results": results, "regressions": regressions}
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Offline benchmarks for parse/index/metrics/cache hot paths.")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma list of {list(SIZES)}.")
+    ap.add_argument("--cases", default=None, help="Comma list of case-name prefixes, e.g. parse,index.")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth vs baseline.")
+    ap.add_argument("--out", default=None, help="Write this run's results JSON here.")
+    ap.add_argument("--save-baseline", action="store_true", help="Overwrite --baseline with this run.")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        ap.error(f"unknown sizes {unknown}; choose from {list(SIZES)}")
+    cases = [c.strip() for c in args.cases.split(",")] if args.cases else None
+    bpath = Path(args.baseline)
+    baseline = None if args.save_baseline or not bpath.exists() else json.loads(bpath.read_text(encoding="utf-8"))
+
+    report = run(sizes, cases, args.repeat, baseline, args.tolerance)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        if bpath.exists():
+            # keep entries for sizes/cases this run skipped
+            old = json.loads(bpath.read_text(encoding="utf-8")).get("results", {})
+            report["results"] = {**old, **report["results"]}
+        report.pop("regressions")
+        bpath.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Wrote baseline {bpath} ({len(report['results'])} entries)")
+        return 0
+    if report["regressions"]:
+        print(f"[warn] {len(report['regressions'])} regression(s) beyond {args.tolerance:.0%}: "
+              + ", ".join(report["regressions"]))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Deterministic inputs for the benchmarks: geometric random-walk prices shaped like
+# the provider payloads and price matrices the pipeline sees in production.
+
+FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures"
+DAY_MS = 24 * 60 * 60 * 1000
+MINUTE_MS = 60 * 1000
+START_MS = 1_367_366_400_000  # 2013-05-01, first CoinGecko BTC close
+
+def random_walk(n: int, seed: int = 0, start: float = 100.0, vol: float = 0.03) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0.0, vol, n)))
+
+def market_chart_payload(n: int, step_ms: int = DAY_MS, start_ms: int = START_MS, seed: int = 0) -> Dict[str, List]:
+    """CoinGecko /market_chart shape: {"prices"|"market_caps"|"total_volumes": [[ms, value], ...]}."""
+    ms = start_ms + np.arange(n, dtype=np.int64) * step_ms
+    px = random_walk(n, seed, start=100.0)
+    ts = ms.tolist()
+    return {
+        "prices": [list(x) for x in zip(ts, px.tolist())],
+        "market_caps": [list(x) for x in zip(ts, (px * 19.5e6).tolist())],
+        "total_volumes": [list(x) for x in zip(ts, (px * 3e5).tolist())],
+    }
+
+def price_matrix(rows: int, max_assets: int = 1000, seed: int = 0) -> pd.DataFrame:
+    """
+    Daily closes, dates x assets with about `rows` cells (at most 10k dates, so 10M cells
+    is 10k days x 1000 assets); assets list at random dates in the first quarter.
+    """
+    n_assets = max(1, min(max_assets, rows // 10_000))
+    T = max(2, rows // n_assets)
+    rng = np.random.default_rng(seed)
+    P = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.03, (T, n_assets)), axis=0))
+    listed = rng.integers(0, max(1, T // 4), n_assets)
+    P[np.arange(T)[:, None] < listed] = np.nan
+    dates = pd.date_range(pd.Timestamp(START_MS, unit="ms"), periods=T, freq="D")
+    return pd.DataFrame(P, index=dates, columns=[f"coin{i:03d}" for i in range(n_assets)])
+
+def load_fixture(name: str) -> dict:
+    """Recorded provider payload from tests/fixtures (e.g. 'coingecko_bitcoin_usd_30.json')."""
+    return json.loads((FIXTURES / name).read_text(encoding="utf-8"))
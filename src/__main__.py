@@ -0,0 +1,55 @@
+from __future__ import annotations
+import importlib, sys
+
+# Single entry point: python -m src <command> [args]. Only the chosen command's module
+# is imported, so `--help` and dispatch cost a bare interpreter start; measure with
+#   python -X importtime -m src <command> --help
+
+COMMANDS = {
+    "pull":       ("src.cli.pull_prices", "Pull daily closes (or intraday bars) through the provider chain."),
+    "index":      ("src.cli.make_multi_index", "Build a multi-asset index from the price store."),
+    "base":       ("src.cli.make_btc_index", "Build the BTC close-only base index."),
+    "chunked":    ("src.cli.make_index_chunked", "Build a base index out of core from bars."),
+    "update":     ("src.cli.daily_update", "Extend a base index from its checkpoint and refresh its factsheet."),
+    "metrics":    ("src.cli.make_rolling_metrics", "Rolling return/vol/drawdown series for an index CSV."),
+    "factsheet":  ("src.cli.make_factsheet_md", "Render the BTC baseline factsheet."),
+    "factsheets": ("src.cli.make_factsheets", "Render factsheets for every index CSV in parallel, skipping unchanged ones."),
+    "sweep":      ("src.cli.run_sweep", "Parallel index parameter sweep."),
+    "rebuild":    (None, "Pull BTC/ETH history, rebuild the base index and the factsheet."),
+}
+
+def usage() -> str:
+    lines = ["usage: python -m src <command> [args]   (python -m src <command> --help for options)", "", "commands:"]
+    lines += [f"  {name:<10} {text}" for name, (_, text) in COMMANDS.items()]
+    return "\n".join(lines)
+
+def rebuild(argv=None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m src rebuild", description=COMMANDS["rebuild"][1])
+    ap.add_argument("--coins", default="bitcoin,ethereum")
+    ap.add_argument("--days", default="max")
+    args = ap.parse_args(argv)
+    from src.cli import make_btc_index, make_factsheet_md, pull_prices
+    pull_prices.main(["--coins", args.coins, "--days", args.days])
+    make_btc_index.main([])
+    make_factsheet_md.main([])
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"unknown command {name!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = COMMANDS[name][0]
+    if module is None:
+        rebuild(rest)
+    else:
+        sys.argv[0] = f"python -m src {name}"  # argparse prog in --help/usage errors
+        importlib.import_module(module).main(rest)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+from src.utils import instrument
+
+# pandas, the price store and the index modules are imported after argument parsing,
+# so `python -m src update --help` stays light.
+
+def _closes_after(coin: str, after):
+    """date/close rows strictly after `after`; the store prunes by year/date, the parquet fallback filters."""
+    import pandas as pd
+    from src.data import price_store
+    from src.index.base_index import _resolve_price_path
+    start = pd.Timestamp(after) + pd.Timedelta(days=1)
+    if price_store.has_asset(coin):
+        return price_store.read(coin, start=start, columns=["date","close"])
+    df = pd.read_parquet(_resolve_price_path(coin), columns=["date","close"])
+    return df[df["date"] >= start].sort_values("date").reset_index(drop=True)
+
+def _close_on(coin: str, day) -> float:
+    import pandas as pd
+    from src.data import price_store
+    from src.index.base_index import _resolve_price_path
+    day = pd.Timestamp(day)
+    if price_store.has_asset(coin):
+        df = price_store.read(coin, start=day, end=day, columns=["date","close"])
+    else:
+        df = pd.read_parquet(_resolve_price_path(coin), columns=["date","close"])
+        df = df[df["date"] == day]
+    if df.empty:
+        raise RuntimeError(f"No {coin} close on {day.date()} to seed the checkpoint")
+    return float(df["close"].iloc[-1])
+
+def _csv_last_date(path: Path):
+    """Date of the last row of an index CSV, reading only its tail."""
+    import pandas as pd
+    with path.open("rb") as f:
+        f.seek(0, 2)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [ln for ln in f.read().decode("utf-8-sig", errors="ignore").splitlines() if ln.strip()]
+    last = lines[-1].split(",", 1)[0] if lines else ""
+    return None if not last or last == "date" else pd.Timestamp(last)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Extend a base index by the bars that arrived since its checkpoint.")
+    ap.add_argument("--coin", default="bitcoin")
+    ap.add_argument("--name", default="btc_close_base1000")
+    ap.add_argument("--csv", default="data/processed/indexes/btc_close_base1000.csv")
+    ap.add_argument("--checkpoint", default=None, help="Defaults to <csv stem>.checkpoint.json next to the CSV.")
+    ap.add_argument("--factsheet", default="docs/factsheet_btc_close_base1000.md")
+    ap.add_argument("--risk_paths", type=int, default=0,
+                    help="Resampled paths for the factsheet risk section; rereads the whole CSV (0 = skip).")
+    instrument.add_arguments(ap)
+    args = ap.parse_args(argv)
+    instrument.from_args(args)
+    import pandas as pd
+    from src.data import price_store
+    from src.index.base_index import NOTES, checkpoint_path
+    from src.index.checkpoint import IndexCheckpoint
+    from src.reports.factsheets import render_factsheet
+
+    csv_path = Path(args.csv)
+    ck_path = Path(args.checkpoint) if args.checkpoint else checkpoint_path(csv_path)
+    ck = IndexCheckpoint.load(ck_path)
+    if ck is None:
+        # first run only: seed from the published history
+        hist = pd.read_csv(csv_path, usecols=["date","index_level","divisor"], parse_dates=["date"])
+        last = hist["date"].max()
+        ck = IndexCheckpoint.bootstrap(args.name, hist, shares={args.coin: 1.0},
+                                       last_prices={args.coin: _close_on(args.coin, last)})
+        print(f"[info] Seeded checkpoint {ck_path} from {len(hist)} rows")
+
+    bars = _closes_after(args.coin, ck.last_date)
+    with instrument.span("index.update"):
+        rows = [ck.step(r.date, {args.coin: r.close}) for r in bars.itertuples(index=False)]
+    if not rows:
+        print(f"[info] {args.name} up to date at {ck.last_date}")
+        instrument.finish(args, {"command": "daily_update", "index": args.name, "new_rows": 0})
+        return
+
+    new = pd.DataFrame(rows)
+    new["notes"] = NOTES
+    # rows first, checkpoint last: a run that dies in between leaves the old checkpoint, and the
+    # rerun's rows are skipped here (CSV tail) or replaced by key (store), so nothing is doubled
+    csv_last = _csv_last_date(csv_path)
+    fresh = new if csv_last is None else new[pd.to_datetime(new["date"]) > csv_last]
+    fresh[["date","index_level","divisor","notes"]].to_csv(csv_path, mode="a", header=False, index=False)
+    if price_store.has_asset(args.name, table="indexes"):
+        store_rows = new[["date","index_level","divisor"]].assign(date=pd.to_datetime(new["date"]))
+        price_store.append(store_rows, args.name, table="indexes", key="date")
+    ck.save(ck_path)
+    risk = None
+    if args.risk_paths:
+        from src.reports.risk import risk_summary
+        levels = pd.read_csv(csv_path, usecols=["index_level"])["index_level"].to_numpy(dtype=float)
+        risk = risk_summary(levels, n_paths=args.risk_paths)
+    Path(args.factsheet).write_text(render_factsheet(ck.metrics(), risk), encoding="utf-8")
+    print(f"[ok] {args.name}: +{len(rows)} rows through {ck.last_date} level={ck.last_level:.4f}")
+    instrument.finish(args, {"command": "daily_update", "index": args.name, "new_rows": len(rows)})
+
+if __name__ == "__main__":
+    main()
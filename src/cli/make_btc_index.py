@@ -1,10 +1,18 @@
 from __future__ import annotations
-from src.index.base_index import make_base_index_for_coin
+import argparse
 
-if __name__ == "__main__":
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the BTC close-only base index (base=1000).")
+    ap.add_argument("--csv_out", default="data/processed/indexes/btc_close_base1000.csv")
+    args = ap.parse_args(argv)
+    from src.index.base_index import make_base_index_for_coin
     make_base_index_for_coin(
         coin="bitcoin",
-        csv_out="data/processed/indexes/btc_close_base1000.csv",
-        base_level=1000.0
+        csv_out=args.csv_out,
+        base_level=1000.0,
+        index_name="btc_close_base1000",
     )
-    print("Wrote data/processed/indexes/btc_close_base1000.csv")
+    print(f"Wrote {args.csv_out}")
+
+if __name__ == "__main__":
+    main()
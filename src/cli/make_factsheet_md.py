@@ -1,19 +1,38 @@
 from __future__ import annotations
+import argparse
 from pathlib import Path
-from src.reports.metrics import perf_metrics_from_index
+from src.utils import instrument
 
-if __name__ == "__main__":
-    csv_in = "data/processed/indexes/btc_close_base1000.csv"
-    out_md = Path("docs") / "factsheet_btc_close_base1000.md"
-    m = perf_metrics_from_index(csv_in)
-    md = f"""# BTC Close-only Baseline (Base=1000)
-- **CAGR:** {m['CAGR']:.2%}
-- **Annualized Vol:** {m['AnnVol']:.2%}
-- **Max Drawdown:** {m['MaxDD']:.2%}
+INDEX_NAME = "btc_close_base1000"
+CSV_IN = "data/processed/indexes/btc_close_base1000.csv"
+OUT_MD = Path("docs") / "factsheet_btc_close_base1000.md"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render the BTC baseline factsheet.")
+    ap.add_argument("--risk_paths", type=int, default=0,
+                    help="Resampled paths for the risk section, e.g. 20000 (0 = point estimates only).")
+    ap.add_argument("--seed", type=int, default=7)
+    instrument.add_arguments(ap)
+    args = ap.parse_args(argv)
+    instrument.from_args(args)
+    import pandas as pd
+    from src.data import price_store
+    from src.reports.factsheets import render_factsheet
+    from src.reports.metrics import perf_metrics_from_index, perf_metrics_from_store
 
-**Data:** Free sources (CoinGecko ≤365d, Yahoo regional, CCXT OHLCV).  
-**Method:** Normalize first close to 1000; record divisor.  
-**Notes:** Day-2 scaffolding factsheet for later projects.
-"""
-    out_md.write_text(md, encoding="utf-8")
-    print(f"Wrote {out_md}")
+    if price_store.has_asset(INDEX_NAME, table="indexes"):
+        m = perf_metrics_from_store(INDEX_NAME)
+        levels = price_store.read(INDEX_NAME, columns=["date","index_level"], table="indexes")["index_level"]
+    else:
+        m = perf_metrics_from_index(CSV_IN)
+        levels = pd.read_csv(CSV_IN, usecols=["date","index_level"], parse_dates=["date"]).sort_values("date")["index_level"]
+    risk = None
+    if args.risk_paths:
+        from src.reports.risk import risk_summary
+        risk = risk_summary(levels.to_numpy(dtype=float), n_paths=args.risk_paths, seed=args.seed)
+    OUT_MD.write_text(render_factsheet(m, risk), encoding="utf-8")
+    print(f"Wrote {OUT_MD}")
+    instrument.finish(args, {"command": "make_factsheet_md"})
+
+if __name__ == "__main__":
+    main()
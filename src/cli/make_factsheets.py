@@ -0,0 +1,35 @@
+from __future__ import annotations
+import argparse, glob
+from pathlib import Path
+
+from src.utils import instrument
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render factsheets for a family of index CSVs in parallel.")
+    ap.add_argument("--indexes", default="data/processed/indexes/*.csv",
+                    help="Comma list of index CSVs or globs; weights/rolling side files are ignored.")
+    ap.add_argument("--out_dir", default="docs/factsheets")
+    ap.add_argument("--template", default=None, help="Defaults to the repository's docs/FACTSHEET_TEMPLATE.md.")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    ap.add_argument("--risk_paths", type=int, default=0, help="Resampled paths for a risk section (0 = skip).")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--force", action="store_true", help="Re-render even when inputs are unchanged.")
+    instrument.add_arguments(ap)
+    args = ap.parse_args(argv)
+    instrument.from_args(args)
+    from src.reports.factsheets import TEMPLATE, generate, is_index_csv
+
+    csvs = sorted({Path(p) for pat in args.indexes.split(",") if pat.strip() for p in glob.glob(pat.strip())})
+    csvs = [p for p in csvs if is_index_csv(p)]
+    status = generate(csvs, args.out_dir, args.template or TEMPLATE, workers=args.workers,
+                      risk_paths=args.risk_paths, seed=args.seed, force=args.force)
+    rendered = sum(s == "rendered" for s in status.values())
+    skipped = sum(s == "skipped" for s in status.values())
+    failed = sorted(n for n, s in status.items() if isinstance(s, Exception))
+    print(f"[ok] {args.out_dir}: rendered={rendered} unchanged={skipped} failed={len(failed)}")
+    instrument.finish(args, {"command": "make_factsheets", "rendered": rendered, "skipped": skipped})
+    if failed:
+        raise RuntimeError(f"{len(failed)} factsheet(s) failed: {failed}")
+
+if __name__ == "__main__":
+    main()
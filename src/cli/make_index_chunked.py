@@ -0,0 +1,48 @@
+from __future__ import annotations
+import argparse
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Base index with bounded memory: streams closes chunk by chunk.")
+    ap.add_argument("--coin", default="bitcoin")
+    src_group = ap.add_mutually_exclusive_group()
+    src_group.add_argument("--parquet", default=None, help="Price parquet to stream (default: the coin's provider parquet).")
+    src_group.add_argument("--bars", default=None, help="Stream the intraday archive at this timeframe, e.g. 1m.")
+    src_group.add_argument("--memmap", default=None, help="Fixed-width close archive written by --archive_out.")
+    ap.add_argument("--archive_out", default=None, help="Also (or only, with --no_index) write a memory-mappable close archive.")
+    ap.add_argument("--no_index", action="store_true")
+    ap.add_argument("--csv_out", default=None,
+                    help="Output path; .parquet keeps notes in file metadata instead of every row. "
+                         "Defaults to data/processed/indexes/<coin>_close_base<level>[_<timeframe>].csv.")
+    ap.add_argument("--base_level", type=float, default=1000.0)
+    ap.add_argument("--batch_rows", type=int, default=None, help="Rows per chunk (default: out_of_core.BATCH_ROWS).")
+    args = ap.parse_args(argv)
+    from src.index.base_index import _resolve_price_path
+    from src.index.out_of_core import (BATCH_ROWS, build_base_index_chunked, iter_bar_closes,
+                                       iter_memmap_closes, iter_parquet_closes, write_close_archive)
+    batch_rows = args.batch_rows or BATCH_ROWS
+    if args.csv_out is None:
+        suffix = f"_{args.bars}" if args.bars else ""
+        args.csv_out = f"data/processed/indexes/{args.coin}_close_base{args.base_level:g}{suffix}.csv"
+
+    if args.bars:
+        chunks = iter_bar_closes(args.coin, args.bars)
+    elif args.memmap:
+        chunks = iter_memmap_closes(args.memmap, batch_rows=batch_rows)
+    else:
+        chunks = iter_parquet_closes(args.parquet or _resolve_price_path(args.coin), batch_rows=batch_rows)
+
+    if args.archive_out:
+        n = write_close_archive(chunks, args.archive_out)
+        print(f"Wrote {args.archive_out} rows={n}")
+        if args.no_index:
+            return
+        chunks = iter_memmap_closes(args.archive_out, batch_rows=batch_rows)
+
+    info = build_base_index_chunked(chunks, args.csv_out, base_level=args.base_level,
+                                    date_only=not args.bars)
+    if info is None:
+        raise RuntimeError("No closes to index")
+    print(f"Wrote {args.csv_out} rows={info['rows']} divisor={info['divisor']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+from src.utils import instrument
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a multi-asset weighted index from the price store.")
+    ap.add_argument("--coins", required=True, help="Comma-separated constituent coin ids.")
+    ap.add_argument("--scheme", default="equal", help="Weighting scheme, one of engine.SCHEMES.")
+    ap.add_argument("--rebalance", default="M", help="D/W/M/Q/Y; constituents and weights reset on the first date of each period.")
+    ap.add_argument("--cap", type=float, default=None, help="Max weight per constituent, e.g. 0.25.")
+    ap.add_argument("--top_n", type=int, default=None, help="Keep the N largest coins by market cap at each rebalance.")
+    ap.add_argument("--base_level", type=float, default=1000.0)
+    ap.add_argument("--start", default=None)
+    ap.add_argument("--end", default=None)
+    ap.add_argument("--bars", default=None, help="Build from the intraday archive at this timeframe (e.g. 1m) instead of the daily store.")
+    ap.add_argument("--rule", default="1d", help="Resolution to resample --bars to on the fly, e.g. 1h or 1d.")
+    ap.add_argument("--name", default=None, help="Index name in the store and output file stem.")
+    ap.add_argument("--out_dir", default="data/processed/indexes")
+    instrument.add_arguments(ap)
+    args = ap.parse_args(argv)
+    from src.data import price_store
+    from src.index.engine import build_index, SCHEMES
+    if args.scheme not in SCHEMES:
+        ap.error(f"--scheme must be one of {', '.join(SCHEMES)}")
+    instrument.from_args(args)
+
+    coins = [c.strip() for c in args.coins.split(",") if c.strip()]
+    name = args.name or f"multi_{args.scheme}_{args.rebalance.lower()}_base{int(args.base_level)}"
+    if args.bars:
+        from src.data.bars import resampled_close_matrix
+        prices = resampled_close_matrix(coins, args.bars, rule=args.rule, start=args.start, end=args.end)
+    else:
+        prices = price_store.read_matrix(coins, field="close", start=args.start, end=args.end)
+    caps = None
+    if args.bars and (args.scheme != "equal" or args.top_n is not None):
+        raise RuntimeError("The bar archive has no market caps; use --scheme equal with --bars.")
+    if args.scheme != "equal" or args.top_n is not None:
+        caps = price_store.read_matrix(coins, field="market_cap", start=args.start, end=args.end)
+        if caps.isna().all().all():
+            raise RuntimeError("No market_cap data in the price store for these coins; use --scheme equal.")
+
+    levels, weights = build_index(prices, caps, scheme=args.scheme, rebalance=args.rebalance,
+                                  cap=args.cap, top_n=args.top_n, base_level=args.base_level)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    csv_out = out_dir / f"{name}.csv"
+    with instrument.span("write.csv"):
+        levels[["date","index_level","divisor"]].to_csv(csv_out, index=False)
+        weights.to_csv(out_dir / f"{name}_weights.csv", index_label="date")
+    price_store.append(levels[["date","index_level","divisor"]], name, table="indexes", key="date")
+    print(f"Wrote {csv_out} rows={len(levels)} rebalances={len(weights)}")
+    instrument.finish(args, {"command": "make_multi_index", "index": name, "rows": len(levels)})
+
+if __name__ == "__main__":
+    main()
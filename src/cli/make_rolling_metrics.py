@@ -0,0 +1,22 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rolling return/vol/drawdown series for an index CSV.")
+    ap.add_argument("--csv_in", default="data/processed/indexes/btc_close_base1000.csv")
+    ap.add_argument("--csv_out", default=None, help="Defaults to <csv_in stem>_rolling.csv")
+    ap.add_argument("--windows", default=None, help="Comma-separated window lengths in bars (default: rolling.WINDOWS).")
+    args = ap.parse_args(argv)
+    import pandas as pd
+    from src.reports.rolling import rolling_metrics, WINDOWS
+
+    df = pd.read_csv(args.csv_in, usecols=["date","index_level"], parse_dates=["date"]).sort_values("date")
+    windows = [int(w) for w in args.windows.split(",") if w.strip()] if args.windows else WINDOWS
+    out = rolling_metrics(df.set_index("date")["index_level"], windows=windows)
+    csv_out = Path(args.csv_out) if args.csv_out else Path(args.csv_in).with_name(Path(args.csv_in).stem + "_rolling.csv")
+    out.reset_index().to_csv(csv_out, index=False)
+    print(f"Wrote {csv_out} rows={len(out)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,226 @@
 from __future__ import annotations
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List
 
-from src.data.coingecko import fetch_daily_close_coin
+from src.utils import instrument
 
-def _try_yahoo(coin_id: str):
+# Provider, store and hedging modules (pandas, pyarrow, requests, asyncio) are imported
+# where they are used, so `python -m src pull --help` stays a bare interpreter start.
+
+PROVIDERS = ("coingecko", "yahoo", "ccxt")
+
+def _try_yahoo(coin_id: str, since_ms: int | None = None):
     from src.data.yahoo import fetch_daily_close_yahoo
-    return fetch_daily_close_yahoo(coin_id)
+    return fetch_daily_close_yahoo(coin_id, since_ms=since_ms)
 
-def _try_ccxt(coin_id: str):
+def _try_ccxt(coin_id: str, since_ms: int | None = None):
     from src.data.ccxt_provider import fetch_daily_close_ccxt
-    return fetch_daily_close_ccxt(coin_id)
-
-def main():
-    ap = argparse.ArgumentParser(description="Pull daily close data and save parquet.")
-    ap.add_argument("--coin_id", required=True, choices=["bitcoin", "ethereum"])
-    ap.add_argument("--days", default="max", help="CoinGecko days param; 'max' auto-falls to 365 on free tier.")
-    ap.add_argument("--out_dir", default="data/raw", help="Root output dir (provider subfolder auto-added).")
-    ap.add_argument("--provider", choices=["auto","coingecko","yahoo","ccxt"], default="auto",
-                    help="Force a provider (debug) else try auto fallback chain.")
-    args = ap.parse_args()
+    return fetch_daily_close_ccxt(coin_id, since_ms=since_ms)
 
-    coin = args.coin_id
-    out_root = Path(args.out_dir)
-    df = None
-    provider = None
+def _fetch(provider: str, coin: str, days: str, out_root: Path, since_ms: int | None):
+    with instrument.span(f"pull.{provider}"):
+        if provider == "coingecko":
+            from src.data.coingecko import fetch_daily_close_coin
+            return fetch_daily_close_coin(coin_id=coin, days=days, cache_dir=out_root / "coingecko", since_ms=since_ms)
+        if provider == "yahoo":
+            return _try_yahoo(coin, since_ms)
+        return _try_ccxt(coin, since_ms)
 
-    print(f"[info] Starting pull for coin={coin} provider={args.provider} days={args.days}")
+def _pull_consensus(coin: str, out_root: Path, incremental: bool,
+                    store_root: str | Path | None) -> tuple[Path, int, str]:
+    import pandas as pd
+    from src.data import price_store
+    from src.data.consensus import fetch_consensus
+    from src.data.incremental import append_tail, load_existing, resume_since_ms
+    out_path = out_root / "consensus" / f"{coin}_usd_daily.parquet"
+    stats_path = out_root / "consensus" / f"{coin}_usd_daily_stats.parquet"
+    existing = load_existing(out_path) if incremental else None
+    df, stats = fetch_consensus(coin, since_ms=resume_since_ms(existing))
+    if store_root is not None:
+        price_store.append(price_store.normalize_prices(df, provider="consensus"), coin,
+                           root=store_root, key="date")
+    df = append_tail(existing, df)
+    old_stats = load_existing(stats_path) if incremental else None
+    if old_stats is not None:
+        stats = pd.concat([old_stats, stats], ignore_index=True).drop_duplicates("date", keep="last")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with instrument.span("write.parquet"):
+        df.to_parquet(out_path, index=False)
+        stats.sort_values("date").reset_index(drop=True).to_parquet(stats_path, index=False)
+    return out_path, len(df), "consensus"
 
+def _attempt(name: str, coin: str, days: str, out_root: Path, incremental: bool):
+    """(out_path, existing, fetched) for one provider; nothing is written yet."""
+    from src.data.incremental import load_existing, resume_since_ms
+    out_path = out_root / name / f"{coin}_usd_daily.parquet"
+    existing = load_existing(out_path) if incremental else None
+    since_ms = resume_since_ms(existing)
+    print(f"[info] Trying {name}… coin={coin}" + (f" since_ms={since_ms}" if since_ms is not None else ""))
     try:
-        if args.provider in ("auto", "coingecko"):
-            print("[info] Trying CoinGecko…")
-            df = fetch_daily_close_coin(coin_id=coin, days=args.days, cache_dir=out_root / "coingecko")
-            provider = "coingecko"
-            print("[info] CoinGecko success.")
-        if df is None and args.provider in ("auto", "yahoo"):
-            print("[warn] CoinGecko unavailable. Trying Yahoo…")
-            df = _try_yahoo(coin)
-            provider = "yahoo"
-            print("[info] Yahoo success.")
-        if df is None and args.provider in ("auto", "ccxt"):
-            print("[warn] Yahoo unavailable. Trying CCXT…")
-            df = _try_ccxt(coin)
-            provider = "ccxt"
-            print("[info] CCXT success.")
-    except Exception as e:
-        if args.provider != "auto":
-            raise
-        if provider is None:
-            print(f"[warn] CoinGecko failed: {e}")
+        return out_path, existing, _fetch(name, coin, days, out_root, since_ms)
+    except Exception:
+        instrument.incr(f"pull.{name}.failed")
+        raise
+
+def _usable(attempt) -> bool:
+    _, existing, df = attempt
+    return (df is not None and not df.empty) or existing is not None
+
+def _store(name: str, coin: str, attempt, store_root: str | Path | None) -> tuple[Path, int, str]:
+    out_path, existing, df = attempt
+    if df is not None and not df.empty:
+        from src.data import price_store
+        from src.data.incremental import append_tail
+        if store_root is not None:
+            price_store.append(price_store.normalize_prices(df, provider=name), coin,
+                               root=store_root, key="date")
+        df = append_tail(existing, df)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with instrument.span("write.parquet"):
+            df.to_parquet(out_path, index=False)
+    else:
+        df = existing
+    print(f"[info] {name} success.")
+    return out_path, len(df), name
+
+def pull_coin(coin: str, provider: str = "auto", days: str = "max",
+              out_root: str | Path = "data/raw", incremental: bool = False,
+              store_root: str | Path | None = Path("data/store"),
+              hedge_after: float | None = None) -> tuple[Path, int, str]:
+    """
+    Pull one coin through the provider fallback chain and write
+    <out_root>/<provider>/<coin>_usd_daily.parquet.
+    incremental: resume from the last timestamp_utc already stored for that
+    provider and append only the missing tail.
+    store_root: also append the fetched rows to the columnar price store
+    (src.data.price_store.STORE_ROOT by default; None to skip).
+    hedge_after: with provider='auto', start the next provider whenever the current one
+    has not answered within this many seconds and keep the first usable result
+    (src.utils.hedge); None tries them strictly one after another.
+    Returns (out_path, rows, provider).
+    """
+    out_root = Path(out_root)
+    if provider == "consensus":
+        return _pull_consensus(coin, out_root, incremental, store_root)
+    chain = PROVIDERS if provider == "auto" else (provider,)
+    if hedge_after is not None and len(chain) > 1:
+        from src.utils.hedge import hedge, run_blocking
+        attempts = [(name, lambda name=name: run_blocking(_attempt, name, coin, days, out_root, incremental))
+                    for name in chain]
+        name, attempt = hedge(attempts, hedge_after, valid=_usable)
+        return _store(name, coin, attempt, store_root)
+    for name in chain:
+        try:
+            attempt = _attempt(name, coin, days, out_root, incremental)
+        except Exception as e:
+            if provider != "auto":
+                raise
+            print(f"[warn] {name} failed: {e}")
+            continue
+        if not _usable(attempt):
+            print(f"[warn] {name} returned no rows.")
+            continue
+        return _store(name, coin, attempt, store_root)
+    raise RuntimeError("All providers returned empty data frame.")
+
+def pull_bars(coin: str, timeframe: str, incremental: bool = False,
+              bar_root: str | Path | None = None) -> tuple[Path, int, str]:
+    """
+    Intraday (or any ccxt timeframe) OHLCV into the per-day bar archive (src.data.bars).
+    Pages are written as they arrive, so memory stays at one page regardless of history.
+    """
+    from src.data import bars
+    from src.data.ccxt_provider import iter_ohlcv_ccxt
+    root = Path(bar_root) if bar_root is not None else bars.BAR_ROOT
+    since_ms = bars.last_ts(coin, timeframe, root=root) if incremental else None
+    rows = 0
+    for page in iter_ohlcv_ccxt(coin, timeframe=timeframe, since_ms=since_ms):
+        rows += bars.append_bars(page, coin, timeframe, root=root)
+    return root / timeframe / coin, rows, "ccxt"
+
+def read_universe(path: str | Path) -> List[str]:
+    """One CoinGecko coin id per line; blank lines and '#' comments ignored."""
+    coins = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line and line not in coins:
+            coins.append(line)
+    return coins
+
+def pull_many(coins: List[str], workers: int = 8, timeframe: str = "1d", **kwargs) -> Dict[str, tuple | Exception]:
+    """
+    Pull a universe concurrently. Wall-clock time is bounded by the shared
+    per-provider token buckets (src.utils.ratelimit), not by summed latencies.
+    Returns {coin: (out_path, rows, provider) or the exception that stopped it}.
+    """
+    results: Dict[str, tuple | Exception] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        if timeframe == "1d":
+            futs = {pool.submit(pull_coin, coin, **kwargs): coin for coin in coins}
+        else:
+            futs = {pool.submit(pull_bars, coin, timeframe, kwargs.get("incremental", False)): coin for coin in coins}
+        for fut in as_completed(futs):
+            coin = futs[fut]
             try:
-                print("[info] Falling back to Yahoo…")
-                df = _try_yahoo(coin)
-                provider = "yahoo"
-                print("[info] Yahoo success.")
-            except Exception as e2:
-                print(f"[warn] Yahoo failed: {e2}")
-                print("[info] Falling back to CCXT…")
-                df = _try_ccxt(coin)
-                provider = "ccxt"
-                print("[info] CCXT success.")
-
-    if df is None or df.empty:
-        raise RuntimeError("All providers returned empty data frame.")
-
-    out_path = out_root / provider / f"{coin}_usd_daily.parquet"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_path, index=False)
-    print(f"[ok] Wrote {out_path} with {len(df)} rows using provider={provider}")
+                results[coin] = fut.result()
+            except Exception as e:
+                print(f"[warn] {coin} failed: {e}")
+                results[coin] = e
+    return results
+
+def _run(args, opts: dict) -> None:
+    if args.coin_id:
+        print(f"[info] Starting pull for coin={args.coin_id} provider={args.provider} days={args.days}")
+        if args.timeframe != "1d":
+            out_path, rows, provider = pull_bars(args.coin_id, args.timeframe, args.incremental)
+        else:
+            out_path, rows, provider = pull_coin(args.coin_id, **opts)
+        print(f"[ok] Wrote {out_path} with {rows} rows using provider={provider}")
+        return
+
+    coins = [c.strip() for c in args.coins.split(",") if c.strip()] if args.coins else read_universe(args.universe)
+    print(f"[info] Starting batch pull for {len(coins)} coins workers={args.workers} provider={args.provider}")
+    results = pull_many(coins, workers=args.workers, timeframe=args.timeframe, **opts)
+    failed = sorted(c for c, r in results.items() if isinstance(r, Exception))
+    for coin in coins:
+        r = results[coin]
+        if not isinstance(r, Exception):
+            print(f"[ok] {coin}: {r[1]} rows provider={r[2]} -> {r[0]}")
+    if failed:
+        raise RuntimeError(f"{len(failed)}/{len(coins)} coins failed: {failed}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pull daily close data and save parquet.")
+    src_group = ap.add_mutually_exclusive_group(required=True)
+    src_group.add_argument("--coin_id", help="Single CoinGecko coin id, e.g. bitcoin.")
+    src_group.add_argument("--coins", help="Comma-separated coin ids pulled concurrently.")
+    src_group.add_argument("--universe", help="File with one coin id per line, pulled concurrently.")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent pulls in batch mode.")
+    ap.add_argument("--days", default="max", help="CoinGecko days param; 'max' auto-falls to 365 on free tier.")
+    ap.add_argument("--out_dir", default="data/raw", help="Root output dir (provider subfolder auto-added).")
+    ap.add_argument("--provider", choices=["auto","coingecko","yahoo","ccxt","consensus"], default="auto",
+                    help="Force a provider (debug), 'consensus' to query all and take the outlier-filtered "
+                         "cross-provider close, else try auto fallback chain.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Fetch only bars after the last stored timestamp_utc and append them.")
+    ap.add_argument("--hedge", type=float, default=None, metavar="SECONDS",
+                    help="Auto chain only: fire the next provider when the current one has not answered "
+                         "within SECONDS and keep the first usable result.")
+    ap.add_argument("--timeframe", default="1d",
+                    help="Bar size; anything but 1d (e.g. 1m, 1h) pulls CCXT OHLCV into data/bars.")
+    instrument.add_arguments(ap)
+    args = ap.parse_args(argv)
+    if args.timeframe != "1d" and args.provider not in ("auto", "ccxt"):
+        ap.error("intraday timeframes are only available from --provider ccxt")
+    opts = dict(provider=args.provider, days=args.days, out_root=args.out_dir, incremental=args.incremental,
+                hedge_after=args.hedge)
+    instrument.from_args(args)
+    try:
+        _run(args, opts)
+    finally:
+        instrument.finish(args, {"command": "pull_prices", "args": vars(args)})
 
 if __name__ == "__main__":
     main()
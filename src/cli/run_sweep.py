@@ -0,0 +1,37 @@
+from __future__ import annotations
+import argparse
+
+def _axis(text: str, cast=str) -> list:
+    """'M,Q' -> ['M','Q']; 'none' entries become None."""
+    return [None if x.strip().lower() == "none" else cast(x.strip()) for x in text.split(",") if x.strip()]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Evaluate index methodology variants in parallel.")
+    ap.add_argument("--coins", required=True, help="Comma-separated universe (coin ids in the price store).")
+    ap.add_argument("--schemes", default="equal", help="Comma list of weighting schemes (engine.SCHEMES).")
+    ap.add_argument("--rebalance", default="M,Q", help="Comma list of D/W/M/Q/Y.")
+    ap.add_argument("--caps", default="none", help="Comma list of weight caps, 'none' for uncapped.")
+    ap.add_argument("--top_n", default="none", help="Comma list of universe sizes, 'none' for all.")
+    ap.add_argument("--base_dates", default="none", help="Comma list of start dates, 'none' for full history.")
+    ap.add_argument("--results", default="data/processed/sweeps/sweep_results.csv",
+                    help="Checkpointed results CSV; rerun with the same path to resume.")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args(argv)
+    from src.data import price_store
+    from src.index.sweep import expand_grid, run_sweep
+
+    coins = [c.strip() for c in args.coins.split(",") if c.strip()]
+    variants = expand_grid(scheme=_axis(args.schemes), rebalance=_axis(args.rebalance),
+                           cap=_axis(args.caps, float), top_n=_axis(args.top_n, int),
+                           base_date=_axis(args.base_dates))
+    prices = price_store.read_matrix(coins, field="close")
+    caps = None
+    if any(v["scheme"] != "equal" or v["top_n"] is not None for v in variants):
+        caps = price_store.read_matrix(coins, field="market_cap")
+    res = run_sweep(prices, variants, args.results, market_caps=caps, workers=args.workers)
+    if not res.empty:
+        print(res.sort_values("Sharpe", ascending=False).head(10).to_string(index=False))
+    print(f"Wrote {args.results} variants={len(res)}")
+
+if __name__ == "__main__":
+    main()
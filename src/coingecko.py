@@ -1,12 +1,23 @@
 ﻿
 from __future__ import annotations
-import time, json, hashlib, pathlib
+import json, hashlib
 from datetime import datetime, timezone, timedelta
-import requests
+import numpy as np
 import pandas as pd
+from src.data.incremental import days_since
+from src.paths import DATA_RAW
+from src.data.parse import align, daily_table, first_per_key, floor_day_ms, ms_to_ns, pairs_to_arrays, rows_to_array
+from src.utils import instrument
+from src.utils.cache import frame_cache
+from src.utils.hedge import hedge, run_blocking
+from src.utils.http import request_json
+from src.utils.ratelimit import TokenBucket, limiter
 
-CACHE_DIR = pathlib.Path("data/data_raw")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = DATA_RAW  # created on the first cache write
+# a window's own entry is refetched after CACHE_TTL; a longer window only answers a
+# shorter request while it is at most RANGE_TTL old
+CACHE_TTL: int | None = 24 * 3600
+RANGE_TTL = 24 * 3600
 
 HEADERS = {
     "accept": "application/json",
@@ -18,121 +29,171 @@ def _hash(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:12]
 
 def _get_json_with_retry(url: str, params: dict | None = None, headers: dict | None = None,
-                         retries: int = 6, backoff: float = 1.0):
-    last = None
-    for _ in range(retries):
-        try:
-            r = requests.get(url, params=params, headers=headers, timeout=30)
-            last = r
-            if r.status_code == 200:
-                return r.json()
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 16.0)
-        except requests.RequestException:
-            time.sleep(backoff)
-            backoff = min(backoff * 2, 16.0)
-    code = getattr(last, "status_code", "N/A")
-    raise RuntimeError(f"HTTP {code}")
+                         retries: int = 6, backoff: float = 1.0, bucket: TokenBucket | None = None):
+    try:
+        res = request_json(url, params, headers=headers, max_retries=retries, limiter=bucket,
+                           backoff=backoff, max_backoff=16.0)
+    except Exception as e:
+        raise RuntimeError(f"HTTP N/A ({e})") from e
+    if res.status != 200:
+        raise RuntimeError(f"HTTP {res.status}")
+    return res.payload
 
 # -------- CoinGecko (primary) --------
 CG_BASE = "https://api.coingecko.com/api/v3"
 
-def _coingecko_daily(coin_id: str, vs: str, days: int) -> pd.DataFrame:
+def _window_days(name: str) -> int | None:
+    """coingecko_<coin>_<vs>_<days>_<hash>.json -> days (None for tail pulls)."""
+    try:
+        return int(name.rsplit("_", 2)[-2])
+    except (IndexError, ValueError):
+        return None
+
+def _cache_name(coin_id: str, vs: str, days: int, since_ms: int | None = None) -> str:
+    """coingecko_<coin>_<vs>_<days|tail<days>>_<hash>.json"""
+    params = {"vs_currency": vs, "days": days, "interval": "daily"}
+    url = f"{CG_BASE}/coins/{coin_id}/market_chart"
+    # tail pulls are keyed on the resume point so a later run never reuses them
+    cache_key = _hash(url + json.dumps(params, sort_keys=True) + (f"@{since_ms}" if since_ms is not None else ""))
+    window = f"tail{days}" if since_ms is not None else str(days)
+    return f"coingecko_{coin_id}_{vs}_{window}_{cache_key}.json"
+
+def _coingecko_daily(coin_id: str, vs: str, days: int, since_ms: int | None = None,
+                     ttl_seconds: int | None = CACHE_TTL) -> pd.DataFrame:
+    if since_ms is not None:
+        days = days_since(since_ms, int(datetime.now(timezone.utc).timestamp() * 1000))
     params = {"vs_currency": vs, "days": days, "interval": "daily"}
     url = f"{CG_BASE}/coins/{coin_id}/market_chart"
-    cache_key = _hash(url + json.dumps(params, sort_keys=True))
-    cache_path = CACHE_DIR / f"coingecko_{coin_id}_{vs}_{days}_{cache_key}.json"
-    if cache_path.exists():
-        raw = json.loads(cache_path.read_text(encoding="utf-8"))
-    else:
-        raw = _get_json_with_retry(url, params=params, headers=HEADERS)
-        cache_path.write_text(json.dumps(raw), encoding="utf-8")
-
-    def to_df(field: str, col: str) -> pd.DataFrame:
-        arr = raw.get(field, [])
-        df = pd.DataFrame(arr, columns=["ms", col])
-        df["date"] = pd.to_datetime(df["ms"], unit="ms", utc=True).dt.tz_convert("UTC").dt.normalize().dt.date
-        return df[["date", col]]
-
-    p = to_df("prices", "price")
-    m = to_df("market_caps", "market_cap")
-    v = to_df("total_volumes", "total_volume")
-    out = p.merge(m, on="date").merge(v, on="date")
-    return out.sort_values("date").drop_duplicates("date").reset_index(drop=True)
+    name = _cache_name(coin_id, vs, days, since_ms)
+    cache = frame_cache(CACHE_DIR)
+    covering = []
+    if since_ms is None:
+        # a longer cached window answers a shorter request; smallest first means least trimming
+        windows = [(_window_days(n), n) for n in cache.names(f"coingecko_{coin_id}_{vs}_*_*.json")]
+        covering = [n for d, n in sorted(w for w in windows if w[0] is not None and w[0] > days)]
+
+    def fetch(stale):
+        # a stale entry revalidates with its ETag/Last-Modified: 304 means it is still current
+        try:
+            res = request_json(url, params, headers=HEADERS, validators=stale, max_retries=6,
+                               limiter=limiter("coingecko"), max_backoff=16.0)
+        except Exception as e:
+            raise RuntimeError(f"HTTP N/A ({e})") from e
+        if res.status == 304 and stale:
+            return stale
+        if res.status != 200:
+            raise RuntimeError(f"HTTP {res.status}")
+        payload = res.payload
+        payload["_etag"] = res.etag
+        payload["_last_modified"] = res.last_modified
+        return payload
+
+    df = cache.get_frame(name, fetch, _market_chart_daily_frame, ttl_seconds=ttl_seconds,
+                         covering=covering, covering_ttl_seconds=RANGE_TTL)
+    if since_ms is None and len(df):
+        df = df[df["date"] >= df["date"].max() - pd.Timedelta(days=days)].reset_index(drop=True)
+    return df
+
+def _market_chart_daily_frame(raw: dict) -> pd.DataFrame:
+    # first observation per UTC day of each series, inner-joined on the day
+    with instrument.span("parse.coingecko"):
+        series = {}
+        for field, col in (("prices", "price"), ("market_caps", "market_cap"), ("total_volumes", "total_volume")):
+            ms, v = pairs_to_arrays(raw.get(field, []))
+            series[col] = first_per_key(floor_day_ms(ms), v)
+    with instrument.span("merge.coingecko"):
+        day, price = series["price"]
+        cols = {"price": price}
+        keep = np.ones(len(day), dtype=bool)
+        for col in ("market_cap", "total_volume"):
+            cols[col], found = align(day, *series[col])
+            keep &= found
+        out = {"date": ms_to_ns(day[keep]).view("datetime64[ns]")}
+        out.update({k: v[keep] for k, v in cols.items()})
+        return pd.DataFrame(out)
 
 # -------- CoinCap (fallback #1) --------
 CC_BASE = "https://api.coincap.io/v2"
 
-def _coincap_btc_daily(days: int) -> pd.DataFrame:
+def _coincap_btc_daily(days: int, since_ms: int | None = None) -> pd.DataFrame:
     end = datetime.now(timezone.utc)
     start = end - timedelta(days=days)
+    if since_ms is not None:
+        start = datetime.fromtimestamp(since_ms / 1000, tz=timezone.utc)
     params = {
         "interval": "d1",
         "start": int(start.timestamp() * 1000),
         "end": int(end.timestamp() * 1000),
     }
     url = f"{CC_BASE}/assets/bitcoin/history"
-    raw = _get_json_with_retry(url, params=params, headers=HEADERS)
+    raw = _get_json_with_retry(url, params=params, headers=HEADERS, bucket=limiter("coincap"))
     data = raw.get("data", [])
     if not data:
         raise RuntimeError("CoinCap returned no data")
 
-    df = pd.DataFrame(data)
-    df["date"] = pd.to_datetime(df["time"], unit="ms", utc=True).dt.tz_convert("UTC").dt.normalize().dt.date
-    df["price"] = pd.to_numeric(df["priceUsd"], errors="coerce")
-    df["market_cap"] = pd.to_numeric(df.get("marketCapUsd", pd.NA), errors="coerce")
-    df["total_volume"] = pd.to_numeric(df.get("volumeUsd", pd.NA), errors="coerce")
-
-    out = df[["date", "price", "market_cap", "total_volume"]].dropna(subset=["price"])
-    return out.sort_values("date").drop_duplicates("date").reset_index(drop=True)
+    with instrument.span("parse.coincap"):
+        ms = np.fromiter((d["time"] for d in data), dtype=np.int64, count=len(data))
+        num = lambda key: pd.to_numeric(pd.Series([d.get(key) for d in data], dtype=object), errors="coerce").to_numpy(np.float64)
+        price = num("priceUsd")
+        ok = ~np.isnan(price)
+        return daily_table(ms[ok], [("price", price[ok]), ("market_cap", num("marketCapUsd")[ok]),
+                                    ("total_volume", num("volumeUsd")[ok])])
 
 # -------- Binance klines (fallback #2) --------
 # BTCUSDT daily closes; USDT ~ USD
 BN_BASE = "https://api.binance.com/api/v3"
 
-def _binance_btcusdt_daily(days: int) -> pd.DataFrame:
+def _binance_btcusdt_daily(days: int, since_ms: int | None = None) -> pd.DataFrame:
     limit = 1000  # max per request
     end_ts = int(datetime.now(timezone.utc).timestamp() * 1000)
     start_ts = end_ts - days * 24 * 60 * 60 * 1000
-    frames = []
+    if since_ms is not None:
+        start_ts = since_ms
+    pages = []
     cur = start_ts
     while cur < end_ts:
         params = {"symbol": "BTCUSDT", "interval": "1d", "startTime": cur, "endTime": end_ts, "limit": limit}
         url = f"{BN_BASE}/klines"
-        arr = _get_json_with_retry(url, params=params, headers=HEADERS)
+        arr = _get_json_with_retry(url, params=params, headers=HEADERS, bucket=limiter("binance"))
         if not arr:
             break
-        df = pd.DataFrame(arr, columns=[
-            "open_time","open","high","low","close","volume","close_time","quote_asset_volume",
-            "number_of_trades","taker_buy_base_asset_volume","taker_buy_quote_asset_volume","ignore"
-        ])
-        df["date"] = pd.to_datetime(df["close_time"], unit="ms", utc=True).dt.tz_convert("UTC").dt.normalize().dt.date
-        df["price"] = pd.to_numeric(df["close"], errors="coerce")
-        df["market_cap"] = pd.NA
-        df["total_volume"] = pd.to_numeric(df["quote_asset_volume"], errors="coerce")
-        frames.append(df[["date","price","market_cap","total_volume"]])
-        last_close = int(df["close_time"].iloc[-1])
+        # kline row: open_time, open, high, low, close, volume, close_time, quote_asset_volume, ...
+        with instrument.span("parse.binance"):
+            pages.append(rows_to_array(arr, len(arr[0]))[:, [6, 4, 7]])
+        last_close = int(pages[-1][-1, 0])
         cur = last_close + 1
-        if len(df) < limit:
+        if len(arr) < limit:
             break
-        time.sleep(0.2)
-    if not frames:
+    if not pages:
         raise RuntimeError("Binance returned no data")
-    out = pd.concat(frames, ignore_index=True)
-    return out.sort_values("date").drop_duplicates("date").reset_index(drop=True)
+    k = np.concatenate(pages)
+    return daily_table(k[:, 0].astype(np.int64), [("price", k[:, 1]), ("market_cap", np.full(len(k), np.nan)),
+                                                 ("total_volume", k[:, 2])])
 
-def get_market_chart_daily(coin_id: str = "bitcoin", vs: str = "usd", days: int = 365*10):
+def get_market_chart_daily(coin_id: str = "bitcoin", vs: str = "usd", days: int = 365*10,
+                           since_ms: int | None = None, hedge_after: float | None = None):
     """
     Returns (DataFrame, source_str)
     columns: date, price, market_cap, total_volume
+    since_ms: fetch only the tail from this epoch-ms on instead of `days` of history.
+    hedge_after: start the next source whenever the current one has not answered within
+    this many seconds and return the first non-empty frame (None: strictly sequential).
     """
+    if hedge_after is not None:
+        sources = [("coingecko", _coingecko_daily, (coin_id, vs, days, since_ms))]
+        if coin_id.lower() == "bitcoin" and vs.lower() == "usd":
+            sources.append(("coincap", _coincap_btc_daily, (days, since_ms)))
+        sources.append(("binance", _binance_btcusdt_daily, (days, since_ms)))
+        attempts = [(name, lambda fn=fn, a=a: run_blocking(fn, *a)) for name, fn, a in sources]
+        source, df = hedge(attempts, hedge_after, valid=lambda df: df is not None and not df.empty)
+        return df, source
     try:
-        return _coingecko_daily(coin_id=coin_id, vs=vs, days=days), "coingecko"
+        return _coingecko_daily(coin_id=coin_id, vs=vs, days=days, since_ms=since_ms), "coingecko"
     except Exception as e1:
         print(f"[info] CoinGecko failed ({e1}); trying CoinCap…")
     try:
         if coin_id.lower() == "bitcoin" and vs.lower() == "usd":
-            return _coincap_btc_daily(days=days), "coincap"
+            return _coincap_btc_daily(days=days, since_ms=since_ms), "coincap"
     except Exception as e2:
         print(f"[info] CoinCap failed ({e2}); trying Binance BTCUSDT…")
-    return _binance_btcusdt_daily(days=days), "binance"
+    return _binance_btcusdt_daily(days=days, since_ms=since_ms), "binance"
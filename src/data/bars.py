@@ -0,0 +1,154 @@
+from __future__ import annotations
+import os, re, uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.parse import DAY_MS, timeframe_ms
+from src.utils import instrument
+
+# Intraday bar archive: <root>/<timeframe>/<asset>/<YYYY-MM-DD>.parquet, one file per UTC day.
+# Compact schema: ts int64 epoch-ms, OHLC/volume float32 (~28 bytes/bar vs ~100 for the
+# canonical frame), so a day of 1m bars is ~40 KB and any day can be read on its own.
+
+BAR_ROOT = Path("data/bars")
+BAR_FIELDS = ["open","high","low","close","volume"]
+BAR_SCHEMA = pa.schema([("ts", pa.int64())] + [(f, pa.float32()) for f in BAR_FIELDS])
+
+def _day_dir(root: Path, asset: str, timeframe: str) -> Path:
+    return Path(root) / timeframe / asset
+
+def _day_name(day_index: int) -> str:
+    return str(np.datetime64(int(day_index), "D")) + ".parquet"
+
+@instrument.timed("write.bars")
+def append_bars(rows: np.ndarray, asset: str, timeframe: str, root: str | Path = BAR_ROOT) -> int:
+    """
+    Persist an (n, 6) [ms, o, h, l, c, v] array into per-day files. Each touched day is
+    merged with what is stored (a re-sent ts replaces the old bar) and swapped in atomically.
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    if rows.size == 0:
+        return 0
+    ts = rows[:, 0].astype(np.int64)
+    days = ts // DAY_MS
+    out_dir = _day_dir(Path(root), asset, timeframe)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for day in np.unique(days):
+        sel = days == day
+        cols = {"ts": ts[sel]}
+        cols.update({f: rows[sel, i + 1].astype(np.float32) for i, f in enumerate(BAR_FIELDS)})
+        path = out_dir / _day_name(day)
+        if path.exists():
+            old = pq.read_table(path).to_pydict()
+            cols = {k: np.concatenate([np.asarray(old[k], dtype=v.dtype), v]) for k, v in cols.items()}
+        # keep the last copy of each ts, then sort
+        order = np.argsort(cols["ts"], kind="stable")
+        t_sorted = cols["ts"][order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = t_sorted[1:] != t_sorted[:-1]
+        idx = order[keep]
+        table = pa.table({k: v[idx] for k, v in cols.items()}, schema=BAR_SCHEMA)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    return len(rows)
+
+def _day_files(asset: str, timeframe: str, start=None, end=None, root: str | Path = BAR_ROOT) -> List[Path]:
+    d = _day_dir(Path(root), asset, timeframe)
+    if not d.is_dir():
+        return []
+    lo = str(pd.Timestamp(start).date()) if start is not None else None
+    hi = str(pd.Timestamp(end).date()) if end is not None else None
+    files = []
+    for p in sorted(d.glob("*.parquet")):
+        day = p.stem
+        if (lo is None or day >= lo) and (hi is None or day <= hi):
+            files.append(p)
+    return files
+
+def last_ts(asset: str, timeframe: str, root: str | Path = BAR_ROOT) -> Optional[int]:
+    """Epoch-ms of the newest stored bar (reads only the newest day file)."""
+    files = _day_files(asset, timeframe, root=root)
+    if not files:
+        return None
+    ts = pq.read_table(files[-1], columns=["ts"]).column("ts").to_numpy()
+    return int(ts.max()) if len(ts) else None
+
+def _date_only(x) -> bool:
+    if isinstance(x, str):
+        return re.fullmatch(r"\d{4}-\d{2}-\d{2}", x.strip()) is not None
+    return isinstance(x, date) and not isinstance(x, datetime)
+
+def _epoch_ms(x) -> int:
+    ts = pd.Timestamp(x)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.value // 1_000_000
+
+def iter_bars(asset: str, timeframe: str, start=None, end=None, columns: Optional[Iterable[str]] = None,
+              root: str | Path = BAR_ROOT) -> Iterator[pd.DataFrame]:
+    """
+    Yield one day of bars at a time, so memory is bounded by a single day.
+    Bounds are inclusive; a date-only `end` ('2024-01-02') covers that whole UTC day.
+    """
+    cols = ["ts"] + [c for c in (columns or BAR_FIELDS) if c != "ts"]
+    lo = _epoch_ms(start) if start is not None else None
+    hi = None
+    if end is not None:
+        hi = _epoch_ms(end) + (DAY_MS if _date_only(end) else 1)  # exclusive
+    for p in _day_files(asset, timeframe, start, end, root):
+        df = pq.read_table(p, columns=cols).to_pandas()
+        if lo is not None:
+            df = df[df["ts"] >= lo]
+        if hi is not None:
+            df = df[df["ts"] < hi]
+        if not df.empty:
+            yield df
+
+def resample_bars(asset: str, timeframe: str, rule: str = "1d", start=None, end=None,
+                  root: str | Path = BAR_ROOT) -> pd.DataFrame:
+    """
+    OHLCV at a coarser resolution (rule like '1h' or '1d'), built one day file at a time.
+    Buckets are aligned to UTC multiples of the rule and never straddle a day file
+    for rules <= 1d.
+    """
+    b = timeframe_ms(rule)
+    parts = []
+    for df in iter_bars(asset, timeframe, start, end, root=root):
+        ts = df["ts"].to_numpy()
+        bucket = ts // b
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], len(ts)] - 1
+        parts.append(pd.DataFrame({
+            "ts": bucket[starts] * b,
+            "open": df["open"].to_numpy()[starts],
+            "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+            "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+            "close": df["close"].to_numpy()[ends],
+            "volume": np.add.reduceat(df["volume"].to_numpy(), starts),
+        }))
+    if not parts:
+        return pd.DataFrame(columns=["timestamp_utc","date"] + BAR_FIELDS)
+    out = pd.concat(parts, ignore_index=True)
+    if b > DAY_MS:
+        # multi-day rules: merge buckets that were split across day files
+        out = out.groupby("ts", as_index=False).agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    out.insert(0, "timestamp_utc", pd.to_datetime(out.pop("ts"), unit="ms", utc=True))
+    out.insert(1, "date", out["timestamp_utc"].dt.floor("D").dt.tz_localize(None).astype("datetime64[ns]"))
+    return out
+
+def resampled_close_matrix(assets: Iterable[str], timeframe: str, rule: str = "1d", start=None, end=None,
+                           root: str | Path = BAR_ROOT) -> pd.DataFrame:
+    """Naive-UTC timestamps x assets closes at `rule`, ready for src.index.engine.build_index."""
+    cols = {}
+    for a in assets:
+        df = resample_bars(a, timeframe, rule, start, end, root)
+        cols[a] = df.set_index("timestamp_utc")["close"].astype(np.float64)
+    mat = pd.concat(cols, axis=1).sort_index()
+    mat.index = mat.index.tz_convert("UTC").tz_localize(None)
+    return mat
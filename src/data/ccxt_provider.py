@@ -1,50 +1,103 @@
 from __future__ import annotations
-from datetime import timezone
-from typing import List, Tuple
-import time
+from typing import Dict, Iterator, List, Optional, Tuple
+import threading
+import numpy as np
 import pandas as pd
 import ccxt
 
+from src.data.parse import canonical_frame, rows_to_array
+from src.utils.ratelimit import limiter
+from src.utils import instrument
+
 _SYMBOLS = {
     "bitcoin":  [("kraken", "BTC/USD"), ("binance", "BTC/USDT")],
     "ethereum": [("kraken", "ETH/USD"), ("binance", "ETH/USDT")],
 }
 
-def _fetch_all_ohlcv(ex, symbol: str, timeframe: str = "1d") -> pd.DataFrame:
-    since = None
-    limit = 1000
-    rows: List[List[float]] = []
+_EXCHANGES: Dict[str, "ccxt.Exchange"] = {}
+_EX_LOCK = threading.Lock()
+
+def _exchange(ex_id: str):
+    """One instance per exchange with markets loaded once, shared by all pulls."""
+    with _EX_LOCK:
+        ex = _EXCHANGES.get(ex_id)
+        if ex is None:
+            ex = getattr(ccxt, ex_id)({"enableRateLimit": False})
+            limiter(f"ccxt:{ex.id}", rate=1000.0 / ex.rateLimit).acquire()
+            ex.load_markets()
+            _EXCHANGES[ex_id] = ex
+        return ex
+
+def _iter_ohlcv_pages(ex, symbol: str, timeframe: str = "1d", since: Optional[int] = None,
+                      limit: int = 1000) -> Iterator[List[List[float]]]:
+    # shared across threads so concurrent pulls respect the exchange's own rateLimit
+    bucket = limiter(f"ccxt:{ex.id}", rate=1000.0 / ex.rateLimit)
     while True:
+        bucket.acquire()
         data = ex.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
         if not data:
             break
-        rows.extend(data)
-        last_ts = data[-1][0]
-        since = last_ts + 1
-        time.sleep(ex.rateLimit / 1000.0)
+        yield data
+        since = data[-1][0] + 1
         if len(data) < limit:
             break
-    if not rows:
+
+@instrument.timed("fetch.ccxt")
+def _fetch_all_ohlcv(ex, symbol: str, timeframe: str = "1d", since: Optional[int] = None) -> pd.DataFrame:
+    pages = [rows_to_array(page, 6) for page in _iter_ohlcv_pages(ex, symbol, timeframe=timeframe, since=since)]
+    if not pages:
         raise RuntimeError(f"No OHLCV from {ex.id} {symbol}")
-    df = pd.DataFrame(rows, columns=["ms","open","high","low","close","volume"])
-    df["timestamp_utc"] = pd.to_datetime(df["ms"], unit="ms", utc=True)
-    df["date"] = df["timestamp_utc"].dt.tz_convert(timezone.utc).dt.date.astype("datetime64[ns]")
-    return df[["timestamp_utc","date","close","volume"]].sort_values("timestamp_utc").reset_index(drop=True)
+    a = np.concatenate(pages)
+    return canonical_frame(a[:, 0].astype(np.int64), a[:, 4], a[:, 5])
+
+def fetch_daily_close_venue(ex_id: str, symbol: str, since_ms: Optional[int] = None) -> pd.DataFrame:
+    """Daily closes from one specific exchange/symbol (no fallback across venues)."""
+    ex = _exchange(ex_id)
+    if symbol not in ex.markets:
+        raise RuntimeError(f"{ex_id}: symbol {symbol} missing")
+    return _fetch_all_ohlcv(ex, symbol, timeframe="1d", since=since_ms)
 
-def fetch_daily_close_ccxt(coin_id: str) -> pd.DataFrame:
+def fetch_daily_close_ccxt(coin_id: str, since_ms: Optional[int] = None) -> pd.DataFrame:
     pairs = _SYMBOLS.get(coin_id)
     if not pairs:
         raise ValueError(f"No CCXT mapping for {coin_id}")
     errors: List[Tuple[str,str]] = []
     for ex_id, symbol in pairs:
         try:
-            ex = getattr(ccxt, ex_id)({"enableRateLimit": True})
-            ex.load_markets()
+            ex = _exchange(ex_id)
             if symbol not in ex.markets:
                 errors.append((ex_id, f"symbol {symbol} missing"))
                 continue
-            return _fetch_all_ohlcv(ex, symbol, timeframe="1d")
+            return _fetch_all_ohlcv(ex, symbol, timeframe="1d", since=since_ms)
         except Exception as e:
             errors.append((ex_id, repr(e)))
             continue
     raise RuntimeError(f"CCXT failed for {coin_id}: {errors}")
+
+def iter_ohlcv_ccxt(coin_id: str, timeframe: str = "1m", since_ms: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Stream OHLCV pages (any ccxt timeframe, e.g. 1m/1h) as (n, 6) float64 arrays
+    [ms, open, high, low, close, volume] from the first venue that lists the pair.
+    Pages are handed over as they arrive so callers can persist them without
+    holding the whole history.
+    """
+    pairs = _SYMBOLS.get(coin_id)
+    if not pairs:
+        raise ValueError(f"No CCXT mapping for {coin_id}")
+    errors: List[Tuple[str,str]] = []
+    for ex_id, symbol in pairs:
+        try:
+            ex = _exchange(ex_id)
+            if symbol not in ex.markets:
+                errors.append((ex_id, f"symbol {symbol} missing"))
+                continue
+            if timeframe not in (getattr(ex, "timeframes", None) or {}):
+                errors.append((ex_id, f"timeframe {timeframe} unsupported"))
+                continue
+        except Exception as e:
+            errors.append((ex_id, repr(e)))
+            continue
+        for page in _iter_ohlcv_pages(ex, symbol, timeframe=timeframe, since=since_ms):
+            yield rows_to_array(page, 6)
+        return
+    raise RuntimeError(f"CCXT failed for {coin_id} {timeframe}: {errors}")
@@ -4,47 +4,84 @@ from typing import Dict, Any
 import time
 import pandas as pd
 
-from src.utils.http import get_with_backoff
-from src.utils.cache import read_json_cache, write_json_cache, is_fresh
+from src.utils.http import request_json
+from src.utils.ratelimit import limiter
+from src.utils.cache import frame_cache
+from src.data.incremental import days_since
+from src.data.parse import market_chart_frame
+from src.utils import instrument
 
 BASE = "https://api.coingecko.com/api/v3"
 
+@instrument.timed("parse.coingecko")
 def _build_df_from_payload(payload: Dict[str, Any]) -> pd.DataFrame:
-    prices = payload.get("prices", [])
-    vols   = payload.get("total_volumes", [])
-    df_p = pd.DataFrame(prices, columns=["ms", "close"])
-    df_v = pd.DataFrame(vols,   columns=["ms", "volume"])
-    df = df_p.merge(df_v, on="ms", how="left")
-    df["timestamp_utc"] = pd.to_datetime(df["ms"], unit="ms", utc=True)
-    df["date"] = df["timestamp_utc"].dt.tz_convert("UTC").dt.date.astype("datetime64[ns]")
-    df = df.drop(columns=["ms"]).sort_values("timestamp_utc").reset_index(drop=True)
-    return df[["timestamp_utc","date","close","volume"]]
+    df = market_chart_frame(payload)
+    # the window actually served ('365' when a 'max' request fell back); None for old entries
+    df.attrs["days"] = payload.get("_days")
+    return df
+
+def _covers(df: pd.DataFrame, days: str) -> bool:
+    """Whether a frame from a covering entry really spans `days`."""
+    served = df.attrs.get("days")
+    if served is not None:
+        return served == "max" or int(served) >= int(days)
+    return len(df) > 0 and (df["date"].max() - df["date"].min()).days >= int(days)
 
 def fetch_daily_close_coin(coin_id: str, vs_currency: str = "usd", days: str = "max",
                            cache_dir: str | Path = "data/raw/coingecko",
-                           ttl_seconds: int = 24*3600) -> pd.DataFrame:
+                           ttl_seconds: int = 24*3600, since_ms: int | None = None) -> pd.DataFrame:
     """
     Returns ['timestamp_utc','date','close','volume'] (daily).
     Free tier: if days='max' hits error_code=10012, retry transparently with days='365'.
+    since_ms: only fetch the tail from this epoch-ms on (incremental pulls).
     """
-    cache_path = Path(cache_dir) / f"{coin_id}_{vs_currency}_{days}_market_chart.json"
-    meta = read_json_cache(cache_path)
-    if meta and is_fresh(meta, ttl_seconds):
-        payload = meta
-    else:
+    if since_ms is not None:
+        days = str(days_since(since_ms, int(time.time() * 1000)))
+    days = str(days)
+    cache = frame_cache(cache_dir)
+    # tail pulls are keyed on the resume point and never answered from a longer window:
+    # a payload cached before the last pull can end before the bars this pull is for
+    window = f"tail{days}_{since_ms}" if since_ms is not None else days
+    name = f"{coin_id}_{vs_currency}_{window}_market_chart.json"
+    # any fresh longer window (or 'max') answers this request after trimming
+    covering = []
+    if days != "max" and since_ms is None:
+        prefix, suffix = f"{coin_id}_{vs_currency}_", "_market_chart.json"
+        windows = [n[len(prefix):-len(suffix)] for n in cache.names(f"{prefix}*{suffix}")]
+        longer = sorted(int(w) for w in windows if w.isdigit() and int(w) > int(days))
+        covering = [f"{prefix}{w}{suffix}" for w in longer] + ([f"{prefix}max{suffix}"] if "max" in windows else [])
+
+    def fetch(meta):
+        url = f"{BASE}/coins/{coin_id}/market_chart"
         params = {"vs_currency": vs_currency, "days": days, "interval": "daily"}
-        status, payload = get_with_backoff(f"{BASE}/coins/{coin_id}/market_chart", params)
+        # a stale entry still revalidates: 304 means the cached payload is current
+        res = request_json(url, params, validators=meta, limiter=limiter("coingecko"))
 
-        if status == 401 and isinstance(payload, dict):
-            err = payload.get("error", {}).get("status", {})
+        if res.status == 401 and isinstance(res.payload, dict):
+            err = res.payload.get("error", {}).get("status", {})
             if err.get("error_code") == 10012 and days == "max":
                 params["days"] = "365"
-                status, payload = get_with_backoff(f"{BASE}/coins/{coin_id}/market_chart", params)
-
-        if status != 200:
-            raise RuntimeError(f"CoinGecko error {status}: {payload}")
+                res = request_json(url, params, limiter=limiter("coingecko"))
 
+        if res.status == 304 and meta:
+            payload = meta
+        elif res.status == 200:
+            payload = res.payload
+            payload["_etag"] = res.etag
+            payload["_last_modified"] = res.last_modified
+        else:
+            raise RuntimeError(f"CoinGecko error {res.status}: {res.payload}")
         payload["_fetched_at"] = time.time()
-        write_json_cache(cache_path, payload)
+        payload["_days"] = params["days"]
+        return payload
 
-    return _build_df_from_payload(payload)
+    df = cache.get_frame(name, fetch, _build_df_from_payload, ttl_seconds=ttl_seconds, covering=covering)
+    if covering and not _covers(df, days):
+        # a covering 'max' entry may hold only the free tier's 365-day fallback
+        df = cache.get_frame(name, fetch, _build_df_from_payload, ttl_seconds=ttl_seconds)
+    if days != "max" and since_ms is None and len(df):
+        df = df[df["date"] >= df["date"].max() - pd.Timedelta(days=int(days))].reset_index(drop=True)
+    if since_ms is not None:
+        df = df[df["timestamp_utc"] >= pd.Timestamp(since_ms, unit="ms", tz="UTC").normalize()]
+        df = df.reset_index(drop=True)
+    return df
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from src.data.coingecko import fetch_daily_close_coin
+from src.utils import instrument
+
+TOLERANCE = 0.02  # max relative distance from the cross-provider median
+SNAPSHOT_PROVIDERS = ("coingecko",)  # daily points are 00:00 UTC snapshots, not bars dated by their open
+
+def _provider_jobs(coin_id: str, since_ms: Optional[int]) -> Dict[str, Callable[[], pd.DataFrame]]:
+    jobs: Dict[str, Callable[[], pd.DataFrame]] = {
+        "coingecko": lambda: fetch_daily_close_coin(coin_id=coin_id, since_ms=since_ms),
+    }
+    from src.data.yahoo import _YAHOO_SYMBOL, fetch_daily_close_yahoo
+    if coin_id in _YAHOO_SYMBOL:
+        jobs["yahoo"] = lambda: fetch_daily_close_yahoo(coin_id, since_ms=since_ms)
+    from src.data.ccxt_provider import _SYMBOLS, fetch_daily_close_venue
+    for ex_id, symbol in _SYMBOLS.get(coin_id, []):
+        jobs[f"ccxt:{ex_id}"] = (lambda e=ex_id, s=symbol: fetch_daily_close_venue(e, s, since_ms=since_ms))
+    return jobs
+
+def fetch_all_providers(coin_id: str, since_ms: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Query every provider/venue for `coin_id` at once; latency is that of the slowest
+    one, and each provider's rate-limit bucket still applies.
+    Returns ({provider: frame}, {provider: error}).
+    """
+    jobs = _provider_jobs(coin_id, since_ms)
+    frames: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futs = {name: pool.submit(fn) for name, fn in jobs.items()}
+        for name, fut in futs.items():
+            try:
+                df = fut.result()
+                if df is None or df.empty:
+                    errors[name] = "empty"
+                else:
+                    frames[name] = df
+            except Exception as e:
+                errors[name] = repr(e)
+    return frames, errors
+
+def _by_bar_date(name: str, f: pd.DataFrame) -> pd.DataFrame:
+    """
+    Provider frame indexed by the UTC date of the bar its close ends. CCXT/Yahoo bars are
+    dated by their open; a CoinGecko 00:00 snapshot is the previous day's close, so
+    snapshots move back to D-1 while its trailing intraday (live) point stays on its own day.
+    """
+    if name in SNAPSHOT_PROVIDERS:
+        ts = pd.DatetimeIndex(f["timestamp_utc"]) - pd.Timedelta(milliseconds=1)
+        f = f.assign(date=ts.floor("D").tz_localize(None).astype("datetime64[ns]"))
+    return f.drop_duplicates("date", keep="last").set_index("date")
+
+@instrument.timed("merge.consensus")
+def consensus_prices(frames: Dict[str, pd.DataFrame], tolerance: float = TOLERANCE) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Align provider closes on the UTC date grid (see _by_bar_date) and keep, per day, the closes within
+    `tolerance` of the cross-provider median; the consensus close is their mean.
+    Days where every print is rejected (e.g. two venues far apart) fall back to the
+    print closest to the previous day's median.
+
+    Returns (prices[timestamp_utc, date, close, volume],
+             stats[date, n_available, n_used, n_rejected, max_dev, fallback, rejected]).
+    """
+    if not frames:
+        raise RuntimeError("No provider frames to build a consensus from")
+    names = list(frames)
+    aligned = {n: _by_bar_date(n, f) for n, f in frames.items()}
+    closes = pd.concat({n: f["close"] for n, f in aligned.items()}, axis=1).sort_index()
+    vols = pd.concat({n: f["volume"] for n, f in aligned.items()}, axis=1).reindex(closes.index)
+    C = closes[names].to_numpy(dtype=float)
+    V = vols[names].to_numpy(dtype=float)
+    avail = np.isfinite(C)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        med = np.nanmedian(C, axis=1)
+        dev = np.abs(C / med[:, None] - 1.0)
+        used = avail & (dev <= tolerance)
+        n_used = used.sum(axis=1)
+        mean_used = np.where(used, C, 0.0).sum(axis=1) / np.where(n_used > 0, n_used, 1)
+        prev_med = pd.Series(med).shift(1).ffill().to_numpy()
+        ref = np.where(np.isfinite(prev_med), prev_med, med)
+        nearest = np.nanargmin(np.where(avail, np.abs(C - ref[:, None]), np.inf), axis=1)
+        close = np.where(n_used > 0, mean_used, C[np.arange(len(C)), nearest])
+        volume = np.nanmedian(V, axis=1)
+        max_dev = np.nanmax(np.where(avail, dev, np.nan), axis=1)
+
+    rejected = avail & ~used
+    labels = np.array(names, dtype=object)
+    rejected_names = [",".join(labels[row]) for row in rejected]
+    dates = pd.DatetimeIndex(closes.index)
+
+    prices = pd.DataFrame({
+        "timestamp_utc": dates.tz_localize("UTC"),
+        "date": dates.astype("datetime64[ns]"),
+        "close": close,
+        "volume": volume,
+    })
+    stats = pd.DataFrame({
+        "date": dates.astype("datetime64[ns]"),
+        "n_available": avail.sum(axis=1),
+        "n_used": n_used,
+        "n_rejected": rejected.sum(axis=1),
+        "max_dev": max_dev,
+        "fallback": n_used == 0,
+        "rejected": rejected_names,
+    })
+    return prices.dropna(subset=["close"]).reset_index(drop=True), stats
+
+def fetch_consensus(coin_id: str, since_ms: Optional[int] = None,
+                    tolerance: float = TOLERANCE) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    consensus_prices over every provider. With since_ms, days before since_ms's UTC day
+    are dropped: CoinGecko's since_ms-day snapshot moves back a day, where the bar
+    providers have no data, so that day would be a single-provider close.
+    """
+    frames, errors = fetch_all_providers(coin_id, since_ms=since_ms)
+    for name, err in errors.items():
+        print(f"[warn] consensus: {name} unavailable ({err})")
+    prices, stats = consensus_prices(frames, tolerance=tolerance)
+    if since_ms is not None:
+        start = pd.Timestamp(since_ms, unit="ms").floor("D")
+        prices = prices[prices["date"] >= start].reset_index(drop=True)
+        stats = stats[stats["date"] >= start].reset_index(drop=True)
+    print(f"[info] consensus for {coin_id}: providers={sorted(frames)} days={len(prices)} "
+          f"rejections={int(stats['n_rejected'].sum())} fallback_days={int(stats['fallback'].sum())}")
+    return prices, stats
@@ -0,0 +1,36 @@
+from __future__ import annotations
+from pathlib import Path
+import pandas as pd
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def load_existing(path: str | Path) -> pd.DataFrame | None:
+    p = Path(path)
+    if not p.exists():
+        return None
+    df = pd.read_parquet(p)
+    return df if not df.empty else None
+
+def resume_since_ms(existing: pd.DataFrame | None) -> int | None:
+    """
+    Epoch-ms to resume from. The last stored bar is re-requested because
+    it may have been a partial (intraday) print when it was written.
+    """
+    if existing is None or existing.empty:
+        return None
+    last = existing["timestamp_utc"].max()
+    return int(last.value // 1_000_000)
+
+def days_since(since_ms: int | None, now_ms: int) -> int | None:
+    """Whole days to request from APIs that only take a `days` window."""
+    if since_ms is None:
+        return None
+    return max(1, -(-(now_ms - since_ms) // DAY_MS) + 1)
+
+def append_tail(existing: pd.DataFrame | None, tail: pd.DataFrame) -> pd.DataFrame:
+    """Append freshly fetched rows; a re-fetched day replaces the stored one."""
+    if existing is None or existing.empty:
+        return tail.sort_values("timestamp_utc").reset_index(drop=True)
+    out = pd.concat([existing, tail[existing.columns]], ignore_index=True)
+    out = out.drop_duplicates("date", keep="last")
+    return out.sort_values("timestamp_utc").reset_index(drop=True)
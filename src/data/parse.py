@@ -0,0 +1,96 @@
+from __future__ import annotations
+import itertools, re
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# Shared payload parsing: provider rows go straight into int64 epoch-ms / float64 arrays,
+# days are floored with integer arithmetic and series are aligned by searchsorted on the
+# sorted ms/day keys, so no datetime.date objects or DataFrame merges are created.
+
+DAY_MS = 24 * 60 * 60 * 1000
+CANONICAL_COLUMNS = ["timestamp_utc","date","close","volume"]
+_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": DAY_MS, "w": 7 * DAY_MS}
+
+def timeframe_ms(timeframe: str) -> int:
+    """'1m' -> 60000, '4h' -> 14400000, '1d' -> 86400000."""
+    m = re.fullmatch(r"(\d+)([mhdw])", timeframe.strip().lower())
+    if not m:
+        raise ValueError(f"Unsupported timeframe {timeframe!r}")
+    return int(m.group(1)) * _UNIT_MS[m.group(2)]
+
+def rows_to_array(rows: Sequence, width: int) -> np.ndarray:
+    """(n, width) float64 from a list of equal-length numeric rows; None becomes NaN."""
+    n = len(rows)
+    if n == 0:
+        return np.empty((0, width), dtype=np.float64)
+    try:
+        flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float64, count=n * width)
+        return flat.reshape(n, width)
+    except (TypeError, ValueError):
+        # None/str cells (nulls, Binance's string prices): slower, converting path
+        return np.asarray(rows, dtype=np.float64).reshape(n, width)
+
+def pairs_to_arrays(pairs: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """[[ms, value], ...] -> (ms int64, value float64). Epoch-ms < 2**53, so float64 holds them exactly."""
+    a = rows_to_array(pairs, 2)
+    return a[:, 0].astype(np.int64), a[:, 1]
+
+def floor_day_ms(ms: np.ndarray) -> np.ndarray:
+    ms = np.asarray(ms, dtype=np.int64)
+    return ms - ms % DAY_MS
+
+def ms_to_ns(ms: np.ndarray) -> np.ndarray:
+    return np.asarray(ms, dtype=np.int64) * 1_000_000
+
+def first_per_key(keys: np.ndarray, *values: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Sorted unique keys and, for each values array, the entry of the earliest row per key."""
+    order = np.argsort(keys, kind="stable")
+    k = keys[order]
+    keep = np.ones(len(k), dtype=bool)
+    keep[1:] = k[1:] != k[:-1]
+    idx = order[keep]
+    return (keys[idx],) + tuple(v[idx] for v in values)
+
+def align(keys: np.ndarray, other_keys: np.ndarray, other_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Values of `other` at `keys` (NaN where absent) and the found-mask.
+    other_keys must be sorted and unique (see first_per_key).
+    """
+    out = np.full(len(keys), np.nan)
+    found = np.zeros(len(keys), dtype=bool)
+    if len(other_keys):
+        pos = np.minimum(np.searchsorted(other_keys, keys), len(other_keys) - 1)
+        found = other_keys[pos] == keys
+        out[found] = other_values[pos[found]]
+    return out, found
+
+def canonical_frame(ms: np.ndarray, close: np.ndarray, volume: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """['timestamp_utc' (UTC, ns), 'date' (naive ns midnight), 'close', 'volume'] sorted by timestamp."""
+    ms = np.asarray(ms, dtype=np.int64)
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.full(len(ms), np.nan) if volume is None else np.asarray(volume, dtype=np.float64)
+    if len(ms) > 1 and np.any(ms[1:] < ms[:-1]):
+        order = np.argsort(ms, kind="stable")
+        ms, close, volume = ms[order], close[order], volume[order]
+    return pd.DataFrame({
+        "timestamp_utc": pd.DatetimeIndex(ms_to_ns(ms).view("datetime64[ns]")).tz_localize("UTC"),
+        "date": ms_to_ns(floor_day_ms(ms)).view("datetime64[ns]"),
+        "close": close,
+        "volume": volume,
+    })
+
+def market_chart_frame(payload: dict) -> pd.DataFrame:
+    """CoinGecko /market_chart payload -> canonical frame; volume matched on the exact price ms."""
+    ms, close = pairs_to_arrays(payload.get("prices", []))
+    v_ms, vol = pairs_to_arrays(payload.get("total_volumes", []))
+    v_ms, vol = first_per_key(v_ms, vol)
+    volume, _ = align(ms, v_ms, vol)
+    return canonical_frame(ms, close, volume)
+
+def daily_table(ms: np.ndarray, columns: Sequence[Tuple[str, np.ndarray]]) -> pd.DataFrame:
+    """One row per UTC day (first observation of the day): 'date' (naive ns) + the given columns."""
+    day, *vals = first_per_key(floor_day_ms(ms), *(v for _, v in columns))
+    out = {"date": ms_to_ns(day).view("datetime64[ns]")}
+    out.update({name: v for (name, _), v in zip(columns, vals)})
+    return pd.DataFrame(out)
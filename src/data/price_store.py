@@ -0,0 +1,110 @@
+from __future__ import annotations
+import os, threading, uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.utils import instrument
+
+# Columnar store for normalized OHLCV (table 'prices') and index levels (table 'indexes').
+# Layout: <root>/<table>/asset=<id>/year=<yyyy>/part-0.parquet (hive partitioning).
+# Reads prune partitions by asset/year and push date predicates down to row-group stats.
+
+STORE_ROOT = Path("data/store")
+PRICE_COLUMNS = ["timestamp_utc","date","open","high","low","close","volume","market_cap","provider"]
+ROW_GROUP_SIZE = 64 * 1024
+
+_PARTITIONING = ds.partitioning(pa.schema([("asset", pa.string()), ("year", pa.int32())]), flavor="hive")
+_LOCKS: Dict[Path, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+def _lock_for(path: Path) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(path, threading.Lock())
+
+def _partition_file(root: Path, table: str, asset: str, year: int) -> Path:
+    return root / table / f"asset={asset}" / f"year={year}" / "part-0.parquet"
+
+def normalize_prices(df: pd.DataFrame, provider: str | None = None) -> pd.DataFrame:
+    """Canonical provider frame -> store schema; missing OHLC/market_cap fields become NaN."""
+    out = df.copy()
+    for col in ("open", "high", "low", "market_cap"):
+        if col not in out.columns:
+            out[col] = float("nan")
+    if "provider" not in out.columns:
+        out["provider"] = provider or "unknown"
+    return out[PRICE_COLUMNS]
+
+@instrument.timed("write.store")
+def append(df: pd.DataFrame, asset: str, table: str = "prices", root: str | Path = STORE_ROOT,
+           key: str = "timestamp_utc") -> int:
+    """
+    Merge rows into the asset's yearly partitions. Each partition is rewritten to a
+    temp file and swapped in with os.replace, so readers never see a half-written
+    year. Rows with an existing `key` replace the stored ones.
+    """
+    if df.empty:
+        return 0
+    root = Path(root)
+    years = pd.DatetimeIndex(df["date"]).year
+    for year, part in df.groupby(years):
+        path = _partition_file(root, table, asset, int(year))
+        with _lock_for(path):
+            if path.exists():
+                old = pq.read_table(path).to_pandas()
+                part = pd.concat([old, part[old.columns]], ignore_index=True)
+            part = part.drop_duplicates(key, keep="last").sort_values(key).reset_index(drop=True)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp, path)
+    return len(df)
+
+def has_asset(asset: str, table: str = "prices", root: str | Path = STORE_ROOT) -> bool:
+    return (Path(root) / table / f"asset={asset}").is_dir()
+
+def _ts(value) -> pa.Scalar:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return pa.scalar(ts.as_unit("ns").value, type=pa.timestamp("ns"))
+
+@instrument.timed("read.store")
+def read(assets: str | Iterable[str], start=None, end=None, columns: Optional[List[str]] = None,
+         table: str = "prices", root: str | Path = STORE_ROOT) -> pd.DataFrame:
+    """
+    Rows for `assets` with start <= date <= end. Only `columns` are decoded
+    (plus 'asset' when several assets are requested).
+    """
+    single = isinstance(assets, str)
+    names = [assets] if single else list(assets)
+    base = Path(root) / table
+    if not base.is_dir():
+        raise FileNotFoundError(f"No '{table}' table under {root}")
+    dataset = ds.dataset(base, format="parquet", partitioning=_PARTITIONING)
+
+    flt = ds.field("asset").isin(names)
+    if start is not None:
+        flt &= (ds.field("year") >= pd.Timestamp(start).year) & (ds.field("date") >= _ts(start))
+    if end is not None:
+        flt &= (ds.field("year") <= pd.Timestamp(end).year) & (ds.field("date") <= _ts(end))
+    cols = None
+    if columns is not None:
+        cols = list(columns) + ([] if single or "asset" in columns else ["asset"])
+    df = dataset.to_table(columns=cols, filter=flt).to_pandas()
+    df = df.drop(columns=["year"] + (["asset"] if single else []), errors="ignore")
+    sort_by = [c for c in ("asset", "date") if c in df.columns]
+    if sort_by:
+        df = df.sort_values(sort_by, kind="stable")
+    return df.reset_index(drop=True)
+
+def read_matrix(assets: Iterable[str], field: str = "close", start=None, end=None,
+                table: str = "prices", root: str | Path = STORE_ROOT) -> pd.DataFrame:
+    """Dates x assets matrix of one field, e.g. constituent closes for index engines."""
+    names = list(assets)
+    df = read(names, start=start, end=end, columns=["date", field, "asset"], table=table, root=root)
+    mat = df.pivot_table(index="date", columns="asset", values=field, aggfunc="last")
+    return mat.reindex(columns=names).sort_index()
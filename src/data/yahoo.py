@@ -1,20 +1,32 @@
 from __future__ import annotations
-import time
+import time, threading
 from typing import Optional
 from datetime import timezone
+import numpy as np
 import pandas as pd
 import yfinance as yf
 
+from src.data.parse import canonical_frame
+from src.utils.ratelimit import limiter
+from src.utils import instrument
+
 _YAHOO_SYMBOL = {
     "bitcoin": "BTC-USD",
     "ethereum": "ETH-USD",
 }
 
-def _dl(sym: str, tries: int = 3) -> pd.DataFrame:
+# yf.download keeps per-call results in module globals; concurrent calls clobber each other
+_DL_LOCK = threading.Lock()
+
+@instrument.timed("fetch.yahoo")
+def _dl(sym: str, tries: int = 3, start: Optional[str] = None) -> pd.DataFrame:
     last_err: Optional[Exception] = None
+    window = {"start": start} if start else {"period": "max"}
     for _ in range(tries):
+        limiter("yahoo").acquire()
         try:
-            df = yf.download(sym, period="max", interval="1d", auto_adjust=False, actions=False, progress=False, threads=False)
+            with _DL_LOCK:
+                df = yf.download(sym, interval="1d", auto_adjust=False, actions=False, progress=False, threads=False, **window)
             if df is not None and not df.empty:
                 return df
         except Exception as e:
@@ -22,16 +34,17 @@ def _dl(sym: str, tries: int = 3) -> pd.DataFrame:
         time.sleep(1.0)
     raise RuntimeError(f"Yahoo returned empty history for {sym}; last_err={last_err}")
 
-def fetch_daily_close_yahoo(coin_id: str) -> pd.DataFrame:
+def fetch_daily_close_yahoo(coin_id: str, since_ms: Optional[int] = None) -> pd.DataFrame:
     sym = _YAHOO_SYMBOL.get(coin_id)
     if not sym:
         raise ValueError(f"No Yahoo symbol mapping for {coin_id}")
-    hist = _dl(sym).reset_index()
-    hist.rename(columns={"Date":"timestamp_utc","Close":"close","Volume":"volume"}, inplace=True)
-    if hist["timestamp_utc"].dt.tz is None:
-        hist["timestamp_utc"] = hist["timestamp_utc"].dt.tz_localize(timezone.utc)
-    else:
-        hist["timestamp_utc"] = hist["timestamp_utc"].dt.tz_convert(timezone.utc)
-    hist["date"] = hist["timestamp_utc"].dt.date.astype("datetime64[ns]")
-    out = hist[["timestamp_utc","date","close","volume"]].sort_values("timestamp_utc").reset_index(drop=True)
-    return out
+    start = None
+    if since_ms is not None:
+        start = pd.Timestamp(since_ms, unit="ms", tz="UTC").strftime("%Y-%m-%d")
+    hist = _dl(sym, start=start)
+    idx = pd.DatetimeIndex(hist.index)
+    idx = idx.tz_localize(timezone.utc) if idx.tz is None else idx.tz_convert(timezone.utc)
+    # newer yfinance returns (field, ticker) columns; one ticker either way
+    close = np.asarray(hist["Close"], dtype=np.float64).reshape(-1)
+    volume = np.asarray(hist["Volume"], dtype=np.float64).reshape(-1)
+    return canonical_frame(idx.as_unit("ms").asi8, close, volume)
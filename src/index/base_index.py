@@ -2,6 +2,11 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 
+from src.data import price_store
+from src.utils import instrument
+
+NOTES = "daily close; provider=coingecko/yahoo/ccxt; base normalized"
+
 def _resolve_price_path(coin: str) -> Path:
     for provider in ("coingecko","yahoo","ccxt"):
         p = Path("data/raw") / provider / f"{coin}_usd_daily.parquet"
@@ -9,13 +14,29 @@ def _resolve_price_path(coin: str) -> Path:
             return p
     raise FileNotFoundError(f"No price parquet found for {coin}")
 
-def make_base_index_for_coin(coin: str, csv_out: str | Path, base_level: float = 1000.0) -> None:
-    parquet_in = _resolve_price_path(coin)
-    df = pd.read_parquet(parquet_in).copy().sort_values("date").reset_index(drop=True)
+def _load_closes(coin: str) -> pd.DataFrame:
+    """date/close only; from the price store when it holds the coin, else the provider parquet."""
+    if price_store.has_asset(coin):
+        return price_store.read(coin, columns=["date","close"])
+    return pd.read_parquet(_resolve_price_path(coin), columns=["date","close"])
+
+def checkpoint_path(index_out: str | Path) -> Path:
+    """<stem>.checkpoint.json next to an index file (src.cli.daily_update's state)."""
+    p = Path(index_out)
+    return p.with_name(p.stem + ".checkpoint.json")
+
+@instrument.timed("index.base")
+def make_base_index_for_coin(coin: str, csv_out: str | Path, base_level: float = 1000.0,
+                             index_name: str | None = None) -> None:
+    df = _load_closes(coin).sort_values("date").reset_index(drop=True)
     p0 = float(df.loc[0, "close"])
     df["index_level"] = (df["close"] / p0) * base_level
     df["divisor"] = p0 / base_level
-    df["notes"] = "daily close; provider=coingecko/yahoo/ccxt; base normalized"
+    df["notes"] = NOTES
     out = df[["date","index_level","divisor","notes"]]
     Path(csv_out).parent.mkdir(parents=True, exist_ok=True)
     out.to_csv(csv_out, index=False)
+    # a full rebuild invalidates the daily-update checkpoint (src.cli.daily_update)
+    checkpoint_path(csv_out).unlink(missing_ok=True)
+    if index_name:
+        price_store.append(out[["date","index_level","divisor"]], index_name, table="indexes", key="date")
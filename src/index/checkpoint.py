@@ -0,0 +1,108 @@
+from __future__ import annotations
+import json, math
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from src.reports.metrics import ANN_FACTOR
+from src.reports.rolling import RollingWindow, WINDOWS
+from src.utils.cache import write_json_cache
+
+@dataclass
+class IndexCheckpoint:
+    """
+    Everything needed to extend an index by one bar without touching its history:
+    constituent units and divisor (level = sum(shares * price) / divisor), the last
+    level/prices, running return moments (Welford), running max / max drawdown and
+    the rolling-window states (live RollingWindow objects; serialised only by save()).
+    """
+    name: str
+    shares: Dict[str, float]
+    divisor: float
+    last_date: str
+    last_level: float
+    last_prices: Dict[str, float]
+    first_level: float
+    n_rets: int = 0
+    ret_mean: float = 0.0
+    ret_m2: float = 0.0
+    running_max: float = 0.0
+    max_dd: float = 0.0
+    rolling: List[RollingWindow] = field(default_factory=list)
+
+    @classmethod
+    def bootstrap(cls, name: str, levels: pd.DataFrame, shares: Dict[str, float],
+                  last_prices: Dict[str, float], windows=WINDOWS) -> "IndexCheckpoint":
+        """One O(n) pass over an existing [date, index_level, divisor] history."""
+        levels = levels.sort_values("date")
+        lv = levels["index_level"].to_numpy(dtype=float)
+        rets = lv[1:] / lv[:-1] - 1.0
+        running_max = np.maximum.accumulate(lv)
+        rolling = []
+        for w in windows:
+            rw = RollingWindow(w)
+            for x in lv[-(w + 1):]:
+                rw.update(x)
+            rolling.append(rw)
+        return cls(
+            name=name, shares=dict(shares), divisor=float(levels["divisor"].iloc[-1]),
+            last_date=str(pd.Timestamp(levels["date"].iloc[-1]).date()), last_level=float(lv[-1]),
+            last_prices={k: float(v) for k, v in last_prices.items()}, first_level=float(lv[0]),
+            n_rets=len(rets), ret_mean=float(rets.mean()) if len(rets) else 0.0,
+            ret_m2=float(((rets - rets.mean()) ** 2).sum()) if len(rets) else 0.0,
+            running_max=float(running_max[-1]), max_dd=float((lv / running_max - 1.0).min()),
+            rolling=rolling,
+        )
+
+    def step(self, date, prices: Dict[str, float]) -> dict:
+        """Apply one bar; constituents missing from `prices` carry their last price."""
+        px = {a: float(prices.get(a, self.last_prices[a])) for a in self.shares}
+        level = sum(self.shares[a] * px[a] for a in self.shares) / self.divisor
+        r = level / self.last_level - 1.0
+        self.n_rets += 1
+        d = r - self.ret_mean
+        self.ret_mean += d / self.n_rets
+        self.ret_m2 += d * (r - self.ret_mean)
+        self.running_max = max(self.running_max, level)
+        self.max_dd = min(self.max_dd, level / self.running_max - 1.0)
+        rolling = {}
+        for rw in self.rolling:
+            rolling.update(rw.update(level))
+        self.last_date = str(pd.Timestamp(date).date())
+        self.last_level = level
+        self.last_prices = px
+        return {"date": self.last_date, "index_level": level, "divisor": self.divisor, **rolling}
+
+    def metrics(self) -> dict:
+        """Full-history CAGR/AnnVol/MaxDD, same definitions as perf_metrics_from_index."""
+        if self.n_rets < 1:
+            return {"CAGR": 0.0, "AnnVol": 0.0, "MaxDD": 0.0}
+        cagr = (self.last_level / self.first_level) ** (ANN_FACTOR / self.n_rets) - 1.0
+        vol = math.sqrt(self.ret_m2 / (self.n_rets - 1) * ANN_FACTOR) if self.n_rets > 1 else 0.0
+        return {"CAGR": cagr, "AnnVol": vol, "MaxDD": self.max_dd}
+
+    def rolling_values(self) -> dict:
+        out = {}
+        for rw in self.rolling:
+            out.update(rw.value())
+        return out
+
+    def to_dict(self) -> dict:
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
+        d["rolling"] = [rw.to_dict() for rw in self.rolling]
+        return d
+
+    def save(self, path: str | Path) -> None:
+        """Atomic (tmp file + os.replace)."""
+        write_json_cache(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["IndexCheckpoint"]:
+        p = Path(path)
+        if not p.exists():
+            return None
+        d = json.loads(p.read_text(encoding="utf-8"))
+        d["rolling"] = [RollingWindow.from_dict(st) for st in d.get("rolling", [])]
+        return cls(**d)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from src.utils import instrument
+
+SCHEMES = ("market_cap", "equal", "capped")
+
+def rebalance_mask(dates: pd.DatetimeIndex, freq: str = "M") -> np.ndarray:
+    """True on the first available date of each period (D/W/M/Q/Y); the first date is always True."""
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) == 0:
+        return np.zeros(0, dtype=bool)
+    per = dates.to_period(freq.upper()).asi8
+    mask = np.empty(len(dates), dtype=bool)
+    mask[0] = True
+    mask[1:] = per[1:] != per[:-1]
+    return mask
+
+def _cap_weights(w: np.ndarray, cap: float, max_iter: int = 100) -> np.ndarray:
+    """
+    Clip every row of `w` at `cap` and hand the excess to the uncapped names pro rata,
+    repeating until nothing exceeds the cap. Rows where cap * n_names < 1 cannot
+    satisfy the cap and fall back to equal weight.
+    """
+    w = w.copy()
+    n = (w > 0).sum(axis=1)
+    infeasible = (n > 0) & (cap * n < 1.0)
+    fixed = np.zeros_like(w, dtype=bool)
+    for _ in range(max_iter):
+        over = (w > cap + 1e-12) & ~infeasible[:, None]
+        if not over.any():
+            break
+        fixed |= over
+        excess = np.where(over, w - cap, 0.0).sum(axis=1)
+        w = np.where(over, cap, w)
+        free = (w > 0) & ~fixed
+        free_sum = np.where(free, w, 0.0).sum(axis=1)
+        scale = np.divide(excess, free_sum, out=np.zeros_like(excess), where=free_sum > 0)
+        w = np.where(free, w * (1.0 + scale[:, None]), w)
+    if infeasible.any():
+        eq = (w[infeasible] > 0) / n[infeasible][:, None]
+        w[infeasible] = eq
+    return w
+
+def compute_weights(prices_at_rebal: np.ndarray, caps_at_rebal: Optional[np.ndarray] = None,
+                    scheme: str = "market_cap", cap: Optional[float] = None,
+                    top_n: Optional[int] = None) -> np.ndarray:
+    """
+    Target weights (K rebalances x N assets). Eligible = priced (and with a positive
+    market cap when caps are given); top_n keeps the largest names by cap.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown weighting scheme {scheme!r}; expected one of {SCHEMES}")
+    if scheme in ("market_cap", "capped") and caps_at_rebal is None:
+        raise ValueError(f"scheme={scheme!r} needs market caps")
+    if scheme == "capped" and cap is None:
+        raise ValueError("scheme='capped' needs cap")
+    eligible = np.isfinite(prices_at_rebal) & (prices_at_rebal > 0)
+    if caps_at_rebal is not None:
+        caps = np.where(np.isfinite(caps_at_rebal), caps_at_rebal, 0.0)
+        eligible &= caps > 0
+    if top_n is not None:
+        if caps_at_rebal is None:
+            raise ValueError("top_n needs market caps to rank the universe")
+        ranked = np.where(eligible, caps, -np.inf)
+        rank = np.argsort(np.argsort(-ranked, axis=1, kind="stable"), axis=1, kind="stable")
+        eligible &= rank < top_n
+
+    if scheme == "equal":
+        raw = eligible.astype(float)
+    else:
+        raw = np.where(eligible, caps, 0.0)
+    tot = raw.sum(axis=1, keepdims=True)
+    w = np.divide(raw, tot, out=np.zeros_like(raw), where=tot > 0)
+    if cap is not None:
+        w = _cap_weights(w, cap)
+    return w
+
+@instrument.timed("index.build")
+def build_index(prices: pd.DataFrame, market_caps: Optional[pd.DataFrame] = None,
+                scheme: str = "market_cap", rebalance: str | np.ndarray = "M",
+                cap: Optional[float] = None, top_n: Optional[int] = None,
+                base_level: float = 1000.0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Weighted index over a dates x assets close matrix.
+
+    Between rebalances the index holds fixed units, so each segment's growth is
+    sum_i w_i * P_t,i / P_r,i. Levels chain across segments through a cumulative
+    product of each segment's end value; the divisor is the constituents' notional
+    (total market cap, or summed prices without caps) over the level at each
+    rebalance, so level = sum(shares * price) / divisor. All steps are whole-array ops.
+
+    Returns (levels[date, index_level, divisor, rebalance], weights[rebalance dates x assets]).
+    """
+    prices = prices.sort_index()
+    dates = pd.DatetimeIndex(prices.index)
+    P = prices.ffill().to_numpy(dtype=float)
+    caps_mat = None
+    if market_caps is not None:
+        caps_mat = market_caps.reindex(index=prices.index, columns=prices.columns).ffill().to_numpy(dtype=float)
+
+    mask = rebalance_mask(dates, rebalance) if isinstance(rebalance, str) else np.asarray(rebalance, dtype=bool).copy()
+    if len(mask) != len(dates):
+        raise ValueError("rebalance mask length must match the number of dates")
+    mask[0] = True
+    reb = np.flatnonzero(mask)
+    seg = np.cumsum(mask) - 1
+
+    P_r = P[reb]
+    caps_r = caps_mat[reb] if caps_mat is not None else None
+    W = compute_weights(P_r, caps_r, scheme=scheme, cap=cap, top_n=top_n)
+    held = W > 0
+    # segments with nothing eligible (e.g. before any listing) carry the level flat
+    empty = ~held.any(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = P / P_r[seg]
+        g = np.where(held[seg], W[seg] * rel, 0.0).sum(axis=1)
+        g[empty[seg]] = 1.0
+        rel_end = P[reb[1:]] / P_r[:-1]
+        g_end = np.where(held[:-1], W[:-1] * rel_end, 0.0).sum(axis=1)
+        g_end[empty[:-1]] = 1.0
+    start_levels = base_level * np.concatenate(([1.0], np.cumprod(g_end)))
+    level = start_levels[seg] * g
+
+    notional = np.where(held, caps_r if caps_r is not None else P_r, 0.0).sum(axis=1)
+    divisor = np.where(empty, np.nan, notional / start_levels)
+
+    levels = pd.DataFrame({
+        "date": dates,
+        "index_level": level,
+        "divisor": divisor[seg],
+        "rebalance": mask,
+    })
+    weights = pd.DataFrame(W, index=dates[reb], columns=prices.columns)
+    return levels, weights
@@ -0,0 +1,109 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.index.base_index import NOTES, checkpoint_path
+from src.utils import instrument
+
+# Bounded-memory base index: closes arrive as (ts_ms int64, close float64) chunks and
+# levels are written out chunk by chunk, so peak RSS depends on the chunk size only.
+
+BATCH_ROWS = 1 << 20
+CLOSE_RECORD = np.dtype([("ts", "<i8"), ("close", "<f8")])
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+
+def iter_parquet_closes(path: str | Path, batch_rows: int = BATCH_ROWS,
+                        ts_col: str = "date", close_col: str = "close") -> Iterator[Chunk]:
+    """Record batches of one parquet file, decoding only the two needed columns."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_rows, columns=[ts_col, close_col]):
+        ts = batch.column(0)
+        if pa.types.is_timestamp(ts.type):
+            ts = ts.cast(pa.timestamp("ms", tz=ts.type.tz), safe=False).cast(pa.int64())
+        yield ts.to_numpy(zero_copy_only=False).astype(np.int64), batch.column(1).to_numpy(zero_copy_only=False).astype(np.float64)
+
+def iter_bar_closes(asset: str, timeframe: str, start=None, end=None) -> Iterator[Chunk]:
+    """Closes from the per-day intraday archive (src.data.bars), one day per chunk."""
+    from src.data.bars import iter_bars
+    for df in iter_bars(asset, timeframe, start, end, columns=["close"]):
+        yield df["ts"].to_numpy(np.int64), df["close"].to_numpy(np.float64)
+
+def write_close_archive(chunks: Iterator[Chunk], path: str | Path) -> int:
+    """Append chunks to a fixed-width binary file of CLOSE_RECORD rows (memory-mappable)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with p.open("wb") as f:
+        for ts, close in chunks:
+            rec = np.empty(len(ts), dtype=CLOSE_RECORD)
+            rec["ts"], rec["close"] = ts, close
+            f.write(rec.tobytes())
+            n += len(rec)
+    return n
+
+def iter_memmap_closes(path: str | Path, batch_rows: int = BATCH_ROWS) -> Iterator[Chunk]:
+    """Slices of a memory-mapped close archive; the OS pages data in and out as needed."""
+    mm = np.memmap(path, dtype=CLOSE_RECORD, mode="r")
+    for i in range(0, len(mm), batch_rows):
+        part = mm[i:i + batch_rows]
+        yield np.array(part["ts"]), np.array(part["close"])
+
+@instrument.timed("index.chunked")
+def build_base_index_chunked(chunks: Iterator[Chunk], out_path: str | Path, base_level: float = 1000.0,
+                             notes: str = NOTES, date_only: bool = True) -> Optional[dict]:
+    """
+    Base-normalized index from a stream of sorted close chunks.
+    .csv output keeps the make_base_index_for_coin columns (date,index_level,divisor,notes);
+    .parquet output stores notes once in the file metadata instead of on every row.
+    Like make_base_index_for_coin, a rebuild invalidates the daily-update checkpoint.
+    Returns {"rows", "divisor", "first", "last"} or None for an empty stream.
+    """
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    parquet = out.suffix == ".parquet"
+    writer = None
+    divisor = None
+    p0 = None
+    last_ts = None
+    rows = 0
+    first = None
+    try:
+        for ts, close in chunks:
+            if len(ts) == 0:
+                continue
+            if np.any(np.diff(ts) < 0) or (last_ts is not None and ts[0] < last_ts):
+                raise ValueError("close chunks must arrive sorted by timestamp")
+            if divisor is None:
+                p0 = float(close[0])
+                divisor = p0 / base_level
+                first = int(ts[0])
+            last_ts = int(ts[-1])
+            dates = ts.astype("datetime64[ms]")
+            chunk = pd.DataFrame({
+                "date": dates.astype("datetime64[D]") if date_only else dates,
+                "index_level": (close / p0) * base_level,
+                "divisor": divisor,
+            })
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema.with_metadata({b"notes": notes.encode("utf-8")})
+                    writer = pq.ParquetWriter(out, schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk["notes"] = notes
+                chunk.to_csv(out, mode="w" if rows == 0 else "a", header=rows == 0, index=False,
+                             date_format="%Y-%m-%d" if date_only else None)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if divisor is None:
+        return None
+    checkpoint_path(out).unlink(missing_ok=True)
+    return {"rows": rows, "divisor": divisor, "first": first, "last": last_ts}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import hashlib, itertools, json, os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from src.index.engine import build_index
+from src.reports.metrics import batch_perf_metrics
+
+# Methodology sweeps: the price (and cap) matrices live once in shared memory; worker
+# processes map them by name at start-up, so a variant task only ships its parameters.
+
+PARAM_KEYS = ("scheme", "rebalance", "cap", "top_n", "base_date")
+
+def variant_key(params: dict) -> str:
+    blob = json.dumps({k: params.get(k) for k in PARAM_KEYS}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+def expand_grid(**axes: Iterable) -> List[dict]:
+    """Cartesian product of parameter axes, e.g. expand_grid(rebalance=["M","Q"], cap=[None, 0.25])."""
+    names = list(axes)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(list(axes[n]) for n in names))]
+
+def _to_shm(arr: np.ndarray) -> tuple[shared_memory.SharedMemory, dict]:
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, {"name": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+
+def _attach(spec: dict) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    # pool workers share the parent's resource tracker, so the parent's unlink() is the
+    # only cleanup; on 3.13+ skip tracking in the worker altogether
+    try:
+        shm = shared_memory.SharedMemory(name=spec["name"], track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=spec["name"])
+    return shm, np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=shm.buf)
+
+_WORKER: Dict[str, object] = {}
+
+def _init_worker(meta: dict) -> None:
+    handles = []
+    for key in ("prices", "caps", "dates"):
+        spec = meta.get(key)
+        if spec is None:
+            _WORKER[key] = None
+            continue
+        shm, arr = _attach(spec)
+        handles.append(shm)
+        _WORKER[key] = arr
+    _WORKER["handles"] = handles
+    _WORKER["columns"] = meta["columns"]
+    _WORKER["ann_factor"] = meta["ann_factor"]
+
+def _run_variant(params: dict) -> dict:
+    dates = pd.DatetimeIndex(_WORKER["dates"].view("datetime64[ns]"))
+    cols = _WORKER["columns"]
+    prices = pd.DataFrame(_WORKER["prices"], index=dates, columns=cols, copy=False)
+    caps = None
+    if _WORKER["caps"] is not None:
+        caps = pd.DataFrame(_WORKER["caps"], index=dates, columns=cols, copy=False)
+    if params.get("base_date"):
+        keep = dates >= pd.Timestamp(params["base_date"])
+        prices = prices.loc[keep]
+        caps = caps.loc[keep] if caps is not None else None
+    levels, _ = build_index(prices, caps, scheme=params.get("scheme", "equal"),
+                            rebalance=params.get("rebalance", "M"), cap=params.get("cap"),
+                            top_n=params.get("top_n"))
+    m = batch_perf_metrics(levels.set_index("date")[["index_level"]], ann_factor=_WORKER["ann_factor"]).iloc[0]
+    out = {"key": variant_key(params), **{k: params.get(k) for k in PARAM_KEYS}}
+    out.update({k: (v.isoformat() if isinstance(v, pd.Timestamp) else v) for k, v in m.items()})
+    out["rows"] = len(levels)
+    return out
+
+def run_sweep(prices: pd.DataFrame, variants: List[dict], results_path: str | Path,
+              market_caps: Optional[pd.DataFrame] = None, workers: Optional[int] = None,
+              ann_factor: float = 365) -> pd.DataFrame:
+    """
+    Evaluate every variant across a process pool and return one metrics row per variant.
+    Each finished row is appended to `results_path` (CSV) straight away; rerunning with
+    the same file skips variants whose key is already there, so an interrupted sweep resumes.
+    """
+    results_path = Path(results_path)
+    done = set()
+    if results_path.exists() and results_path.stat().st_size > 0:
+        # keys are hex strings: unparsed, '0231...' or '12e34...' would come back as numbers
+        done = set(pd.read_csv(results_path, usecols=["key"], dtype={"key": str})["key"])
+    todo = [v for v in variants if variant_key(v) not in done]
+    print(f"[info] sweep: {len(variants)} variants, {len(done)} already done, {len(todo)} to run")
+
+    if todo:
+        prices = prices.sort_index()
+        blocks = []
+        try:
+            shm_p, spec_p = _to_shm(prices.to_numpy(dtype=np.float64))
+            blocks.append(shm_p)
+            shm_d, spec_d = _to_shm(pd.DatetimeIndex(prices.index).as_unit("ns").asi8)
+            blocks.append(shm_d)
+            spec_c = None
+            if market_caps is not None:
+                caps = market_caps.reindex(index=prices.index, columns=prices.columns)
+                shm_c, spec_c = _to_shm(caps.to_numpy(dtype=np.float64))
+                blocks.append(shm_c)
+            meta = {"prices": spec_p, "caps": spec_c, "dates": spec_d,
+                    "columns": list(prices.columns), "ann_factor": ann_factor}
+            results_path.parent.mkdir(parents=True, exist_ok=True)
+            header = not (results_path.exists() and results_path.stat().st_size > 0)
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                     initializer=_init_worker, initargs=(meta,)) as pool:
+                futs = {pool.submit(_run_variant, v): v for v in todo}
+                for i, fut in enumerate(as_completed(futs), 1):
+                    try:
+                        row = fut.result()
+                    except Exception as e:
+                        print(f"[warn] variant {futs[fut]} failed: {e}")
+                        continue
+                    pd.DataFrame([row]).to_csv(results_path, mode="a", header=header, index=False)
+                    header = False
+                    if i % 50 == 0 or i == len(todo):
+                        print(f"[info] sweep: {i}/{len(todo)}")
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    res = pd.read_csv(results_path, dtype={"key": str}) if results_path.exists() else pd.DataFrame()
+    if res.empty:
+        return res
+    keys = {variant_key(v) for v in variants}
+    return res[res["key"].isin(keys)].drop_duplicates("key", keep="last").reset_index(drop=True)
@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 import pandas as pd
-from src.paths import DATA_PROC
+from src.paths import DATA_PROC, ensure_dirs
 
 BASE = 1000.0
 
@@ -15,6 +15,7 @@ def main():
     out = prices[["date","index_level","divisor","notes"]].copy()
     out["date"] = out["date"].dt.date
     out_path = DATA_PROC / "btc_price_index.csv"
+    ensure_dirs(DATA_PROC)
     out.to_csv(out_path, index=False)
     print(f"Wrote {out_path} rows={len(out)}")
 
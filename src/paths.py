@@ -5,5 +5,8 @@ ROOT = pathlib.Path(__file__).resolve().parent.parent
 DATA_RAW = ROOT / "data" / "data_raw"
 DATA_PROC = ROOT / "data" / "data_proc"
 REPORTS = ROOT / "reports"
-for p in (DATA_RAW, DATA_PROC, REPORTS):
-    p.mkdir(parents=True, exist_ok=True)
+
+def ensure_dirs(*paths: pathlib.Path) -> None:
+    """Create output directories on demand (default: all of the above); importing this module never touches disk."""
+    for p in paths or (DATA_RAW, DATA_PROC, REPORTS):
+        p.mkdir(parents=True, exist_ok=True)
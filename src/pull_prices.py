@@ -1,16 +1,38 @@
-﻿from __future__ import annotations
+from __future__ import annotations
+import argparse
+import pandas as pd
 from src.coingecko import get_market_chart_daily
-from src.paths import DATA_PROC
+from src.paths import DATA_PROC, ensure_dirs
 
-def main():
-    df, source = get_market_chart_daily(coin_id="bitcoin", vs="usd", days=365*10)
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pull BTC daily prices into data/data_proc.")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Fetch only the days after the last stored date and append them.")
+    ap.add_argument("--hedge", type=float, default=None, metavar="SECONDS",
+                    help="Fire the next source when the current one has not answered within SECONDS.")
+    args = ap.parse_args(argv)
+
+    ensure_dirs(DATA_PROC)
+    out_path = DATA_PROC / "btc_usd_daily.csv"
+    existing = None
+    since_ms = None
+    if args.incremental and out_path.exists():
+        existing = pd.read_csv(out_path, parse_dates=["date"])
+        if not existing.empty:
+            # re-request the last stored day; it may have been written intraday
+            since_ms = int(existing["date"].max().value // 1_000_000)
+
+    df, source = get_market_chart_daily(coin_id="bitcoin", vs="usd", days=365*10, since_ms=since_ms,
+                                        hedge_after=args.hedge)
     out = df[["date","price","market_cap","total_volume"]].copy()
     out["source"] = source
-    DATA_PROC.mkdir(parents=True, exist_ok=True)
-    out_path = DATA_PROC / "btc_usd_daily.csv"
+    if existing is not None and since_ms is not None:
+        out["date"] = pd.to_datetime(out["date"])
+        out = pd.concat([existing, out], ignore_index=True)
+        out = out.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+        out["date"] = out["date"].dt.date
     out.to_csv(out_path, index=False)
     print(f"Wrote {out_path} rows={len(out)} source={source}")
 
 if __name__ == "__main__":
     main()
-    
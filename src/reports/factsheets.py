@@ -0,0 +1,230 @@
+from __future__ import annotations
+import hashlib, json, os, re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from src.paths import ROOT
+from src.reports.metrics import batch_perf_metrics
+from src.utils import instrument
+from src.utils.cache import write_json_cache
+
+# Factsheets for a family of index CSVs: docs/FACTSHEET_TEMPLATE.md (string.Template) is
+# filled per index by worker processes, each also drawing a level/drawdown PNG with the
+# non-interactive Agg backend. A manifest in the output directory records a content hash
+# of every input (index CSV, weights CSV, template, render options), so unchanged indexes
+# cost one file hash and no rendering.
+
+TEMPLATE = ROOT / "docs" / "FACTSHEET_TEMPLATE.md"
+MANIFEST = ".factsheets.json"
+RENDER_VERSION = 1  # bump when the rendering code changes output for unchanged inputs
+_MULTI = re.compile(r"multi_(?P<scheme>[a-z]+)_(?P<rebalance>[a-z])_base(?P<base>\d+)$")
+_CADENCE = {"d": "Daily", "w": "Weekly", "m": "Monthly", "q": "Quarterly", "y": "Yearly"}
+
+def is_index_csv(path: Path) -> bool:
+    """Index level CSVs (date,index_level,...), not the weights/rolling side files next to them."""
+    with path.open("r", encoding="utf-8-sig") as f:
+        header = f.readline().strip().split(",")
+    return header[:2] == ["date", "index_level"]
+
+def _weights_path(csv: Path) -> Path:
+    return csv.with_name(csv.stem + "_weights.csv")
+
+def content_key(csv: Path, template: Path, options: dict) -> str:
+    h = hashlib.sha256(json.dumps({"v": RENDER_VERSION, **options}, sort_keys=True).encode("utf-8"))
+    for p in (csv, _weights_path(csv), template):
+        if p.exists():
+            h.update(p.name.encode("utf-8"))
+            h.update(p.read_bytes())
+    return h.hexdigest()
+
+def _describe(name: str, levels: pd.DataFrame, csv: Path) -> Dict[str, str]:
+    notes = str(levels["notes"].dropna().iloc[0]) if "notes" in levels and levels["notes"].notna().any() else ""
+    w = _weights_path(csv)
+    universe = "single asset"
+    if w.exists():
+        cols = pd.read_csv(w, nrows=0).columns[1:]
+        universe = ", ".join(cols) if len(cols) else universe
+    m = _MULTI.match(name)
+    provider = re.search(r"provider=([^;]+)", notes)
+    return {
+        "title": name,
+        "method": notes or (f"{m['scheme']}-weighted, base {m['base']}" if m else "base-normalized index level"),
+        "universe": universe,
+        "source": provider.group(1).strip() if provider else "price store closes",
+        "rebalance": _CADENCE.get(m["rebalance"], m["rebalance"]) if m else "N/A",
+    }
+
+def render_risk(r: dict) -> str:
+    """Markdown risk section for a src.reports.risk.risk_summary result."""
+    pct = lambda x: f"{x:.2%}"
+    band = lambda t: f"{pct(t[1])} ({pct(t[0])} to {pct(t[2])})"
+    lines = [
+        "",
+        f"## Risk ({r['n_paths']:,} resampled paths, {r['horizon']}-day horizon, seed {r['seed']})",
+        f"- **1-day VaR / CVaR ({1 - r['alpha']:.0%}, historical):** {pct(r['VaR_1d'])} / {pct(r['CVaR_1d'])}",
+        "",
+        f"| Method | CAGR median ({r['ci']:.0%} CI) | Ann. Vol median ({r['ci']:.0%} CI) | Max DD median ({r['ci']:.0%} CI) "
+        f"| {r['horizon']}d VaR {1 - r['alpha']:.0%} | {r['horizon']}d CVaR {1 - r['alpha']:.0%} |",
+        "|---|---|---|---|---|---|",
+    ]
+    names = {"bootstrap": f"Block bootstrap ({r['block']}d blocks)", "montecarlo": "Monte Carlo (normal log-returns)"}
+    for k, label in names.items():
+        s = r[k]
+        lines.append(f"| {label} | {band(s['ci']['CAGR'])} | {band(s['ci']['AnnVol'])} | {band(s['ci']['MaxDD'])} "
+                     f"| {pct(s['VaR'])} | {pct(s['CVaR'])} |")
+    lines += ["", "| Max DD quantile | " + " | ".join(f"p{int(q * 100)}" for q in r["bootstrap"]["MaxDD_q"]) + " | P(Max DD ≤ -50%) |",
+              "|---|" + "---|" * (len(r["bootstrap"]["MaxDD_q"]) + 1)]
+    for k, label in names.items():
+        s = r[k]
+        lines.append(f"| {label} | " + " | ".join(pct(v) for v in s["MaxDD_q"].values())
+                     + f" | {pct(s['P_MaxDD_below_50'])} |")
+    return "\n".join(lines) + "\n"
+
+def render_factsheet(m: dict, risk: Optional[dict] = None) -> str:
+    """The BTC baseline factsheet (make_factsheet_md, daily_update) from point metrics."""
+    md = f"""# BTC Close-only Baseline (Base=1000)
+- **CAGR:** {m['CAGR']:.2%}
+- **Annualized Vol:** {m['AnnVol']:.2%}
+- **Max Drawdown:** {m['MaxDD']:.2%}
+
+**Data:** Free sources (CoinGecko ≤365d, Yahoo regional, CCXT OHLCV).  
+**Method:** Normalize first close to 1000; record divisor.  
+**Notes:** Day-2 scaffolding factsheet for later projects.
+"""
+    return md + render_risk(risk) if risk else md
+
+_FIGURE = None  # one Agg figure per process, cleared between charts
+
+def _figure():
+    global _FIGURE
+    if _FIGURE is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(8, 4.5))
+        axes = fig.subplots(2, 1, sharex=True, height_ratios=(3, 1))
+        fig.subplots_adjust(left=0.1, right=0.97, top=0.93, bottom=0.08, hspace=0.08)  # fixed: tight_layout doubles the cost
+        _FIGURE = (fig, axes)
+    return _FIGURE
+
+def _chart(dates: pd.DatetimeIndex, lv: np.ndarray, out: Path, title: str) -> None:
+    from matplotlib.dates import DateFormatter, MonthLocator, YearLocator
+    from matplotlib.ticker import FuncFormatter, LogLocator
+    fig, (ax1, ax2) = _figure()
+    ax1.cla()
+    ax2.cla()
+    dd = lv / np.fmax.accumulate(lv) - 1.0
+    ax1.plot(dates, lv, lw=1.0)
+    ax1.set_yscale("log")
+    ax1.minorticks_off()
+    ax1.yaxis.set_major_locator(LogLocator(subs=(1.0, 2.0, 5.0)))
+    ax1.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"{y:,.0f}"))
+    ax1.set_title(title)
+    ax1.set_ylabel("level")
+    ax2.fill_between(dates, dd, 0.0, color="tab:red", alpha=0.4, lw=0)
+    ax2.set_ylabel("drawdown")
+    # the rrule-based AutoDateLocator dominates drawing time; year/month ticks are closed-form
+    long = len(dates) and (dates[-1] - dates[0]).days > 2 * 365
+    ax2.xaxis.set_major_locator(YearLocator() if long else MonthLocator(interval=3))
+    ax2.xaxis.set_major_formatter(DateFormatter("%Y" if long else "%Y-%m"))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out, dpi=100, metadata={"Software": None})
+
+def render_one(csv: str | Path, out_dir: str | Path, template: str | Path = TEMPLATE,
+               risk_paths: int = 0, seed: int = 7) -> Path:
+    """Factsheet (and chart) for one index CSV; returns the Markdown path."""
+    csv, out_dir = Path(csv), Path(out_dir)
+    name = csv.stem
+    with instrument.span("report.read"):
+        df = pd.read_csv(csv, parse_dates=["date"]).sort_values("date").reset_index(drop=True)
+    if len(df) < 2:
+        raise ValueError(f"{csv}: need at least two levels")
+    lv = df["index_level"].to_numpy(dtype=float)
+    m = batch_perf_metrics(df.set_index("date")[["index_level"]]).iloc[0]
+    risk = ""
+    if risk_paths:
+        from src.reports.risk import risk_summary
+        risk = render_risk(risk_summary(lv, n_paths=risk_paths, seed=seed))
+    with instrument.span("report.chart"):
+        _chart(pd.DatetimeIndex(df["date"]), lv, out_dir / "charts" / f"{name}.png", name)
+    pct = lambda x: f"{x:.2%}"
+    day = lambda d: "n/a" if pd.isna(d) else pd.Timestamp(d).date().isoformat()
+    values = {
+        **_describe(name, df, csv),
+        "start": day(df["date"].iloc[0]), "end": day(df["date"].iloc[-1]), "rows": len(df),
+        "last_level": f"{lv[-1]:,.2f}",
+        "cagr": pct(m["CAGR"]), "ann_vol": pct(m["AnnVol"]), "max_dd": pct(m["MaxDD"]),
+        "peak_date": day(m["PeakDate"]), "trough_date": day(m["TroughDate"]),
+        "sharpe": f"{m['Sharpe']:.2f}", "sortino": f"{m['Sortino']:.2f}", "calmar": f"{m['Calmar']:.2f}",
+        "chart": f"charts/{name}.png", "risk": risk,
+    }
+    md = Template(Path(template).read_text(encoding="utf-8-sig")).substitute(values)
+    out = out_dir / f"factsheet_{name}.md"
+    out.write_text(md, encoding="utf-8")
+    return out
+
+def _render_job(args: tuple) -> Path:
+    return render_one(*args)
+
+def load_manifest(out_dir: Path) -> Dict[str, str]:
+    p = out_dir / MANIFEST
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+def generate(csvs: Iterable[str | Path], out_dir: str | Path = "docs/factsheets", template: str | Path = TEMPLATE,
+             workers: Optional[int] = None, risk_paths: int = 0, seed: int = 7,
+             force: bool = False) -> Dict[str, object]:
+    """
+    Render a factsheet per index CSV in parallel; indexes whose content hash matches the
+    manifest (and whose outputs exist) are skipped.
+    Returns {name: 'rendered' | 'skipped' | exception}.
+    """
+    out_dir, template = Path(out_dir), Path(template)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    options = {"risk_paths": risk_paths, "seed": seed if risk_paths else None}
+    status: Dict[str, object] = {}
+    todo: List[tuple] = []
+    with instrument.span("report.hash"):
+        for csv in map(Path, csvs):
+            key = content_key(csv, template, options)
+            outputs = (out_dir / f"factsheet_{csv.stem}.md", out_dir / "charts" / f"{csv.stem}.png")
+            if not force and manifest.get(csv.stem) == key and all(p.exists() for p in outputs):
+                status[csv.stem] = "skipped"
+            else:
+                todo.append((csv, key))
+    instrument.incr("report.skipped", len(status))
+
+    def done(csv: Path, key: str, exc: Optional[BaseException]) -> None:
+        if exc is None:
+            manifest[csv.stem] = key
+            status[csv.stem] = "rendered"
+            instrument.incr("report.rendered")
+        else:
+            manifest.pop(csv.stem, None)
+            status[csv.stem] = exc
+            print(f"[warn] {csv.stem} failed: {exc}")
+
+    jobs = {csv: (csv, out_dir, template, risk_paths, seed) for csv, _ in todo}
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    try:
+        if workers <= 1:
+            for csv, key in todo:
+                try:
+                    _render_job(jobs[csv])
+                    done(csv, key, None)
+                except Exception as e:
+                    done(csv, key, e)
+        elif todo:
+            keys = dict(todo)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futs = {pool.submit(_render_job, jobs[csv]): csv for csv in keys}
+                for fut in as_completed(futs):
+                    csv = futs[fut]
+                    done(csv, keys[csv], fut.exception())
+    finally:
+        write_json_cache(out_dir / MANIFEST, manifest)
+    return status
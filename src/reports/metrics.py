@@ -1,17 +1,111 @@
 from __future__ import annotations
+from typing import Union
 import pandas as pd
 import numpy as np
 
-def perf_metrics_from_index(csv_path: str) -> dict:
-    df = pd.read_csv(csv_path, parse_dates=["date"]).sort_values("date")
-    lv = df["index_level"].values.astype(float)
+from src.data import price_store
+from src.data.parse import DAY_MS, timeframe_ms
+from src.utils import instrument
+
+ANN_FACTOR = 365
+METRIC_COLUMNS = ["CAGR","AnnVol","MaxDD","Sharpe","Sortino","Calmar",
+                  "MaxDDDuration","PeakDate","TroughDate","RecoveryDate"]
+
+def periods_per_year(timeframe: str = "1d") -> float:
+    """Annualization factor for a bar size on a 24/7 calendar: '1d' -> 365, '1h' -> 8760."""
+    return ANN_FACTOR * DAY_MS / timeframe_ms(timeframe)
+
+@instrument.timed("metrics.batch")
+def batch_perf_metrics(levels: Union[pd.DataFrame, np.ndarray], ann_factor: float = ANN_FACTOR,
+                       rf: float = 0.0) -> pd.DataFrame:
+    """
+    Metrics for many index series in one vectorized pass.
+    levels: dates x series (DataFrame with a DatetimeIndex, or a 2-D array). Series
+    may start late (leading NaN); gaps are forward-filled.
+    rf: annual risk-free rate for Sharpe/Sortino.
+    ann_factor: bars per year; periods_per_year(timeframe) for intraday series.
+    Returns one row per series with METRIC_COLUMNS. MaxDDDuration is the longest
+    stretch (in bars) below a prior peak; Peak/Trough/RecoveryDate describe the
+    max-drawdown episode (RecoveryDate NaT/-1 while still under water).
+    """
+    if isinstance(levels, pd.DataFrame):
+        names = list(levels.columns)
+        dates = pd.DatetimeIndex(levels.index) if isinstance(levels.index, pd.DatetimeIndex) else None
+        L = levels.ffill().to_numpy(dtype=float)
+    else:
+        L = np.asarray(levels, dtype=float)
+        if L.ndim == 1:
+            L = L[:, None]
+        L = pd.DataFrame(L).ffill().to_numpy()
+        names = list(range(L.shape[1]))
+        dates = None
+    T, S = L.shape
+    cols = np.arange(S)
+    pos = np.arange(T)[:, None]
+
+    valid = ~np.isnan(L)
+    has = valid.any(axis=0)
+    first = np.where(has, valid.argmax(axis=0), 0)
+    first_lv = L[first, cols]
+    last_lv = L[-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = L[1:] / L[:-1] - 1.0
+        n = (~np.isnan(rets)).sum(axis=0)
+        nz = np.where(n > 0, n, np.nan)
+        cagr = (last_lv / first_lv) ** (ann_factor / nz) - 1.0
+        cnt = np.where(n > 1, n, np.nan)
+        mean = np.nansum(rets, axis=0) / nz
+        var = np.nansum((rets - mean) ** 2, axis=0) / (cnt - 1.0)
+        vol = np.sqrt(var * ann_factor)
+        excess = mean * ann_factor - rf
+        downside = np.minimum(rets - rf / ann_factor, 0.0)
+        down_dev = np.sqrt(np.nansum(downside ** 2, axis=0) / nz * ann_factor)
+        sharpe = excess / vol
+        sortino = excess / down_dev
+
+        running_max = np.fmax.accumulate(L, axis=0)
+        dd = L / running_max - 1.0
+        maxdd = np.where(has, np.nanmin(np.where(valid, dd, np.inf), axis=0), np.nan)
+        calmar = cagr / np.abs(maxdd)
+
+    at_peak = valid & (L >= running_max)
+    last_peak = np.maximum.accumulate(np.where(at_peak, pos, -1), axis=0)
+    under = np.where(valid & (last_peak >= 0), pos - last_peak, 0)
+    duration = under.max(axis=0) if T else np.zeros(S, dtype=int)
+
+    trough = np.where(has, np.argmin(np.where(valid, dd, np.inf), axis=0), 0)
+    peak = last_peak[trough, cols]
+    recovered = (pos > trough) & (L >= running_max[trough, cols])
+    rec_any = recovered.any(axis=0)
+    recovery = np.where(rec_any, recovered.argmax(axis=0), -1)
+
+    def _at(idx: np.ndarray, ok: np.ndarray):
+        if dates is None:
+            return np.where(ok, idx, -1)
+        return pd.DatetimeIndex(np.where(ok, dates.values[np.clip(idx, 0, max(T - 1, 0))], np.datetime64("NaT")))
+
+    out = pd.DataFrame({
+        "CAGR": cagr, "AnnVol": vol, "MaxDD": maxdd,
+        "Sharpe": sharpe, "Sortino": sortino, "Calmar": calmar,
+        "MaxDDDuration": duration,
+        "PeakDate": _at(peak, has), "TroughDate": _at(trough, has), "RecoveryDate": _at(recovery, has & rec_any),
+    }, index=pd.Index(names, name="series"))
+    return out[METRIC_COLUMNS]
+
+def _metrics_from_levels(lv: np.ndarray) -> dict:
     if len(lv) < 2:
         return {"CAGR":0.0, "AnnVol":0.0, "MaxDD":0.0}
-    rets = np.diff(lv) / lv[:-1]
-    ann_factor = 365
-    cagr = (lv[-1] / lv[0]) ** (ann_factor/len(rets)) - 1
-    vol = np.std(rets, ddof=1) * np.sqrt(ann_factor)
-    running_max = np.maximum.accumulate(lv)
-    dd = (lv / running_max) - 1.0
-    maxdd = float(dd.min())
-    return {"CAGR":float(cagr), "AnnVol":float(vol), "MaxDD":maxdd}
+    row = batch_perf_metrics(lv[:, None]).iloc[0]
+    return {"CAGR":float(row["CAGR"]), "AnnVol":float(row["AnnVol"]), "MaxDD":float(row["MaxDD"])}
+
+def perf_metrics_from_index(csv_path: str) -> dict:
+    df = pd.read_csv(csv_path, usecols=["date","index_level"], parse_dates=["date"]).sort_values("date")
+    return _metrics_from_levels(df["index_level"].values.astype(float))
+
+def perf_metrics_from_store(index_name: str, start=None, end=None,
+                            root=price_store.STORE_ROOT) -> dict:
+    """Same metrics, reading only date/index_level for [start, end] from the 'indexes' table."""
+    df = price_store.read(index_name, start=start, end=end, columns=["date","index_level"],
+                          table="indexes", root=root)
+    return _metrics_from_levels(df["index_level"].to_numpy(dtype=float))
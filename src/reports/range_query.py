@@ -0,0 +1,158 @@
+from __future__ import annotations
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+
+# Arbitrary date-range questions over one index series without rescanning it.
+# Built once per series, O(n log n):
+#   - log levels (cumulative log-returns): range return in O(1);
+#   - sparse tables of max/min log level: range high/low in O(1);
+#   - segment tree of (max, min, worst drop) in log space: range max drawdown in O(log n).
+# Dates are resolved with binary search on the sorted date index, O(log n).
+
+def _sparse(x: np.ndarray, op) -> list:
+    """table[k][i] = op over x[i : i + 2**k]."""
+    table = [x]
+    k = 1
+    while (1 << k) <= len(x):
+        prev, half = table[-1], 1 << (k - 1)
+        table.append(op(prev[:-half], prev[half:]))
+        k += 1
+    return table
+
+def _ns(d) -> int:
+    ts = pd.Timestamp(d)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return ts.value
+
+class RangeIndex:
+    """
+    Range queries on a level series (DatetimeIndex -> level). Bounds are inclusive and
+    snap inward to the nearest observed dates; None means the series start/end.
+    ret/log_ret/high/low are O(log n) for the date lookup and O(1) after it;
+    max_drawdown is O(log n).
+    """
+    def __init__(self, levels: pd.Series):
+        s = levels.astype(float).dropna().sort_index()
+        s = s[~s.index.duplicated(keep="last")]
+        if s.empty:
+            raise ValueError("empty level series")
+        if (s <= 0).any():
+            raise ValueError("levels must be positive")
+        self.dates = pd.DatetimeIndex(s.index)
+        self._ns = self.dates.as_unit("ns").asi8
+        self.levels = s.to_numpy()
+        self.log_levels = np.log(self.levels)
+        self._max = _sparse(self.log_levels, np.maximum)
+        self._min = _sparse(self.log_levels, np.minimum)
+        self._build_tree()
+
+    @classmethod
+    def from_csv(cls, path: str | Path, date_col: str = "date", level_col: str = "index_level") -> "RangeIndex":
+        df = pd.read_csv(path, usecols=[date_col, level_col], parse_dates=[date_col])
+        return cls(df.set_index(date_col)[level_col])
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    # ---- segment tree: per node (max, min, worst log drop of a later point vs an earlier peak) ----
+    def _build_tree(self) -> None:
+        n = len(self.log_levels)
+        size = 1 << max(0, (n - 1).bit_length())
+        mx = np.full(2 * size, -np.inf)
+        mn = np.full(2 * size, np.inf)
+        dd = np.zeros(2 * size)
+        mx[size:size + n] = self.log_levels
+        mn[size:size + n] = self.log_levels
+        h = size
+        while h > 1:
+            lo, hi = h // 2, h
+            left, right = np.arange(2 * lo, 2 * hi, 2), np.arange(2 * lo + 1, 2 * hi, 2)
+            mx[lo:hi] = np.maximum(mx[left], mx[right])
+            mn[lo:hi] = np.minimum(mn[left], mn[right])
+            with np.errstate(invalid="ignore"):
+                cross = mn[right] - mx[left]  # +inf for padding on the right
+            dd[lo:hi] = np.minimum(np.minimum(dd[left], dd[right]), cross)
+            h = lo
+        self._size, self._tmax, self._tmin, self._tdd = size, mx, mn, dd
+
+    @staticmethod
+    def _merge(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
+        """a then b (a covers the earlier dates)."""
+        return max(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2], b[1] - a[0])
+
+    def _tree_query(self, i: int, j: int) -> Tuple[float, float, float]:
+        empty = (-np.inf, np.inf, 0.0)
+        left, right = empty, empty
+        lo, hi = i + self._size, j + self._size + 1
+        mx, mn, dd = self._tmax, self._tmin, self._tdd
+        while lo < hi:
+            if lo & 1:
+                left = self._merge(left, (mx[lo], mn[lo], dd[lo]))
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = self._merge((mx[hi], mn[hi], dd[hi]), right)
+            lo //= 2
+            hi //= 2
+        return self._merge(left, right)
+
+    # ---- date lookup ----
+    def span(self, start=None, end=None) -> Tuple[int, int]:
+        """Positions (i, j) of the first date >= start and the last date <= end."""
+        i = 0 if start is None else int(np.searchsorted(self._ns, _ns(start), side="left"))
+        j = len(self._ns) - 1 if end is None else int(np.searchsorted(self._ns, _ns(end), side="right")) - 1
+        if i > j:
+            raise ValueError(f"no observations between {start} and {end}")
+        return i, j
+
+    @staticmethod
+    def _sparse_query(table: list, op, i: int, j: int) -> float:
+        k = (j - i + 1).bit_length() - 1
+        return float(op(table[k][i], table[k][j - (1 << k) + 1]))
+
+    # ---- queries ----
+    def log_ret(self, start=None, end=None) -> float:
+        i, j = self.span(start, end)
+        return float(self.log_levels[j] - self.log_levels[i])
+
+    def ret(self, start=None, end=None) -> float:
+        """Simple return from the first to the last observed level in the range."""
+        return float(np.expm1(self.log_ret(start, end)))
+
+    def high(self, start=None, end=None) -> float:
+        return float(np.exp(self._sparse_query(self._max, np.maximum, *self.span(start, end))))
+
+    def low(self, start=None, end=None) -> float:
+        return float(np.exp(self._sparse_query(self._min, np.minimum, *self.span(start, end))))
+
+    def max_drawdown(self, start=None, end=None) -> float:
+        """Worst peak-to-trough decline with both points inside the range (<= 0)."""
+        return float(np.expm1(self._tree_query(*self.span(start, end))[2]))
+
+    def summary(self, start=None, end=None) -> Dict[str, object]:
+        i, j = self.span(start, end)
+        hi, lo, dd = self._tree_query(i, j)
+        return {"start": self.dates[i], "end": self.dates[j], "bars": j - i + 1,
+                "return": float(np.expm1(self.log_levels[j] - self.log_levels[i])),
+                "high": float(np.exp(hi)), "low": float(np.exp(lo)),
+                "max_drawdown": float(np.expm1(dd))}
+
+_INDEXES: Dict[str, Tuple[float, RangeIndex]] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def range_index(path: str | Path, **kwargs) -> RangeIndex:
+    """Process-wide RangeIndex per index CSV, rebuilt only when the file's mtime changes."""
+    p = Path(path).resolve()
+    mtime = p.stat().st_mtime
+    with _REGISTRY_LOCK:
+        hit = _INDEXES.get(str(p))
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+    idx = RangeIndex.from_csv(p, **kwargs)
+    with _REGISTRY_LOCK:
+        _INDEXES[str(p)] = (mtime, idx)
+    return idx
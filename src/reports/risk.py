@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Dict
+import numpy as np
+
+from src.reports.metrics import ANN_FACTOR
+from src.utils import instrument
+
+# Resampled risk for an index: paths are drawn as (chunk, horizon) return matrices and
+# reduced to per-path statistics straight away, so memory is bounded by `chunk` paths
+# no matter how many are requested.
+
+N_PATHS = 20_000
+CHUNK = 2_000
+HORIZON = 365
+BLOCK = 20
+METHODS = ("bootstrap", "montecarlo")
+
+def daily_returns(levels) -> np.ndarray:
+    lv = np.asarray(levels, dtype=float)
+    lv = lv[~np.isnan(lv)]
+    return lv[1:] / lv[:-1] - 1.0
+
+def block_bootstrap(rets: np.ndarray, n_paths: int, horizon: int, block: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """(n_paths, horizon) returns glued from circular blocks of consecutive history."""
+    n = len(rets)
+    block = max(1, min(block, n))
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, n, size=(n_paths, n_blocks, 1))
+    idx = (starts + np.arange(block)) % n
+    return rets[idx.reshape(n_paths, -1)[:, :horizon]]
+
+def monte_carlo(rets: np.ndarray, n_paths: int, horizon: int, rng: np.random.Generator) -> np.ndarray:
+    """(n_paths, horizon) i.i.d. normal log returns with the history's mean/stdev."""
+    lr = np.log1p(rets)
+    return np.expm1(rng.normal(lr.mean(), lr.std(ddof=1), size=(n_paths, horizon)))
+
+def path_stats(R: np.ndarray, ann_factor: float = ANN_FACTOR) -> Dict[str, np.ndarray]:
+    """Horizon return, annualized return/vol and max drawdown of every row of R."""
+    growth = np.cumprod(1.0 + R, axis=1)
+    peak = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    total = growth[:, -1]
+    return {
+        "TotalReturn": total - 1.0,
+        "CAGR": total ** (ann_factor / R.shape[1]) - 1.0,
+        "AnnVol": R.std(axis=1, ddof=1) * np.sqrt(ann_factor),
+        "MaxDD": np.minimum((growth / peak).min(axis=1) - 1.0, 0.0),
+    }
+
+def simulate(rets: np.ndarray, method: str = "bootstrap", n_paths: int = N_PATHS, horizon: int = HORIZON,
+             block: int = BLOCK, seed: int = 7, chunk: int = CHUNK,
+             ann_factor: float = ANN_FACTOR) -> Dict[str, np.ndarray]:
+    """
+    Per-path statistics for n_paths resampled paths, generated `chunk` paths at a time.
+    Each chunk draws from its own child of SeedSequence(seed), so a (seed, chunk) pair
+    always reproduces the same numbers.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if len(rets) < 2:
+        raise ValueError("need at least two returns to resample")
+    n_chunks = -(-n_paths // chunk)
+    parts = []
+    for i, ss in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        rng = np.random.default_rng(ss)
+        m = min(chunk, n_paths - i * chunk)
+        R = block_bootstrap(rets, m, horizon, block, rng) if method == "bootstrap" else monte_carlo(rets, m, horizon, rng)
+        parts.append(path_stats(R, ann_factor))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+def var_cvar(x: np.ndarray, alpha: float = 0.05) -> tuple[float, float]:
+    """Loss-side VaR/CVaR at level alpha, returned as (negative) returns."""
+    q = float(np.quantile(x, alpha))
+    return q, float(x[x <= q].mean())
+
+@instrument.timed("metrics.risk")
+def risk_summary(levels, n_paths: int = N_PATHS, horizon: int = HORIZON, block: int = BLOCK,
+                 seed: int = 7, alpha: float = 0.05, ci: float = 0.90, chunk: int = CHUNK,
+                 ann_factor: float = ANN_FACTOR) -> dict:
+    """
+    Historical 1-day VaR/CVaR plus, per method, {metric: (lo, median, hi)} confidence
+    bands, horizon VaR/CVaR and max-drawdown quantiles over `horizon` days.
+    """
+    rets = daily_returns(levels)
+    lo, hi = (1.0 - ci) / 2.0, 1.0 - (1.0 - ci) / 2.0
+    var1, cvar1 = var_cvar(rets, alpha)
+    out = {"n_paths": n_paths, "horizon": horizon, "block": block, "seed": seed,
+           "alpha": alpha, "ci": ci, "VaR_1d": var1, "CVaR_1d": cvar1}
+    for method in METHODS:
+        s = simulate(rets, method, n_paths, horizon, block, seed, chunk, ann_factor)
+        var_h, cvar_h = var_cvar(s["TotalReturn"], alpha)
+        out[method] = {
+            "ci": {k: tuple(float(v) for v in np.quantile(s[k], [lo, 0.5, hi])) for k in ("CAGR", "AnnVol", "MaxDD")},
+            "VaR": var_h, "CVaR": cvar_h,
+            "MaxDD_q": {q: float(np.quantile(s["MaxDD"], q)) for q in (0.05, 0.25, 0.5, 0.75, 0.95)},
+            "P_MaxDD_below_50": float((s["MaxDD"] <= -0.5).mean()),
+        }
+    return out
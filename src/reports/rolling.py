@@ -0,0 +1,149 @@
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Iterable, Optional
+import math
+import numpy as np
+import pandas as pd
+
+from src.reports.metrics import ANN_FACTOR
+from src.utils import instrument
+
+WINDOWS = (30, 90, 365)
+
+def _window_sum(cs: np.ndarray, w: int) -> np.ndarray:
+    """Sum of the last w values at every step from a prefix sum (NaN until w values exist)."""
+    out = np.full(len(cs), np.nan)
+    if len(cs) >= w:
+        out[w - 1] = cs[w - 1]
+        out[w:] = cs[w:] - cs[:-w]
+    return out
+
+@instrument.timed("metrics.rolling")
+def rolling_metrics(levels: pd.Series, windows: Iterable[int] = WINDOWS,
+                    ann_factor: float = ANN_FACTOR) -> pd.DataFrame:
+    """
+    ret_<w>, vol_<w>, dd_<w> for each window over one index series, O(n) per window.
+    ret: level vs w bars ago. vol: annualized stdev of the last w returns, from prefix
+    sums of mean-centred returns (centring keeps the sum-of-squares numerically sane).
+    dd: level vs the max of the last w levels; pandas' rolling max is a monotonic-deque pass.
+    """
+    lv = levels.astype(float)
+    L = lv.to_numpy()
+    r = np.empty(len(L))
+    r[0] = np.nan
+    r[1:] = L[1:] / L[:-1] - 1.0
+    mu = np.nanmean(r[1:]) if len(r) > 1 else 0.0
+    c = np.nan_to_num(r - mu)
+    cs1, cs2 = np.cumsum(c), np.cumsum(c * c)
+    out = {}
+    for w in windows:
+        ret = np.full(len(L), np.nan)
+        ret[w:] = L[w:] / L[:-w] - 1.0
+        # returns start at bar 1, so the first full window ends at bar w
+        s1 = np.concatenate(([np.nan], _window_sum(cs1[1:], w)))
+        s2 = np.concatenate(([np.nan], _window_sum(cs2[1:], w)))
+        var = np.maximum(s2 - s1 * s1 / w, 0.0) / (w - 1)
+        peak = lv.rolling(w, min_periods=w).max().to_numpy()
+        out[f"ret_{w}"] = ret
+        out[f"vol_{w}"] = np.sqrt(var * ann_factor)
+        out[f"dd_{w}"] = L / peak - 1.0
+    return pd.DataFrame(out, index=levels.index)
+
+def rolling_corr(a: pd.Series, b: pd.Series, window: int = 90,
+                 min_periods: Optional[int] = None) -> pd.Series:
+    """
+    Rolling correlation of daily returns of two aligned level series via prefix sums.
+    Only bars where both returns are finite count: they are zeroed out of the sums and a
+    prefix count of valid pairs gives each window's n, so a gap in either series does not
+    poison later windows. Windows with fewer than min_periods pairs (default: window) are NaN,
+    as in pd.Series.rolling(window, min_periods).corr.
+    """
+    x = a.astype(float).pct_change(fill_method=None).to_numpy()[1:]
+    y = b.astype(float).reindex(a.index).pct_change(fill_method=None).to_numpy()[1:]
+    ok = np.isfinite(x) & np.isfinite(y)
+    if ok.any():
+        x, y = x - x[ok].mean(), y - y[ok].mean()
+    x, y = np.where(ok, x, 0.0), np.where(ok, y, 0.0)
+    w = window
+    n = _window_sum(np.cumsum(ok), w)
+    sx, sy = _window_sum(np.cumsum(x), w), _window_sum(np.cumsum(y), w)
+    sxx, syy = _window_sum(np.cumsum(x * x), w), _window_sum(np.cumsum(y * y), w)
+    sxy = _window_sum(np.cumsum(x * y), w)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        corr = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    corr[~(n >= max(min_periods or w, 2))] = np.nan
+    return pd.Series(np.concatenate(([np.nan], corr)), index=a.index, name=f"corr_{w}")
+
+class RollingWindow:
+    """
+    Streaming ret/vol/dd over the last `window` bars; update() is O(1) amortized.
+    Return moments use Welford add/remove updates; the window max is a monotonic
+    deque of (bar, level). State round-trips through to_dict()/from_dict() so it
+    can live in a checkpoint.
+    """
+    def __init__(self, window: int, ann_factor: float = ANN_FACTOR):
+        self.window = window
+        self.ann_factor = ann_factor
+        self.n_bars = 0
+        self.levels: deque = deque(maxlen=window + 1)
+        self.rets: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.maxq: deque = deque()
+
+    def _add(self, x: float) -> None:
+        self.rets.append(x)
+        n = len(self.rets)
+        d = x - self.mean
+        self.mean += d / n
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self) -> None:
+        y = self.rets.popleft()
+        n = len(self.rets)
+        if n == 0:
+            self.mean, self.m2 = 0.0, 0.0
+            return
+        old = self.mean
+        self.mean = (old * (n + 1) - y) / n
+        self.m2 = max(self.m2 - (y - old) * (y - self.mean), 0.0)
+
+    def update(self, level: float) -> Dict[str, Optional[float]]:
+        level = float(level)
+        i = self.n_bars
+        if self.levels:
+            self._add(level / self.levels[-1] - 1.0)
+            if len(self.rets) > self.window:
+                self._remove()
+        self.levels.append(level)
+        while self.maxq and self.maxq[-1][1] <= level:
+            self.maxq.pop()
+        self.maxq.append((i, level))
+        while self.maxq[0][0] <= i - self.window:
+            self.maxq.popleft()
+        self.n_bars += 1
+        return self.value()
+
+    def value(self) -> Dict[str, Optional[float]]:
+        w = self.window
+        full = self.n_bars > w
+        ret = self.levels[-1] / self.levels[0] - 1.0 if full else None
+        vol = math.sqrt(self.m2 / (w - 1) * self.ann_factor) if len(self.rets) == w else None
+        dd = self.levels[-1] / self.maxq[0][1] - 1.0 if self.n_bars >= w else None
+        return {f"ret_{w}": ret, f"vol_{w}": vol, f"dd_{w}": dd}
+
+    def to_dict(self) -> dict:
+        return {"window": self.window, "ann_factor": self.ann_factor, "n_bars": self.n_bars,
+                "levels": list(self.levels), "rets": list(self.rets), "mean": self.mean,
+                "m2": self.m2, "maxq": [list(x) for x in self.maxq]}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RollingWindow":
+        rw = cls(d["window"], d["ann_factor"])
+        rw.n_bars = d["n_bars"]
+        rw.levels.extend(d["levels"])
+        rw.rets.extend(d["rets"])
+        rw.mean, rw.m2 = d["mean"], d["m2"]
+        rw.maxq.extend(tuple(x) for x in d["maxq"])
+        return rw
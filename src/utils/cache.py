@@ -1,22 +1,260 @@
 from __future__ import annotations
-import json, time
+import json, os, threading, time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+
+from src.utils import instrument
+
+MEM_ENTRIES = 64                    # parsed frames kept per process and directory
+DISK_MAX_BYTES = 512 * 1024 * 1024  # per cache directory
+LOCK_POLL = 0.05
+LOCK_STALE_SECONDS = 300.0          # a lockfile this old belongs to a dead worker
+
+def _load_json(p: Path) -> Dict[str, Any]:
+    with instrument.span("cache.read"), p.open("r", encoding="utf-8") as f:
+        return json.load(f)
 
 def read_json_cache(path: str | Path) -> Dict[str, Any] | None:
     p = Path(path)
     if not p.exists():
+        instrument.incr("cache.miss")
         return None
-    with p.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    instrument.incr("cache.hit")
+    return _load_json(p)
 
 def write_json_cache(path: str | Path, payload: Dict[str, Any]) -> None:
     p = Path(path); p.parent.mkdir(parents=True, exist_ok=True)
     tmp = p.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(payload, f)
-    tmp.replace(p)
+    with instrument.span("cache.write"):
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        tmp.replace(p)
 
 def is_fresh(metadata: Dict[str, Any], ttl_seconds: int) -> bool:
     ts = metadata.get("_fetched_at", 0)
-    return (time.time() - ts) < ttl_seconds
+    fresh = (time.time() - ts) < ttl_seconds
+    if not fresh:
+        instrument.incr("cache.stale")
+    return fresh
+
+class TwoTierCache:
+    """
+    Parsed-DataFrame LRU in front of a directory of JSON payloads.
+    - memory: the last MEM_ENTRIES frames by name, so a process never re-parses a payload;
+    - disk: one JSON file per name; mtime is the fetch time (TTL), atime the last use.
+      Past max_bytes the least recently used files go first; files older than
+      max_age_seconds are dropped regardless;
+    - a miss holds a per-name thread lock plus a <name>.lock file, so concurrent threads
+      or processes missing the same name fetch it once and the rest read the result;
+    - `covering` names (e.g. a cached 3650-day window for a 30-day request) are served
+      when fresh instead of fetching; the caller trims the frame to its range.
+    Frames are returned as copies.
+    """
+    def __init__(self, directory: str | Path, max_bytes: int = DISK_MAX_BYTES,
+                 max_entries: int = MEM_ENTRIES, max_age_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._mem: "OrderedDict[str, Tuple[pd.DataFrame, float]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    # ---- memory tier ----
+    def _mem_get(self, name: str, ttl_seconds: Optional[float]) -> Optional[pd.DataFrame]:
+        with self._mem_lock:
+            hit = self._mem.get(name)
+            if hit is None:
+                return None
+            frame, fetched_at = hit
+            if ttl_seconds is not None and time.time() - fetched_at >= ttl_seconds:
+                del self._mem[name]
+                return None
+            self._mem.move_to_end(name)
+            return frame
+
+    def _mem_put(self, name: str, frame: pd.DataFrame, fetched_at: float) -> None:
+        with self._mem_lock:
+            self._mem[name] = (frame, fetched_at)
+            self._mem.move_to_end(name)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def clear_memory(self) -> None:
+        with self._mem_lock:
+            self._mem.clear()
+
+    # ---- disk tier ----
+    def path(self, name: str) -> Path:
+        return self.directory / name
+
+    def names(self, pattern: str = "*.json") -> List[str]:
+        on_disk = {p.name for p in self.directory.glob(pattern)} if self.directory.is_dir() else set()
+        with self._mem_lock:
+            in_mem = {n for n in self._mem if Path(n).match(pattern)}
+        return sorted(on_disk | in_mem)
+
+    def _fresh_on_disk(self, name: str, ttl_seconds: Optional[float]) -> Optional[float]:
+        """mtime of a usable file, else None."""
+        try:
+            mtime = self.path(name).stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if ttl_seconds is not None and time.time() - mtime >= ttl_seconds:
+            return None
+        return mtime
+
+    def _touch(self, p: Path) -> None:
+        try:
+            st = p.stat()
+            os.utime(p, (time.time(), st.st_mtime))   # bump atime only; mtime stays the fetch time
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Apply max_age_seconds and max_bytes to the directory; returns files removed."""
+        if not self.directory.is_dir():
+            return 0
+        now = time.time()
+        files = []
+        for p in self.directory.glob("*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_atime, st.st_mtime, st.st_size, p))
+        removed = []
+        keep = []
+        for f in files:
+            if self.max_age_seconds is not None and now - f[1] > self.max_age_seconds:
+                removed.append(f[3])
+            else:
+                keep.append(f)
+        total = sum(f[2] for f in keep)
+        for atime, _, size, p in sorted(keep, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            removed.append(p)
+            total -= size
+        for p in removed:
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            with self._mem_lock:
+                self._mem.pop(p.name, None)
+        if removed:
+            instrument.incr("cache.evicted", len(removed))
+        return len(removed)
+
+    # ---- stampede protection ----
+    def _lockfile(self, name: str):
+        lock_path = self.path(name + ".lock")
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return lock_path
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                        lock_path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                with instrument.span("cache.lock_wait"):
+                    time.sleep(LOCK_POLL)
+
+    def _key_lock(self, name: str) -> threading.Lock:
+        with self._mem_lock:
+            return self._key_locks.setdefault(name, threading.Lock())
+
+    # ---- lookup ----
+    def _from_memory_or_disk(self, candidates: List[str], ttls: List[Optional[float]],
+                             parse: Callable[[Dict[str, Any]], pd.DataFrame]) -> Optional[pd.DataFrame]:
+        for i, (n, ttl) in enumerate(zip(candidates, ttls)):
+            frame = self._mem_get(n, ttl)
+            if frame is not None:
+                instrument.incr("cache.mem_hit")
+                if i:
+                    instrument.incr("cache.range_hit")
+                return frame
+        for i, (n, ttl) in enumerate(zip(candidates, ttls)):
+            mtime = self._fresh_on_disk(n, ttl)
+            if mtime is None:
+                continue
+            p = self.path(n)
+            try:
+                payload = _load_json(p)
+            except (FileNotFoundError, ValueError):
+                continue  # evicted or half-written by a foreign writer; try the next
+            instrument.incr("cache.hit")
+            if i:
+                instrument.incr("cache.range_hit")
+            self._touch(p)
+            with instrument.span("cache.parse"):
+                frame = parse(payload)
+            self._mem_put(n, frame, mtime)
+            return frame
+        return None
+
+    def get_frame(self, name: str, fetch: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+                  parse: Callable[[Dict[str, Any]], pd.DataFrame], ttl_seconds: Optional[float] = None,
+                  covering: Iterable[str] = (), covering_ttl_seconds: Optional[float] = None) -> pd.DataFrame:
+        """
+        Frame for `name`: memory, then disk, then fetch(stale_payload_or_None).
+        ttl_seconds=None never expires by age (size/age eviction still applies).
+        covering_ttl_seconds: freshness required of covering entries (default ttl_seconds).
+        """
+        candidates = [name] + [c for c in covering if c != name]
+        cover_ttl = ttl_seconds if covering_ttl_seconds is None else covering_ttl_seconds
+        ttls = [ttl_seconds] + [cover_ttl] * (len(candidates) - 1)
+        frame = self._from_memory_or_disk(candidates, ttls, parse)
+        if frame is not None:
+            return frame.copy()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._key_lock(name):
+            lock_path = self._lockfile(name)
+            try:
+                # another worker may have filled it while we waited
+                frame = self._from_memory_or_disk(candidates, ttls, parse)
+                if frame is not None:
+                    return frame.copy()
+                p = self.path(name)
+                stale = None
+                if p.exists():
+                    instrument.incr("cache.hit")
+                    instrument.incr("cache.stale")
+                    try:
+                        stale = _load_json(p)
+                    except ValueError:
+                        stale = None
+                else:
+                    instrument.incr("cache.miss")
+                payload = fetch(stale)
+                write_json_cache(p, payload)
+                with instrument.span("cache.parse"):
+                    frame = parse(payload)
+                self._mem_put(name, frame, time.time())
+            finally:
+                try:
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+        self.evict()
+        return frame.copy()
+
+_CACHES: Dict[str, TwoTierCache] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def frame_cache(directory: str | Path, **kwargs) -> TwoTierCache:
+    """Process-wide cache per directory; kwargs only apply the first time a directory is seen."""
+    key = str(Path(directory).resolve())
+    with _REGISTRY_LOCK:
+        c = _CACHES.get(key)
+        if c is None:
+            c = TwoTierCache(directory, **kwargs)
+            _CACHES[key] = c
+        return c
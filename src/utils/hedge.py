@@ -0,0 +1,85 @@
+from __future__ import annotations
+import asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from src.utils import instrument
+from src.utils.http import cancel_scope
+
+# Hedged fetches across provider fallbacks. The adapters are blocking (requests, ccxt,
+# yfinance), so run_blocking() makes them awaitable on a shared thread pool; hedged()
+# starts the primary, fires the next provider whenever the latest one has not answered
+# within `budget` seconds (or has failed), returns the first valid result and cancels
+# the rest. A cancelled adapter's thread stops at its next HTTP attempt or retry sleep
+# (src.utils.http.cancel_scope); clients without that hook finish in the background and
+# their result is dropped.
+
+HEDGE_WORKERS = 32
+_POOL = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+
+Attempt = Tuple[str, Callable[[], Awaitable[Any]]]
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Async adapter for a blocking provider call; cancelling the await cancels its HTTP retries."""
+    cancel = threading.Event()
+    def call():
+        with cancel_scope(cancel):
+            return fn(*args, **kwargs)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_POOL, call)
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+async def hedged(attempts: Sequence[Attempt], budget: float,
+                 valid: Optional[Callable[[Any], bool]] = None) -> Tuple[str, Any]:
+    """
+    attempts: [(name, zero-arg coroutine function)] in preference order.
+    Returns (name, result) of the first attempt to finish with a result `valid` accepts;
+    raises RuntimeError listing every failure when none does.
+    """
+    queue = iter(attempts)
+    pending: dict = {}
+    errors: List[str] = []
+
+    def launch() -> bool:
+        nxt = next(queue, None)
+        if nxt is None:
+            return False
+        name, factory = nxt
+        pending[asyncio.ensure_future(factory())] = name
+        instrument.incr("hedge.launched")
+        return True
+
+    launch()
+    timeout: Optional[float] = budget
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                instrument.incr("hedge.fired")
+                if not launch():
+                    timeout = None  # nothing left to hedge with; wait for whoever answers
+                continue
+            for task in done:
+                name = pending.pop(task)
+                exc = task.exception()
+                if exc is None and (valid is None or valid(task.result())):
+                    instrument.incr(f"hedge.won.{name}")
+                    return name, task.result()
+                errors.append(f"{name}: {exc if exc is not None else 'invalid result'}")
+                print(f"[warn] {errors[-1]}")
+                launch()  # a failure hands over immediately instead of waiting out the budget
+        raise RuntimeError("All providers failed: " + "; ".join(errors))
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            instrument.incr("hedge.cancelled", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+def hedge(attempts: Sequence[Attempt], budget: float,
+          valid: Optional[Callable[[Any], bool]] = None) -> Tuple[str, Any]:
+    """Blocking entry point for hedged(); safe to call from worker threads (one event loop each)."""
+    with instrument.span("hedge"):
+        return asyncio.run(hedged(attempts, budget, valid))
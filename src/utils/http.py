@@ -1,15 +1,156 @@
 from __future__ import annotations
-import time, requests
-from typing import Dict, Any, Tuple
+import threading, time, requests
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
+from requests.adapters import HTTPAdapter
 
-def get_with_backoff(url: str, params: Dict[str, Any], max_retries: int = 5) -> Tuple[int, Any]:
-    delay = 1.0
-    for _ in range(max_retries):
-        r = requests.get(url, params=params, timeout=30)
+from src.utils import instrument
+from src.utils.ratelimit import TokenBucket
+
+DEFAULT_HEADERS = {
+    "accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "crypto-index-bootcamp/1.0",
+}
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = 120.0
+
+_local = threading.local()
+
+class Cancelled(RuntimeError):
+    """The hedged fetch this request belonged to was answered by another provider."""
+
+@contextmanager
+def cancel_scope(event: threading.Event):
+    """Requests made by this thread inside the block stop (before the next attempt or mid retry-sleep) once `event` is set."""
+    prev = getattr(_local, "cancel", None)
+    _local.cancel = event
+    try:
+        yield
+    finally:
+        _local.cancel = prev
+
+def _check_cancel() -> None:
+    ev = getattr(_local, "cancel", None)
+    if ev is not None and ev.is_set():
+        raise Cancelled("request cancelled")
+
+def _sleep(seconds: float) -> None:
+    ev = getattr(_local, "cancel", None)
+    if ev is None:
+        time.sleep(seconds)
+    elif ev.wait(seconds):
+        raise Cancelled("request cancelled")
+
+def session() -> requests.Session:
+    """
+    Keep-alive session for the calling thread. Connections are pooled per host,
+    so paging through klines/market_chart reuses one TCP+TLS connection.
+    requests.Session is not thread-safe, hence one per worker thread.
+    """
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        s.headers.update(DEFAULT_HEADERS)
+        _local.session = s
+    return s
+
+@dataclass
+class HttpResult:
+    status: int
+    payload: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+def _retry_after(r: requests.Response, default: float) -> float:
+    """Seconds to wait per the Retry-After header (delta-seconds or HTTP-date)."""
+    value = r.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        wait = float(value)
+    except ValueError:
+        try:
+            wait = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(wait, 0.0), MAX_RETRY_AFTER)
+
+def _body(r: requests.Response) -> Any:
+    try:
+        return r.json()
+    except ValueError:
+        return r.text
+
+def request_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                 validators: Optional[Dict[str, Any]] = None, max_retries: int = 5,
+                 limiter: Optional[TokenBucket] = None, backoff: float = 1.0,
+                 max_backoff: float = 8.0) -> HttpResult:
+    """
+    GET through the pooled session with retries.
+    validators: a previous response's {"_etag", "_last_modified"}; sent as
+    If-None-Match / If-Modified-Since, a 304 comes back with payload=None.
+    429/5xx wait for Retry-After when the server sends one, else exponential backoff;
+    connection errors and a 200 whose body is not JSON (truncated, a proxy's HTML page)
+    back off the same way. Once retries run out the last error is raised, or the last
+    response returned.
+    """
+    hdrs = dict(headers or {})
+    if validators:
+        if validators.get("_etag"):
+            hdrs["If-None-Match"] = validators["_etag"]
+        if validators.get("_last_modified"):
+            hdrs["If-Modified-Since"] = validators["_last_modified"]
+    delay, wait = backoff, 0.0
+    last_exc: Optional[Exception] = None
+    r: Optional[requests.Response] = None
+    for attempt in range(max_retries):
+        if attempt:
+            instrument.incr("http.retries")
+            with instrument.span("http.retry_sleep"):
+                _sleep(wait)
+        _check_cancel()
+        if limiter is not None:
+            limiter.acquire()
+        instrument.incr("http.requests")
+        try:
+            with instrument.span("http.request"):
+                r = session().get(url, params=params, headers=hdrs, timeout=30)
+        except requests.RequestException as e:
+            last_exc, wait = e, delay
+            instrument.incr("http.errors")
+            delay = min(delay * 2, max_backoff)
+            continue
+        last_exc = None
+        instrument.incr("http.bytes", len(r.content))
+        instrument.incr(f"http.{r.status_code}")
+        if r.status_code == 304:
+            return HttpResult(304, None, r.headers.get("ETag"), r.headers.get("Last-Modified"))
         if r.status_code == 200:
-            return (200, r.json())
-        if r.status_code in (429, 500, 502, 503, 504):
-            time.sleep(delay); delay = min(delay * 2, 8)
+            try:
+                return HttpResult(200, r.json(), r.headers.get("ETag"), r.headers.get("Last-Modified"))
+            except ValueError as e:
+                last_exc, wait = e, delay
+                instrument.incr("http.bad_json")
+                delay = min(delay * 2, max_backoff)
+                continue
+        if r.status_code in RETRY_STATUS:
+            wait = _retry_after(r, delay)
+            delay = min(delay * 2, max_backoff)
             continue
-        return (r.status_code, r.text)
-    return (429, {"error": "rate_limited"})
+        return HttpResult(r.status_code, _body(r))
+    if last_exc is not None:
+        raise last_exc
+    if r is None:
+        raise ValueError("max_retries must be >= 1")
+    return HttpResult(r.status_code, _body(r))
+
+def get_with_backoff(url: str, params: Dict[str, Any], max_retries: int = 5,
+                     limiter: Optional[TokenBucket] = None) -> Tuple[int, Any]:
+    res = request_json(url, params, max_retries=max_retries, limiter=limiter)
+    return (res.status, res.payload)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import cProfile, io, json, pstats, threading, time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Process-wide run instrumentation: named spans (count/total/max seconds per stage) and
+# counters, aggregated in place so a long run costs O(#stages) memory. Everything is
+# thread-safe; worker *processes* (e.g. the sweep pool) keep their own, unreported copy.
+#
+# Stage names are dotted: http.request, http.retry_sleep, ratelimit.wait, cache.read,
+# parse.*, merge.*, write.*, index.*, metrics.*. Counters: http.requests, http.retries,
+# http.429, http.bytes, cache.hit (disk), cache.mem_hit, cache.range_hit, cache.miss,
+# cache.stale, cache.evicted, ...
+
+_LOCK = threading.Lock()
+_local = threading.local()
+_SPANS: Dict[str, list] = {}
+_COUNTERS: Dict[str, float] = defaultdict(int)
+_PROFILE_STAGES: tuple = ()
+_PROFILES: Dict[str, pstats.Stats] = {}
+_STARTED = time.time()
+
+def reset() -> None:
+    global _STARTED, _PROFILE_STAGES
+    with _LOCK:
+        _SPANS.clear()
+        _COUNTERS.clear()
+        _PROFILES.clear()
+        _PROFILE_STAGES = ()
+        _STARTED = time.time()
+
+def incr(name: str, n: float = 1) -> None:
+    with _LOCK:
+        _COUNTERS[name] += n
+
+def record(name: str, seconds: float) -> None:
+    with _LOCK:
+        s = _SPANS.get(name)
+        if s is None:
+            _SPANS[name] = [1, seconds, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+
+def enable_profile(stages: Iterable[str]) -> None:
+    """cProfile spans whose name starts with any of `stages` ('*' = every outermost span)."""
+    global _PROFILE_STAGES
+    _PROFILE_STAGES = tuple(s.strip() for s in stages if s.strip())
+
+def _wants_profile(name: str) -> bool:
+    if not _PROFILE_STAGES or getattr(_local, "profiling", False):
+        return False  # one profiler per thread; nested spans are covered by the outer one
+    return any(p == "*" or name.startswith(p) for p in _PROFILE_STAGES)
+
+@contextmanager
+def span(name: str):
+    prof = None
+    if _wants_profile(name):
+        prof = cProfile.Profile()
+        _local.profiling = True
+        prof.enable()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+        if prof is not None:
+            prof.disable()
+            _local.profiling = False
+            with _LOCK:
+                if name in _PROFILES:
+                    _PROFILES[name].add(prof)
+                else:
+                    _PROFILES[name] = pstats.Stats(prof)
+
+def timed(name: str) -> Callable:
+    """Decorator form of span()."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def _profile_text(stats: pstats.Stats, top: int = 25) -> str:
+    buf = io.StringIO()
+    stats.stream = buf
+    stats.sort_stats("cumulative").print_stats(top)
+    return buf.getvalue()
+
+def report() -> Dict[str, Any]:
+    with _LOCK:
+        spans = {k: {"count": v[0], "total_s": v[1], "mean_s": v[1] / v[0], "max_s": v[2]}
+                 for k, v in sorted(_SPANS.items())}
+        counters = dict(sorted(_COUNTERS.items()))
+        profiles = {k: _profile_text(v) for k, v in _PROFILES.items()}
+    hit, mem_hit, miss, stale = (counters.get(f"cache.{k}", 0) for k in ("hit", "mem_hit", "miss", "stale"))
+    hit += mem_hit
+    lookups = hit + miss
+    derived = {
+        # stale entries were found but had to be refetched/revalidated
+        "cache_hit_rate": (hit - stale) / lookups if lookups else None,
+        "http_retry_rate": counters.get("http.retries", 0) / counters["http.requests"] if counters.get("http.requests") else None,
+    }
+    return {"started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(_STARTED)),
+            "wall_s": time.time() - _STARTED, "spans": spans, "counters": counters,
+            "derived": derived, "profiles": profiles}
+
+def write_report(path: str | Path, extra: Optional[dict] = None) -> dict:
+    """JSON run report at `path`; each profiled stage also gets <stem>.<stage>.prof for snakeviz/pstats."""
+    rep = report()
+    if extra:
+        rep.update(extra)
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with _LOCK:
+        for name, stats in _PROFILES.items():
+            stats.dump_stats(str(p.with_name(f"{p.stem}.{name}.prof")))
+    p.write_text(json.dumps(rep, indent=2, default=str), encoding="utf-8")
+    print(f"[info] Wrote run report {p}")
+    return rep
+
+def add_arguments(ap) -> None:
+    """--report / --profile for CLI entry points."""
+    ap.add_argument("--report", default=None, help="Write a JSON run report (stage timings, counters) here.")
+    ap.add_argument("--profile", default=None,
+                    help="Comma list of stage prefixes to cProfile, e.g. 'parse,index' or '*' (needs --report).")
+
+def from_args(args) -> None:
+    reset()
+    if getattr(args, "profile", None):
+        enable_profile(args.profile.split(","))
+
+def finish(args, extra: Optional[dict] = None) -> None:
+    if getattr(args, "report", None):
+        write_report(args.report, extra)
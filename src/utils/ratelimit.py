@@ -0,0 +1,57 @@
+from __future__ import annotations
+import threading, time
+from typing import Dict, Tuple
+
+from src.utils import instrument
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests/second sustained, bursts up to `capacity`.
+    acquire() reserves a token under the lock and sleeps outside it, so waiting
+    workers queue up in arrival order instead of spinning.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            with instrument.span("ratelimit.wait"):
+                time.sleep(wait)
+        return wait
+
+# (requests/second, burst) per provider, sized for the free tiers
+_BUDGETS: Dict[str, Tuple[float, float]] = {
+    "coingecko": (0.5, 3),   # ~30 calls/min public API
+    "coincap":   (2.0, 5),
+    "binance":   (10.0, 20),
+    "yahoo":     (1.0, 2),
+}
+
+_LIMITERS: Dict[str, TokenBucket] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def limiter(name: str, rate: float | None = None, capacity: float | None = None) -> TokenBucket:
+    """
+    Process-wide limiter shared by every worker talking to `name`.
+    rate/capacity only apply the first time a name is seen (e.g. a CCXT
+    exchange's own rateLimit); known providers fall back to _BUDGETS.
+    """
+    with _REGISTRY_LOCK:
+        lim = _LIMITERS.get(name)
+        if lim is None:
+            default_rate, default_cap = _BUDGETS.get(name, (1.0, 1.0))
+            lim = TokenBucket(rate or default_rate, capacity or default_cap)
+            _LIMITERS[name] = lim
+        return lim
@@ -1,8 +1,16 @@
-﻿from src.coingecko import get_market_chart_daily
+import shutil
+from pathlib import Path
 
-def test_pull_btc_minimal():
+import src.coingecko as cg
+from src.coingecko import get_market_chart_daily
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "coingecko_bitcoin_usd_30.json"
+
+def test_pull_btc_minimal(tmp_path, monkeypatch):
+    # recorded payload as a fresh cache entry: the test stays offline under the normal TTL
+    shutil.copy(FIXTURE, tmp_path / cg._cache_name("bitcoin", "usd", 30))
+    monkeypatch.setattr(cg, "CACHE_DIR", tmp_path)
     df, source = get_market_chart_daily(days=30)
     assert len(df) >= 25
     assert {"date","price","market_cap","total_volume"} <= set(df.columns)
     assert source in {"coingecko", "coincap", "binance"}
-
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.data.bars import DAY_MS, append_bars, iter_bars, last_ts, resample_bars
+
+H = 3_600_000
+T0 = pd.Timestamp("2024-01-01", tz="UTC").value // 1_000_000
+
+def _hourly(n, start=T0):
+    ts = start + np.arange(n) * H
+    close = 100.0 + np.arange(n)
+    return np.column_stack([ts, close - 0.5, close + 2.0, close - 1.0, close, np.full(n, 10.0)])
+
+def test_append_replaces_resent_bars_and_tracks_last_ts(tmp_path):
+    assert last_ts("btc", "1h", root=tmp_path) is None
+    append_bars(_hourly(30), "btc", "1h", root=tmp_path)
+    fix = _hourly(30)[[5, 29]]
+    fix[:, 4] = [1.0, 2.0]
+    append_bars(fix, "btc", "1h", root=tmp_path)
+    append_bars(_hourly(30)[:3], "btc", "1h", root=tmp_path)  # plain replay
+    df = pd.concat(iter_bars("btc", "1h", root=tmp_path), ignore_index=True)
+    assert len(df) == 30 and df["ts"].is_monotonic_increasing and df["ts"].is_unique
+    assert df["close"].iloc[5] == 1.0 and df["close"].iloc[29] == 2.0 and df["close"].iloc[6] == 106.0
+    assert sorted(p.name for p in (tmp_path / "1h" / "btc").iterdir()) == ["2024-01-01.parquet", "2024-01-02.parquet"]
+    assert last_ts("btc", "1h", root=tmp_path) == T0 + 29 * H
+
+def test_iter_bars_bounds(tmp_path):
+    append_bars(_hourly(72), "btc", "1h", root=tmp_path)
+    rows = lambda **kw: np.concatenate([d["ts"].to_numpy() for d in iter_bars("btc", "1h", root=tmp_path, **kw)])
+    day2 = rows(start="2024-01-02", end="2024-01-02")
+    assert len(day2) == 24 and day2[0] == T0 + DAY_MS and day2[-1] == T0 + DAY_MS + 23 * H
+    assert len(rows(end="2024-01-01")) == 24
+    # timestamps are inclusive to the millisecond
+    assert rows(end="2024-01-02 00:00")[-1] == T0 + DAY_MS
+    assert len(rows(start="2024-01-01 22:00", end=pd.Timestamp("2024-01-02 01:00", tz="UTC"))) == 4
+
+def test_resample_bars_ohlcv(tmp_path):
+    append_bars(_hourly(48), "btc", "1h", root=tmp_path)
+    daily = resample_bars("btc", "1h", "1d", end="2024-01-02", root=tmp_path)
+    assert list(daily["date"]) == list(pd.to_datetime(["2024-01-01", "2024-01-02"]))
+    first = daily.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"], first["volume"]) == (99.5, 125.0, 99.0, 123.0, 240.0)
+    assert daily["close"].iloc[1] == 147.0
+    four = resample_bars("btc", "1h", "4h", start="2024-01-01", end="2024-01-01", root=tmp_path)
+    assert len(four) == 6
+    assert four["open"].iloc[1] == 103.5 and four["close"].iloc[1] == 107.0 and four["high"].iloc[1] == 109.0
+    weekly = resample_bars("btc", "1h", "1w", root=tmp_path)
+    assert len(weekly) == 1 and weekly["volume"].iloc[0] == 480.0 and weekly["close"].iloc[0] == 147.0
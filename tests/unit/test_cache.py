@@ -0,0 +1,121 @@
+from __future__ import annotations
+import os, threading, time
+import pandas as pd
+
+from src.utils.cache import TwoTierCache
+
+def _parse_counter():
+    calls = []
+    def parse(payload):
+        calls.append(1)
+        return pd.DataFrame({"v": payload["v"]})
+    return parse, calls
+
+def test_memory_then_disk_then_fetch(tmp_path):
+    parse, parsed = _parse_counter()
+    fetched = []
+    fetch = lambda stale: fetched.append(stale) or {"v": [1, 2, 3]}
+    c = TwoTierCache(tmp_path)
+    assert c.get_frame("a.json", fetch, parse, ttl_seconds=60)["v"].tolist() == [1, 2, 3]
+    c.get_frame("a.json", fetch, parse, ttl_seconds=60)
+    assert len(fetched) == 1 and len(parsed) == 1          # second call: memory, no re-parse
+
+    fresh_process = TwoTierCache(tmp_path)
+    fresh_process.get_frame("a.json", fetch, parse, ttl_seconds=60)
+    assert len(fetched) == 1 and len(parsed) == 2          # disk hit
+
+    old = time.time() - 120
+    os.utime(tmp_path / "a.json", (old, old))
+    TwoTierCache(tmp_path).get_frame("a.json", fetch, parse, ttl_seconds=60)
+    assert fetched[-1] == {"v": [1, 2, 3]}                  # stale payload handed over for revalidation
+
+def test_covering_entry_answers_shorter_request(tmp_path):
+    parse, _ = _parse_counter()
+    c = TwoTierCache(tmp_path)
+    c.get_frame("w_365.json", lambda s: {"v": list(range(365))}, parse, ttl_seconds=60)
+    df = c.get_frame("w_30.json", lambda s: {"v": []}, parse, ttl_seconds=60, covering=["w_365.json"])
+    assert len(df) == 365                                   # caller trims to its window
+    assert not (tmp_path / "w_30.json").exists()
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    parse, _ = _parse_counter()
+    c = TwoTierCache(tmp_path, max_bytes=1)
+    c.get_frame("a.json", lambda s: {"v": [1]}, parse)
+    c.get_frame("b.json", lambda s: {"v": [2]}, parse)
+    assert [p.name for p in tmp_path.glob("*.json")] == []  # both over a 1-byte cap
+    c = TwoTierCache(tmp_path, max_bytes=25)   # room for two 10-byte payloads
+    c.get_frame("a.json", lambda s: {"v": [1]}, parse)
+    os.utime(tmp_path / "a.json", (time.time() - 60, time.time()))
+    c.get_frame("b.json", lambda s: {"v": [2]}, parse)
+    c.get_frame("c.json", lambda s: {"v": [3]}, parse)
+    assert not (tmp_path / "a.json").exists() and (tmp_path / "c.json").exists()
+
+def test_concurrent_misses_fetch_once(tmp_path):
+    parse, _ = _parse_counter()
+    fetched = []
+    def fetch(stale):
+        fetched.append(1)
+        time.sleep(0.1)
+        return {"v": [7]}
+    caches = [TwoTierCache(tmp_path) for _ in range(2)]     # two "processes" sharing the directory
+    out = []
+    threads = [threading.Thread(target=lambda i=i: out.append(caches[i % 2].get_frame("k.json", fetch, parse)))
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fetched) == 1 and len(out) == 8
+    assert not (tmp_path / "k.json.lock").exists()
+
+def test_free_tier_max_fallback_does_not_cover_longer_windows(tmp_path, monkeypatch):
+    from benchmarks.synthetic import market_chart_payload
+    import src.data.coingecko as cgd
+    from src.utils.http import HttpResult
+    calls = []
+    def fake_request(url, params, validators=None, limiter=None):
+        calls.append(params["days"])
+        if params["days"] == "max":
+            return HttpResult(401, {"error": {"status": {"error_code": 10012}}})
+        return HttpResult(200, market_chart_payload(int(params["days"]) + 1))
+    monkeypatch.setattr(cgd, "request_json", fake_request)
+    assert len(cgd.fetch_daily_close_coin("bitcoin", days="max", cache_dir=tmp_path)) == 366
+    assert len(cgd.fetch_daily_close_coin("bitcoin", days="200", cache_dir=tmp_path)) == 201  # covered
+    assert calls == ["max", "365"]
+    assert len(cgd.fetch_daily_close_coin("bitcoin", days="1000", cache_dir=tmp_path)) == 1001
+    assert calls == ["max", "365", "1000"]
+
+def test_legacy_coingecko_revalidates_stale_entries(tmp_path, monkeypatch):
+    from benchmarks.synthetic import market_chart_payload
+    import src.coingecko as cg
+    from src.utils.http import HttpResult
+    sent = []
+    def fake_request(url, params, headers=None, validators=None, **kwargs):
+        sent.append(validators and {k: validators.get(k) for k in ("_etag", "_last_modified")})
+        if validators and validators.get("_etag") == '"v1"':
+            return HttpResult(304, None, '"v1"')
+        return HttpResult(200, market_chart_payload(31), '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT")
+    monkeypatch.setattr(cg, "request_json", fake_request)
+    monkeypatch.setattr(cg, "CACHE_DIR", tmp_path)
+    first = cg._coingecko_daily("bitcoin", "usd", 30)
+    again = cg._coingecko_daily("bitcoin", "usd", 30, ttl_seconds=0)  # stale: conditional request
+    assert sent == [None, {"_etag": '"v1"', "_last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}]
+    pd.testing.assert_frame_equal(again, first)
+
+def test_tail_pulls_are_not_answered_from_longer_windows(tmp_path, monkeypatch):
+    from benchmarks.synthetic import market_chart_payload
+    import src.data.coingecko as cgd
+    from src.utils.http import HttpResult
+    day = 24 * 3600 * 1000
+    today = int(time.time() * 1000) // day * day
+    calls = []
+    def fake_request(url, params, validators=None, limiter=None):
+        calls.append(params["days"])
+        n = 400 if params["days"] == "max" else int(params["days"])
+        return HttpResult(200, market_chart_payload(n, start_ms=today - n * day))  # ends yesterday
+    monkeypatch.setattr(cgd, "request_json", fake_request)
+    cgd.fetch_daily_close_coin("bitcoin", days="max", cache_dir=tmp_path)
+    tail = cgd.fetch_daily_close_coin("bitcoin", cache_dir=tmp_path, since_ms=today - 2 * day)
+    assert len(calls) == 2 and calls[1] != "max" and len(tail) == 2
+    cgd.fetch_daily_close_coin("bitcoin", cache_dir=tmp_path, since_ms=today - day)  # next resume point
+    assert len(calls) == 3
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cli import daily_update
+from src.index.base_index import NOTES
+from src.index.checkpoint import IndexCheckpoint
+from src.reports.metrics import perf_metrics_from_index
+from src.reports.rolling import rolling_metrics
+
+def _closes(n=120, seed=5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"date": pd.date_range("2024-01-01", periods=n, freq="D"),
+                         "close": 50.0 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))})
+
+def _index(closes: pd.DataFrame) -> pd.DataFrame:
+    div = closes["close"].iloc[0] / 1000.0
+    return pd.DataFrame({"date": closes["date"].dt.date, "index_level": closes["close"] / div,
+                         "divisor": div, "notes": NOTES})
+
+def test_bootstrap_plus_steps_matches_full_rebuild(tmp_path):
+    closes = _closes()
+    full = _index(closes)
+    full.to_csv(tmp_path / "full.csv", index=False)
+    ck = IndexCheckpoint.bootstrap("t", full.iloc[:70], shares={"x": 1.0},
+                                   last_prices={"x": float(closes["close"].iloc[69])}, windows=(5, 30))
+    rows = [ck.step(d, {"x": c}) for d, c in closes.iloc[70:].itertuples(index=False)]
+    np.testing.assert_allclose([r["index_level"] for r in rows], full["index_level"].iloc[70:])
+    want = perf_metrics_from_index(str(tmp_path / "full.csv"))
+    for k in ("CAGR", "AnnVol", "MaxDD"):
+        assert ck.metrics()[k] == pytest.approx(want[k], rel=1e-9)
+    ref = rolling_metrics(full["index_level"], windows=(5, 30)).iloc[-1]
+    for k, v in ck.rolling_values().items():
+        assert v == pytest.approx(ref[k], rel=1e-9)
+
+    ck.save(tmp_path / "ck.json")
+    again = IndexCheckpoint.load(tmp_path / "ck.json")
+    assert again.to_dict() == ck.to_dict()
+    assert again.step("2030-01-01", {"x": 60.0}) == ck.step("2030-01-01", {"x": 60.0})
+
+def _setup(tmp_path, monkeypatch, closes, history_rows):
+    monkeypatch.chdir(tmp_path)
+    raw = tmp_path / "data" / "raw" / "coingecko"
+    raw.mkdir(parents=True)
+    closes.to_parquet(raw / "bitcoin_usd_daily.parquet", index=False)
+    csv = tmp_path / "idx.csv"
+    _index(closes).iloc[:history_rows].to_csv(csv, index=False)
+    return csv, ["--csv", str(csv), "--factsheet", str(tmp_path / "fs.md")]
+
+def test_daily_update_rerun_is_a_noop_and_crash_safe(tmp_path, monkeypatch, capsys):
+    closes = _closes(100)
+    csv, argv = _setup(tmp_path, monkeypatch, closes.iloc[:90], 60)
+    daily_update.main(argv)                      # seeds the checkpoint from the CSV, appends 30 rows
+    daily_update.main(argv)                      # no new bars
+    assert "up to date" in capsys.readouterr().out
+    assert len(pd.read_csv(csv)) == 90
+
+    closes.to_parquet(tmp_path / "data" / "raw" / "coingecko" / "bitcoin_usd_daily.parquet", index=False)
+    def killed(self, path):
+        raise RuntimeError("killed")
+    with monkeypatch.context() as m:
+        m.setattr(IndexCheckpoint, "save", killed)
+        with pytest.raises(RuntimeError, match="killed"):
+            daily_update.main(argv)              # rows appended, checkpoint not advanced
+    daily_update.main(argv)                      # replays the same 10 days from the old checkpoint
+    out = pd.read_csv(csv, parse_dates=["date"])
+    assert out["date"].is_unique and len(out) == 100
+    np.testing.assert_allclose(out["index_level"], _index(closes)["index_level"])
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import inspect, os, subprocess, sys
+from pathlib import Path
+
+import pytest
+
+from src.__main__ import COMMANDS, main
+
+ROOT = Path(__file__).resolve().parents[2]
+
+def _python(code: str, cwd: Path) -> str:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+HEAVY = ("pandas", "numpy", "pyarrow", "requests", "asyncio", "matplotlib")
+
+@pytest.mark.parametrize("argv", [["--help"]] + [[name, "--help"] for name in COMMANDS])
+def test_dispatcher_help_imports_no_heavy_modules(argv):
+    out = _python("import sys\nfrom src.__main__ import main\ntry:\n    main(%r)\nexcept SystemExit:\n    pass\n"
+                  "print(sorted(m for m in %r if m in sys.modules))" % (argv, HEAVY), ROOT)
+    assert out.strip().splitlines()[-1] == "[]"
+
+def test_pull_default_store_root_matches_price_store():
+    from src.cli.pull_prices import pull_coin
+    from src.data import price_store
+    assert inspect.signature(pull_coin).parameters["store_root"].default == price_store.STORE_ROOT
+
+def test_imports_have_no_filesystem_side_effects(tmp_path):
+    _python("import src.paths, src.coingecko, src.cli.pull_prices", tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+def test_unknown_command_and_module_table(capsys):
+    assert main(["nope"]) == 2
+    assert "unknown command" in capsys.readouterr().err
+    for name, (module, _) in COMMANDS.items():
+        if module is not None:
+            assert (ROOT / (module.replace(".", "/") + ".py")).exists(), name
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import pandas as pd
+
+from src.data.consensus import consensus_prices
+from src.data.parse import market_chart_frame
+
+def _frame(closes: list[float]) -> pd.DataFrame:
+    ts = pd.date_range("2024-01-01", periods=len(closes), freq="D", tz="UTC")
+    return pd.DataFrame({"timestamp_utc": ts, "date": ts.tz_localize(None),
+                         "close": closes, "volume": 1.0})
+
+def test_bad_print_is_rejected():
+    frames = {"a": _frame([100.0, 101.0, 102.0]),
+              "b": _frame([100.2, 101.2, 102.2]),
+              "c": _frame([99.8, 150.0, 101.8])}
+    prices, stats = consensus_prices(frames, tolerance=0.02)
+    assert list(prices.columns) == ["timestamp_utc","date","close","volume"]
+    assert abs(prices["close"].iloc[1] - 101.1) < 1e-9
+    assert list(stats["n_rejected"]) == [0, 1, 0]
+    assert stats["rejected"].iloc[1] == "c"
+
+def test_two_way_disagreement_falls_back_to_nearest_previous():
+    frames = {"a": _frame([100.0, 101.0]), "b": _frame([100.0, 140.0])}
+    prices, stats = consensus_prices(frames, tolerance=0.02)
+    assert prices["close"].iloc[1] == 101.0
+    assert bool(stats["fallback"].iloc[1])
+
+def test_coingecko_midnight_snapshots_align_with_open_dated_bars():
+    # bars dated by open (CCXT/Yahoo): the 2024-01-04 bar is still open, 103.0 is the live price
+    closes = [100.0, 105.0, 110.0, 103.0]
+    ms = [int(pd.Timestamp(d, tz="UTC").value // 1_000_000)
+          for d in ("2024-01-02", "2024-01-03", "2024-01-04", "2024-01-04 13:05")]
+    # CoinGecko: the 00:00 snapshot on D+1 is D's close, the last point is the live price
+    cg = market_chart_frame({"prices": [[t, c * 1.001] for t, c in zip(ms, closes)],
+                             "total_volumes": [[t, 5.0] for t in ms]})
+    frames = {"coingecko": cg, "ccxt:binance": _frame(closes), "yahoo": _frame([c * 0.999 for c in closes])}
+    prices, stats = consensus_prices(frames, tolerance=0.005)
+    assert list(prices["date"]) == list(pd.date_range("2024-01-01", periods=4, freq="D"))
+    assert list(stats["n_used"]) == [3, 3, 3, 3] and not stats["fallback"].any()
+    assert list(prices["close"].round(6)) == closes
+
+def test_incremental_pull_keeps_earlier_consensus_days(tmp_path, monkeypatch):
+    from src.cli.pull_prices import pull_coin
+    from src.data import consensus
+
+    def ms(d):
+        return int(pd.Timestamp(d, tz="UTC").value // 1_000_000)
+
+    def bars(start, closes):
+        f = _frame(closes)
+        ts = f["timestamp_utc"] + (pd.Timestamp(start, tz="UTC") - f["timestamp_utc"].iloc[0])
+        return f.assign(timestamp_utc=ts, date=ts.dt.tz_localize(None))
+
+    def snapshots(points):
+        return market_chart_frame({"prices": [[ms(d), c] for d, c in points],
+                                   "total_volumes": [[ms(d), 1.0] for d, _ in points]})
+
+    def providers(coin_id, since_ms=None):
+        if since_ms is None:  # 2024-01-04 still open at 103.0
+            closes = [100.0, 101.0, 102.0, 103.0]
+            return {"coingecko": snapshots([("2024-01-02", 100.0), ("2024-01-03", 101.0),
+                                            ("2024-01-04", 102.0), ("2024-01-04 13:00", 103.0)]),
+                    "ccxt:binance": bars("2024-01-01", closes), "yahoo": bars("2024-01-01", closes)}, {}
+        assert since_ms == ms("2024-01-04")  # resumes at the last stored day
+        closes = [103.5, 104.0]
+        # the 01-04 00:00 snapshot (a bad print here) lands on 01-03, where only CoinGecko has data
+        return {"coingecko": snapshots([("2024-01-04", 154.5), ("2024-01-05", 103.5), ("2024-01-05 10:00", 104.0)]),
+                "ccxt:binance": bars("2024-01-04", closes), "yahoo": bars("2024-01-04", closes)}, {}
+
+    monkeypatch.setattr(consensus, "fetch_all_providers", providers)
+    out, rows, _ = pull_coin("bitcoin", provider="consensus", out_root=tmp_path, store_root=None)
+    assert rows == 4
+    pull_coin("bitcoin", provider="consensus", out_root=tmp_path, store_root=None, incremental=True)
+    prices = pd.read_parquet(out)
+    stats = pd.read_parquet(tmp_path / "consensus" / "bitcoin_usd_daily_stats.parquet")
+    assert list(prices["close"]) == [100.0, 101.0, 102.0, 103.5, 104.0]
+    assert list(stats["n_used"]) == [3, 3, 3, 3, 3] and stats["date"].is_unique
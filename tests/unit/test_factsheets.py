@@ -0,0 +1,35 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.reports.factsheets import generate, is_index_csv
+
+def _write_index(path, n=400, seed=0):
+    lv = 1000 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.03, n)))
+    pd.DataFrame({"date": pd.date_range("2021-01-01", periods=n).date, "index_level": lv,
+                  "divisor": 1.0}).to_csv(path, index=False)
+
+def test_renders_in_parallel_then_skips_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the default template resolves from the repo, not the cwd
+    src, out = tmp_path / "idx", tmp_path / "out"
+    src.mkdir()
+    for i in range(3):
+        _write_index(src / f"multi_equal_m_base{i + 1}.csv", seed=i)
+    pd.DataFrame({"date": ["2021-01-01"], "bitcoin": [0.5], "ethereum": [0.5]}).to_csv(
+        src / "multi_equal_m_base1_weights.csv", index=False)
+    csvs = sorted(p for p in src.glob("*.csv") if is_index_csv(p))
+    assert len(csvs) == 3
+
+    status = generate(csvs, out, workers=2, risk_paths=200)
+    assert set(status.values()) == {"rendered"}
+    md = (out / "factsheet_multi_equal_m_base1.md").read_text(encoding="utf-8")
+    assert "$" not in md.replace("$$", "")
+    assert "bitcoin, ethereum" in md and "Monthly" in md and "## Risk (200 resampled paths" in md
+    assert (out / "charts" / "multi_equal_m_base1.png").read_bytes()[:4] == b"\x89PNG"
+
+    assert set(generate(csvs, out, workers=2, risk_paths=200).values()) == {"skipped"}
+    _write_index(csvs[1], seed=99)
+    status = generate(csvs, out, workers=1, risk_paths=200)
+    assert status == {"multi_equal_m_base1": "skipped", "multi_equal_m_base2": "rendered",
+                      "multi_equal_m_base3": "skipped"}
+    assert set(generate(csvs, out, workers=1, risk_paths=0).values()) == {"rendered"}  # options are hashed too
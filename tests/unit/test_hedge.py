@@ -0,0 +1,53 @@
+from __future__ import annotations
+import asyncio, threading, time
+import pytest
+
+from src.utils.hedge import hedge, run_blocking
+from src.utils.http import Cancelled, _sleep
+
+def _attempt(name, seconds, result=None, exc=None, log=None):
+    def fn():
+        if log is not None:
+            log.append(name)
+        time.sleep(seconds)
+        if exc is not None:
+            raise exc
+        return result
+    return name, lambda: run_blocking(fn)
+
+def test_slow_primary_is_hedged_within_budget():
+    t0 = time.perf_counter()
+    name, result = hedge([_attempt("slow", 2.0, "a"), _attempt("fast", 0.0, "b")], budget=0.05)
+    assert (name, result) == ("fast", "b")
+    assert time.perf_counter() - t0 < 1.0
+
+def test_primary_inside_budget_never_starts_fallback():
+    log = []
+    name, _ = hedge([_attempt("primary", 0.0, "a", log=log), _attempt("backup", 0.0, "b", log=log)], budget=1.0)
+    assert name == "primary" and log == ["primary"]
+
+def test_failure_hands_over_without_waiting_for_budget():
+    t0 = time.perf_counter()
+    name, _ = hedge([_attempt("down", 0.0, exc=RuntimeError("HTTP 500")), _attempt("up", 0.0, "b")], budget=30.0)
+    assert name == "up" and time.perf_counter() - t0 < 1.0
+
+def test_invalid_results_fall_through_and_all_failed_raises():
+    with pytest.raises(RuntimeError, match="empty: invalid result.*down: HTTP 500"):
+        hedge([_attempt("empty", 0.0, ""), _attempt("down", 0.0, exc=RuntimeError("HTTP 500"))],
+              budget=1.0, valid=bool)
+
+def test_cancelled_attempt_stops_its_retry_sleep():
+    stopped = threading.Event()
+    def retrying():
+        try:
+            _sleep(30.0)
+        except Cancelled:
+            stopped.set()
+            raise
+    async def race():
+        task = asyncio.ensure_future(run_blocking(retrying))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(race())
+    assert stopped.wait(1.0)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import json
+from email.utils import formatdate
+import pytest
+import requests
+
+from src.utils import http
+from src.utils.http import request_json
+
+class _Response:
+    def __init__(self, status, body=None, headers=None, text=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.text = json.dumps(body) if text is None else text
+        self.content = self.text.encode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+class _Session:
+    """Replays canned responses (or raises exceptions) and records the request headers."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.headers.append(dict(headers or {}))
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+@pytest.fixture
+def fake(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http.time, "sleep", sleeps.append)
+    monkeypatch.setattr(http.time, "time", lambda: 1_700_000_000.0)
+    def install(*responses):
+        s = _Session(*responses)
+        monkeypatch.setattr(http, "session", lambda: s)
+        return s, sleeps
+    return install
+
+def test_retry_after_seconds_and_http_date(fake):
+    date = formatdate(1_700_000_000.0 + 30, usegmt=True)
+    s, sleeps = fake(_Response(429, headers={"Retry-After": "7"}),
+                     _Response(503, headers={"Retry-After": date}),
+                     _Response(503, headers={"Retry-After": "86400"}),
+                     _Response(200, {"ok": 1}, headers={"ETag": '"v2"'}))
+    res = request_json("https://x")
+    assert (res.status, res.payload, res.etag) == (200, {"ok": 1}, '"v2"')
+    assert sleeps == [7.0, 30.0, http.MAX_RETRY_AFTER]
+
+def test_validators_are_sent_and_304_has_no_payload(fake):
+    s, _ = fake(_Response(304, text="", headers={"ETag": '"v1"', "Last-Modified": "Tue, 14 Nov 2023 22:13:20 GMT"}))
+    res = request_json("https://x", headers={"x-key": "k"},
+                       validators={"_etag": '"v1"', "_last_modified": "Tue, 14 Nov 2023 22:13:20 GMT"})
+    assert s.headers == [{"x-key": "k", "If-None-Match": '"v1"', "If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}]
+    assert (res.status, res.payload, res.etag) == (304, None, '"v1"')
+
+def test_retries_run_out_with_exponential_backoff(fake):
+    s, sleeps = fake(*[_Response(500, text="upstream down")] * 4)
+    res = request_json("https://x", max_retries=4, backoff=1.0, max_backoff=3.0)
+    assert (res.status, res.payload) == (500, "upstream down")
+    assert sleeps == [1.0, 2.0, 3.0]  # no sleep after the last attempt
+    s, sleeps = fake(*[requests.ConnectionError("reset")] * 3)
+    with pytest.raises(requests.ConnectionError):
+        request_json("https://x", max_retries=3)
+
+def test_non_json_200_is_retried(fake):
+    s, sleeps = fake(_Response(200, text="<html>gateway</html>"), _Response(200, [1, 2]))
+    assert request_json("https://x").payload == [1, 2]
+    assert sleeps == [1.0]
+    fake(*[_Response(200, text='{"prices": [[1,')] * 2)
+    with pytest.raises(ValueError):
+        request_json("https://x", max_retries=2)
+
+def test_other_errors_return_the_body_without_retrying(fake):
+    s, sleeps = fake(_Response(401, {"error": {"status": {"error_code": 10012}}}))
+    res = request_json("https://x")
+    assert res.status == 401 and res.payload["error"]["status"]["error_code"] == 10012
+    assert sleeps == [] and len(s.headers) == 1
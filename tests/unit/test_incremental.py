@@ -0,0 +1,29 @@
+from __future__ import annotations
+import pandas as pd
+
+from src.data.incremental import append_tail, resume_since_ms, days_since, DAY_MS
+
+def _frame(days: list[str], closes: list[float]) -> pd.DataFrame:
+    ts = pd.to_datetime(days, utc=True)
+    return pd.DataFrame({
+        "timestamp_utc": ts,
+        "date": ts.tz_convert("UTC").tz_localize(None).normalize(),
+        "close": closes,
+        "volume": [1.0] * len(days),
+    })
+
+def test_append_tail_replaces_refetched_day():
+    old = _frame(["2024-01-01", "2024-01-02"], [10.0, 11.0])
+    tail = _frame(["2024-01-02", "2024-01-03"], [11.5, 12.0])
+    out = append_tail(old, tail)
+    assert list(out["close"]) == [10.0, 11.5, 12.0]
+    assert out["timestamp_utc"].is_monotonic_increasing
+    assert list(out.columns) == ["timestamp_utc","date","close","volume"]
+
+def test_resume_point_and_days():
+    old = _frame(["2024-01-01", "2024-01-02"], [10.0, 11.0])
+    since = resume_since_ms(old)
+    assert since == int(pd.Timestamp("2024-01-02", tz="UTC").value // 1_000_000)
+    assert resume_since_ms(None) is None
+    assert days_since(since, since + DAY_MS // 2) == 2
+    assert days_since(None, since) is None
@@ -0,0 +1,40 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.index.engine import build_index, compute_weights, rebalance_mask
+
+def _prices() -> pd.DataFrame:
+    dates = pd.date_range("2024-01-30", periods=5, freq="D")
+    return pd.DataFrame({"a": [10.0, 11.0, 12.0, 12.0, 6.0],
+                         "b": [20.0, 20.0, 10.0, 20.0, 20.0]}, index=dates)
+
+def test_single_asset_matches_base_index():
+    p = _prices()[["a"]]
+    levels, _ = build_index(p, scheme="equal", rebalance="M")
+    np.testing.assert_allclose(levels["index_level"], 1000.0 * p["a"] / 10.0)
+    np.testing.assert_allclose(levels["divisor"], 10.0 / 1000.0)
+
+def test_equal_weight_chains_across_rebalance():
+    levels, weights = build_index(_prices(), scheme="equal", rebalance="M")
+    assert list(levels["rebalance"]) == [True, False, True, False, False]
+    # Jan segment: 0.5*12/10 + 0.5*10/20 = 0.85 at the Feb 1 rebalance
+    lv = levels["index_level"].to_numpy()
+    np.testing.assert_allclose(lv[2], 850.0)
+    # Feb segment restarts at equal weight from 850
+    np.testing.assert_allclose(lv[4], 850.0 * (0.5 * 6 / 12 + 0.5 * 20 / 10))
+    # divisor keeps level == notional-weighted value / divisor at each rebalance
+    np.testing.assert_allclose(levels.loc[2, "divisor"], (12.0 + 10.0) / 850.0)
+    assert len(weights) == 2
+
+def test_capped_weights_redistribute_excess():
+    caps = np.array([[70.0, 20.0, 10.0, 0.0]])
+    prices = np.ones_like(caps)
+    w = compute_weights(prices, caps, scheme="capped", cap=0.4)
+    np.testing.assert_allclose(w.sum(), 1.0)
+    assert w.max() <= 0.4 + 1e-12
+    np.testing.assert_allclose(w[0], [0.4, 0.4, 0.2, 0.0])
+
+def test_rebalance_mask_quarterly():
+    dates = pd.date_range("2024-03-30", periods=4, freq="D")
+    assert list(rebalance_mask(dates, "Q")) == [True, False, True, False]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import json
+import time
+
+from src.utils import instrument
+from src.utils.cache import is_fresh, read_json_cache, write_json_cache
+
+def test_spans_counters_and_cache_hit_rate(tmp_path):
+    instrument.reset()
+    for _ in range(3):
+        with instrument.span("parse.x"):
+            time.sleep(0.001)
+    instrument.incr("http.bytes", 100)
+    instrument.incr("http.bytes", 20)
+
+    path = tmp_path / "c.json"
+    assert read_json_cache(path) is None                       # miss
+    write_json_cache(path, {"_fetched_at": time.time()})
+    assert is_fresh(read_json_cache(path), 60)                 # fresh hit
+    assert not is_fresh(read_json_cache(path), -1)             # stale hit
+
+    rep = instrument.report()
+    assert rep["spans"]["parse.x"]["count"] == 3
+    assert rep["spans"]["parse.x"]["total_s"] >= 0.003
+    assert rep["counters"]["http.bytes"] == 120
+    assert rep["counters"]["cache.hit"] == 2 and rep["counters"]["cache.miss"] == 1
+    assert rep["derived"]["cache_hit_rate"] == 1 / 3
+
+def test_profiled_stage_in_report(tmp_path):
+    instrument.reset()
+    instrument.enable_profile(["index"])
+    with instrument.span("index.build"):
+        with instrument.span("index.inner"):               # covered by the outer profiler
+            sum(range(1000))
+    out = tmp_path / "run.json"
+    instrument.write_report(out, {"command": "test"})
+    rep = json.loads(out.read_text())
+    assert list(rep["profiles"]) == ["index.build"]
+    assert rep["command"] == "test"
+    assert (tmp_path / "run.index.build.prof").exists()
+    instrument.reset()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.reports.metrics import batch_perf_metrics, perf_metrics_from_index
+from src.reports.rolling import rolling_corr, rolling_metrics, RollingWindow
+
+def _levels() -> pd.DataFrame:
+    dates = pd.date_range("2024-01-01", periods=6, freq="D")
+    return pd.DataFrame({
+        "up_down": [100.0, 110.0, 99.0, 88.0, 110.0, 120.0],
+        "late":    [np.nan, np.nan, 50.0, 55.0, 60.0, 54.0],
+    }, index=dates)
+
+def _reference(lv: np.ndarray, ann_factor: float = 365) -> dict:
+    """The original single-series formulas."""
+    rets = np.diff(lv) / lv[:-1]
+    return {"CAGR": (lv[-1] / lv[0]) ** (ann_factor / len(rets)) - 1,
+            "AnnVol": np.std(rets, ddof=1) * np.sqrt(ann_factor),
+            "MaxDD": (lv / np.maximum.accumulate(lv) - 1.0).min()}
+
+def test_batch_matches_reference_formulas(tmp_path):
+    rng = np.random.default_rng(11)
+    lv = _levels()
+    lv = pd.concat([lv, pd.DataFrame({"walk": 100 * np.exp(np.cumsum(rng.normal(0, 0.03, 6)))}, index=lv.index)], axis=1)
+    batch = batch_perf_metrics(lv)
+    for name in lv:
+        ref = _reference(lv[name].dropna().to_numpy())
+        for k, v in ref.items():
+            np.testing.assert_allclose(batch.loc[name, k], v, rtol=1e-12)
+    csv = tmp_path / "idx.csv"
+    lv[["walk"]].rename(columns={"walk": "index_level"}).rename_axis("date").to_csv(csv)
+    single = perf_metrics_from_index(str(csv))
+    for k, v in _reference(lv["walk"].to_numpy()).items():
+        np.testing.assert_allclose(single[k], v, rtol=1e-9)
+
+def test_ratios_by_hand():
+    # rets +10%, -10%, +10%; three bars a year so CAGR is the plain total return
+    m = batch_perf_metrics(np.array([100.0, 110.0, 99.0, 108.9]), ann_factor=3).iloc[0]
+    np.testing.assert_allclose(m["CAGR"], 0.089)
+    np.testing.assert_allclose(m["AnnVol"], 0.2)   # var = (2 * (0.2/3)**2 + (0.4/3)**2) / 2 = 0.04/3
+    np.testing.assert_allclose(m["MaxDD"], -0.1)
+    np.testing.assert_allclose(m["Sharpe"], 0.5)   # mean 1/30 * 3 / 0.2
+    np.testing.assert_allclose(m["Sortino"], 1.0)  # downside dev sqrt(0.01 / 3 * 3) = 0.1
+    np.testing.assert_allclose(m["Calmar"], 0.89)
+
+def test_drawdown_episode_dates_and_duration():
+    m = batch_perf_metrics(_levels())
+    row = m.loc["up_down"]
+    np.testing.assert_allclose(row["MaxDD"], 88.0 / 110.0 - 1.0)
+    assert row["PeakDate"] == pd.Timestamp("2024-01-02")
+    assert row["TroughDate"] == pd.Timestamp("2024-01-04")
+    assert row["RecoveryDate"] == pd.Timestamp("2024-01-05")
+    assert row["MaxDDDuration"] == 2
+    late = m.loc["late"]
+    assert pd.isna(late["RecoveryDate"])
+    np.testing.assert_allclose(late["CAGR"], (54.0 / 50.0) ** (365 / 3) - 1.0)
+
+def test_streaming_rolling_matches_batch():
+    rng = np.random.default_rng(7)
+    s = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60))))
+    batch = rolling_metrics(s, windows=(5, 20))
+    windows = [RollingWindow(5), RollingWindow(20)]
+    rows = []
+    for v in s:
+        row = {}
+        for rw in windows:
+            row.update(rw.update(v))
+        rows.append(row)
+    stream = pd.DataFrame(rows).astype(float)[batch.columns]
+    pd.testing.assert_frame_equal(stream, batch, check_exact=False, rtol=1e-9, atol=1e-12)
+
+def test_rolling_corr_matches_pandas_through_gaps():
+    rng = np.random.default_rng(3)
+    idx = pd.date_range("2024-01-01", periods=150, freq="D")
+    r = rng.normal(0, 0.02, (150, 2))
+    a = pd.Series(100 * np.exp(np.cumsum(r[:, 0])), index=idx)
+    b = pd.Series(50 * np.exp(np.cumsum(0.6 * r[:, 0] + 0.8 * r[:, 1])), index=idx)
+    a.iloc[:5] = np.nan   # late start
+    b.iloc[60:63] = np.nan  # gap in one series only
+    ra, rb = a.pct_change(fill_method=None), b.pct_change(fill_method=None)
+    for w, mp in ((20, None), (20, 15), (7, 3)):
+        got = rolling_corr(a, b, w, min_periods=mp)
+        ref = ra.rolling(w, min_periods=mp).corr(rb)
+        pd.testing.assert_series_equal(got, ref, check_names=False, rtol=1e-8)
+    assert rolling_corr(a, b, 20).notna().sum() == 150 - 5 - 20 - 23
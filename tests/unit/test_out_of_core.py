@@ -0,0 +1,36 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.index.base_index import checkpoint_path, make_base_index_for_coin
+from src.index.out_of_core import (build_base_index_chunked, iter_memmap_closes, iter_parquet_closes,
+                                   write_close_archive)
+
+def _prices(tmp_path, n=50):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=n, freq="D"),
+                       "close": 30.0 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))})
+    p = tmp_path / "data" / "raw" / "coingecko" / "bitcoin_usd_daily.parquet"
+    p.parent.mkdir(parents=True)
+    df.to_parquet(p, index=False)
+    return p
+
+def test_chunked_matches_in_memory_and_drops_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src = _prices(tmp_path)
+    make_base_index_for_coin("bitcoin", tmp_path / "full.csv")
+    out = tmp_path / "chunked.csv"
+    checkpoint_path(out).write_text("{}", encoding="utf-8")
+    info = build_base_index_chunked(iter_parquet_closes(src, batch_rows=7), out)
+    assert info["rows"] == 50 and not checkpoint_path(out).exists()
+    pd.testing.assert_frame_equal(pd.read_csv(out), pd.read_csv(tmp_path / "full.csv"))
+
+def test_close_archive_round_trip(tmp_path):
+    ts = np.arange(25, dtype=np.int64) * 60_000
+    close = np.linspace(1.0, 2.0, 25)
+    chunks = [(ts[i:i + 10], close[i:i + 10]) for i in range(0, 25, 10)]
+    assert write_close_archive(iter(chunks), tmp_path / "c.bin") == 25
+    back = list(iter_memmap_closes(tmp_path / "c.bin", batch_rows=4))
+    assert [len(t) for t, _ in back] == [4] * 6 + [1]
+    np.testing.assert_array_equal(np.concatenate([t for t, _ in back]), ts)
+    np.testing.assert_array_equal(np.concatenate([c for _, c in back]), close)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.coingecko as cg
+from src.data.coingecko import _build_df_from_payload
+from src.data.parse import timeframe_ms
+from src.reports.metrics import periods_per_year
+from src.utils.http import HttpResult
+
+FIXTURE = Path(__file__).resolve().parents[1] / "fixtures" / "coingecko_bitcoin_usd_30.json"
+
+def _payload() -> dict:
+    return json.loads(FIXTURE.read_text(encoding="utf-8"))
+
+def _no_network(*args, **kwargs):
+    raise AssertionError("network fetch attempted")
+
+def test_build_df_from_recorded_payload():
+    payload = _payload()
+    df = _build_df_from_payload(payload)
+    assert list(df.columns) == ["timestamp_utc", "date", "close", "volume"]
+    assert len(df) == len(payload["prices"])
+    assert df["timestamp_utc"].is_monotonic_increasing
+    assert (df["date"] == df["timestamp_utc"].dt.floor("D").dt.tz_localize(None)).all()
+    assert df["volume"].notna().all()
+
+def test_coingecko_daily_parses_cached_payload_offline(tmp_path, monkeypatch):
+    payload = _payload()
+    monkeypatch.setattr(cg, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(cg, "request_json", lambda *a, **k: HttpResult(200, payload))
+    cg._coingecko_daily("bitcoin", "usd", 30)                       # populates the cache
+    monkeypatch.setattr(cg, "request_json", _no_network)
+    df = cg._coingecko_daily("bitcoin", "usd", 30)
+    assert list(df.columns) == ["date", "price", "market_cap", "total_volume"]
+    assert df["date"].is_unique and df["date"].is_monotonic_increasing
+    assert pd.api.types.is_datetime64_ns_dtype(df["date"])
+    assert df["date"].iloc[-1] == pd.Timestamp(payload["prices"][-1][0], unit="ms").normalize()
+
+def test_vectorized_parse_helpers():
+    from src.data.parse import DAY_MS, align, canonical_frame, first_per_key, floor_day_ms, rows_to_array
+    a = rows_to_array([[1, "2.5"], [3, None]], 2)                 # string and null cells
+    assert a[0, 1] == 2.5 and np.isnan(a[1, 1])
+    ms = np.array([DAY_MS + 5, 5, DAY_MS + 1], dtype=np.int64)
+    day, v = first_per_key(floor_day_ms(ms), np.array([10.0, 20.0, 30.0]))
+    np.testing.assert_array_equal(day, [0, DAY_MS])
+    np.testing.assert_array_equal(v, [20.0, 10.0])                 # earliest row per day wins
+    vals, found = align(np.array([0, 7, DAY_MS]), day, v)
+    np.testing.assert_array_equal(found, [True, False, True])
+    df = canonical_frame(ms, np.array([1.0, 2.0, 3.0]))
+    assert list(df.columns) == ["timestamp_utc", "date", "close", "volume"]
+    assert df["timestamp_utc"].is_monotonic_increasing
+    assert (df["date"] == df["timestamp_utc"].dt.tz_convert("UTC").dt.date.astype("datetime64[ns]")).all()
+
+def test_timeframes_and_annualization():
+    assert [timeframe_ms(t) for t in ("1m", "4h", "1D", "1w")] == [60_000, 14_400_000, 86_400_000, 604_800_000]
+    assert periods_per_year("1d") == 365 and periods_per_year("1h") == 8760
+    with pytest.raises(ValueError):
+        timeframe_ms("1mo")
@@ -0,0 +1,33 @@
+from __future__ import annotations
+import pandas as pd
+
+from src.data import price_store
+
+def _frame(start: str, periods: int, close0: float) -> pd.DataFrame:
+    ts = pd.date_range(start, periods=periods, freq="D", tz="UTC")
+    return pd.DataFrame({
+        "timestamp_utc": ts,
+        "date": ts.tz_localize(None),
+        "close": [close0 + i for i in range(periods)],
+        "volume": 1.0,
+    })
+
+def test_append_is_idempotent_and_spans_years(tmp_path):
+    df = price_store.normalize_prices(_frame("2023-12-30", 5, 100.0), provider="ccxt")
+    price_store.append(df.iloc[:3], "bitcoin", root=tmp_path)
+    price_store.append(df.iloc[2:], "bitcoin", root=tmp_path)
+    out = price_store.read("bitcoin", root=tmp_path)
+    assert len(out) == 5
+    assert list(out.columns) == price_store.PRICE_COLUMNS
+    assert out["date"].is_monotonic_increasing
+    assert (tmp_path / "prices" / "asset=bitcoin" / "year=2024").is_dir()
+
+def test_range_and_projection(tmp_path):
+    price_store.append(price_store.normalize_prices(_frame("2024-01-01", 10, 100.0)), "bitcoin", root=tmp_path)
+    price_store.append(price_store.normalize_prices(_frame("2024-01-03", 10, 10.0)), "ethereum", root=tmp_path)
+    out = price_store.read("bitcoin", start="2024-01-04", end="2024-01-06", columns=["date","close"], root=tmp_path)
+    assert list(out.columns) == ["date","close"]
+    assert list(out["close"]) == [103.0, 104.0, 105.0]
+    mat = price_store.read_matrix(["bitcoin","ethereum"], root=tmp_path)
+    assert list(mat.columns) == ["bitcoin","ethereum"]
+    assert mat["ethereum"].isna().sum() == 2
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports.range_query import RangeIndex, range_index
+
+def _levels(n=500, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.Series(1000 * np.exp(np.cumsum(rng.normal(0, 0.04, n))),
+                     index=pd.date_range("2020-01-01", periods=n, freq="D"))
+
+def _brute(s: pd.Series):
+    return {"return": s.iloc[-1] / s.iloc[0] - 1, "high": s.max(), "low": s.min(),
+            "max_drawdown": (s / s.cummax() - 1).min()}
+
+def test_queries_match_brute_force_on_random_ranges():
+    s = _levels()
+    q = RangeIndex(s)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        i, j = sorted(rng.integers(0, len(s), 2))
+        a, b = s.index[i], s.index[j]
+        want = _brute(s.loc[a:b])
+        got = q.summary(a, b)
+        assert got["bars"] == j - i + 1
+        for k, v in want.items():
+            assert got[k] == pytest.approx(v, rel=1e-9, abs=1e-12), k
+        assert q.ret(a, b) == pytest.approx(want["return"], rel=1e-9, abs=1e-12)
+        assert q.high(a, b) == pytest.approx(want["high"])
+        assert q.low(a, b) == pytest.approx(want["low"])
+        assert q.max_drawdown(a, b) == pytest.approx(want["max_drawdown"], abs=1e-12)
+
+def test_bounds_snap_to_observed_dates():
+    s = _levels(10)[::2]                       # every other day
+    q = RangeIndex(s)
+    assert q.span("2020-01-02", "2020-01-06") == (1, 2)
+    assert q.span(None, "2030-01-01") == (0, len(s) - 1)
+    with pytest.raises(ValueError):
+        q.span("2020-01-02", "2020-01-02")
+
+def test_registry_rebuilds_when_csv_changes(tmp_path):
+    p = tmp_path / "idx.csv"
+    _levels(50).rename("index_level").rename_axis("date").reset_index().to_csv(p, index=False)
+    a = range_index(p)
+    assert range_index(p) is a
+    _levels(60).rename("index_level").rename_axis("date").reset_index().to_csv(p, index=False)
+    os.utime(p, (0, p.stat().st_mtime + 5))       # same-second rewrite on coarse-mtime filesystems
+    assert len(range_index(p)) == 60
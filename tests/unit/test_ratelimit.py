@@ -0,0 +1,51 @@
+from __future__ import annotations
+import pytest
+
+from src.utils import ratelimit
+from src.utils.ratelimit import TokenBucket, limiter
+
+class _Clock:
+    """Fake monotonic clock; sleep() advances it and records the requested waits."""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, s):
+        self.sleeps.append(s)
+        self.now += s
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", c.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", c.sleep)
+    return c
+
+def test_burst_then_sustained_rate(clock):
+    b = TokenBucket(rate=2.0, capacity=3)
+    assert [b.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]  # full bucket: no waiting
+    assert b.acquire() == pytest.approx(0.5)
+    assert [b.acquire() for _ in range(4)] == pytest.approx([0.5] * 4)
+    assert sum(clock.sleeps) == pytest.approx(2.5)  # 8 calls = 3 burst + 5 at 2/s
+
+def test_idle_time_refills_up_to_capacity(clock):
+    b = TokenBucket(rate=1.0, capacity=2)
+    b.acquire(), b.acquire()
+    clock.now += 60.0  # a long pause earns at most `capacity` tokens
+    assert [b.acquire(), b.acquire()] == [0.0, 0.0]
+    assert b.acquire() == pytest.approx(1.0)
+
+def test_registry_shares_one_bucket_per_name(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "_LIMITERS", {})
+    ex = limiter("someexchange", rate=4.0, capacity=1)
+    assert limiter("someexchange", rate=100.0) is ex and ex.rate == 4.0  # first registration wins
+    rate, cap = ratelimit._BUDGETS["coingecko"]
+    cg = limiter("coingecko")
+    assert (cg.rate, cg.capacity) == (rate, cap) and limiter("coingecko") is cg
+    ex.acquire()
+    assert limiter("someexchange").acquire() == pytest.approx(0.25)  # the second caller waits on the shared bucket
+    with pytest.raises(ValueError):
+        TokenBucket(0)
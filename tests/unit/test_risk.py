@@ -0,0 +1,29 @@
+from __future__ import annotations
+import numpy as np
+
+from src.reports.risk import block_bootstrap, path_stats, risk_summary, simulate
+
+def test_block_bootstrap_keeps_consecutive_runs():
+    rets = np.arange(10, dtype=float)
+    R = block_bootstrap(rets, 50, 12, 4, np.random.default_rng(0))
+    assert R.shape == (50, 12)
+    # inside a block each draw is the next history value (circularly)
+    for j in (0, 1, 2, 4, 5, 6):
+        np.testing.assert_array_equal(R[:, j + 1], (R[:, j] + 1) % 10)
+
+def test_path_stats_on_known_path():
+    s = path_stats(np.array([[0.1, -0.5, 0.0, 1.0]]), ann_factor=4)
+    np.testing.assert_allclose(s["TotalReturn"], [1.1 * 0.5 * 2.0 - 1.0])
+    np.testing.assert_allclose(s["MaxDD"], [-0.5])
+
+def test_seeded_and_chunk_bounded():
+    rets = np.random.default_rng(1).normal(0.001, 0.03, 400)
+    a = simulate(rets, "bootstrap", n_paths=1000, horizon=50, seed=3, chunk=256)
+    b = simulate(rets, "bootstrap", n_paths=1000, horizon=50, seed=3, chunk=256)
+    assert len(a["MaxDD"]) == 1000
+    np.testing.assert_array_equal(a["MaxDD"], b["MaxDD"])
+    r = risk_summary(np.cumprod(1 + rets) * 1000, n_paths=2000, horizon=60, seed=3)
+    for m in ("bootstrap", "montecarlo"):
+        lo, mid, hi = r[m]["ci"]["MaxDD"]
+        assert lo <= mid <= hi <= 0
+        assert r[m]["CVaR"] <= r[m]["VaR"]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from src.index.engine import build_index
+from src.index.sweep import expand_grid, run_sweep, variant_key
+
+def _prices():
+    rng = np.random.default_rng(3)
+    d = pd.date_range("2022-01-01", periods=200, freq="D")
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (200, 4)), axis=0)),
+                        index=d, columns=list("abcd"))
+
+def test_sweep_matches_direct_build_and_resumes(tmp_path):
+    p = _prices()
+    variants = expand_grid(scheme=["equal"], rebalance=["M", "Q"], base_date=[None, "2022-03-01"])
+    out = tmp_path / "sweep.csv"
+    res = run_sweep(p, variants[:2], out, workers=2)
+    assert len(res) == 2
+
+    res = run_sweep(p, variants, out, workers=2)
+    assert len(res) == 4 and len(pd.read_csv(out)) == 4   # finished variants are not re-run
+
+    v = {"scheme": "equal", "rebalance": "Q", "base_date": "2022-03-01"}
+    row = res.set_index("key").loc[variant_key(v)]
+    levels, _ = build_index(p.loc["2022-03-01":], scheme="equal", rebalance="Q")
+    lv = levels["index_level"].to_numpy()
+    assert row["rows"] == len(lv)
+    assert np.isclose(row["MaxDD"], (lv / np.maximum.accumulate(lv) - 1).min())
+
+def test_resume_keeps_numeric_looking_keys_as_strings(tmp_path):
+    p = _prices()
+    v = expand_grid(scheme=["equal"], rebalance=["M"], top_n=[14])
+    assert variant_key(v[0]) == "023183007908"  # would parse as the int 23183007908
+    out = tmp_path / "sweep.csv"
+    assert list(run_sweep(p, v, out, market_caps=p, workers=1)["key"]) == ["023183007908"]
+    assert len(run_sweep(p, v, out, market_caps=p, workers=1)) == 1
+    assert len(pd.read_csv(out)) == 1